@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reproducible solver benchmarks with machine-readable results.
+
+Every solver runs on the same seeded mazes, maze generation and graph construction are timed apart
+from the searches, and the sizes are sharded over a process pool. Results go to JSON or CSV and can
+be compared against a saved baseline to flag regressions.
+
+    python Benchmark.py --sizes 101 301 --output results.json
+    python Benchmark.py --sizes 101 301 --compare results.json
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from Maze import *
+from MazeSolver import *
+
+
+ALGORITHMS  = ['bfs', 'wavefront', 'dfs', 'dijkstra', 'dial', 'a_star', 'jump_point_search', 'bidirectional', 'greedy_best_first_search',
+               'wall_follower', 'tremaux', 'pledge']
+GENERATORS  = {'backtrack': Maze.backtrack_generator, 'kruskal': Maze.kruskal_generator, 'wilson': Maze.wilson_generator,
+               'eller': Maze.eller_generator, 'empty': lambda height, width, seed: Maze.empty_maze(height, width)}
+FIELDS      = ['algorithm', 'generator', 'size', 'seed', 'repeats', 'generate_s', 'graph_s', 'first_s',
+               'median_s', 'p95_s', 'min_s', 'peak_bytes', 'path_length', 'expanded', 'generated', 'pushes', 'peak_frontier']
+
+
+def run_size(size: int, algorithms: List[str], generators: List[str], seeds: List[int], repeats: int) -> List[Dict]:
+    """
+    Benchmark every algorithm on the mazes of one size.
+
+    Every (generator, seed) maze is built once and shared by the algorithms. The first search of every
+    algorithm is reported apart, with its counters (it builds the cached structures: contracted graph,
+    distance fields), the median and p95 cover the next repeats searches, the peak memory is traced in
+    one more search (tracing slows the search down).
+
+    Returns: List[Dict] -> one row per (algorithm, generator, seed), with the FIELDS keys
+    """
+    rows = []
+    for generator in generators:
+        for seed in seeds:
+            start_time  = time.perf_counter()
+            maze        = GENERATORS[generator](size, size, seed)
+            generate    = time.perf_counter() - start_time
+            start_time  = time.perf_counter()
+            maze.graph
+            graph       = time.perf_counter() - start_time
+
+            for algorithm in algorithms:
+                solve       = getattr(MazeSolver(maze, None, cache=DistanceFieldCache()), algorithm)
+                first       = solve(result=True)
+                times       = []
+                for repeat in range(repeats):
+                    start_time = time.perf_counter()
+                    solve()
+                    times.append(time.perf_counter() - start_time)
+
+                tracemalloc.start()
+                solve()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                rows.append({'algorithm': algorithm, 'generator': generator, 'size': size, 'seed': seed, 'repeats': repeats,
+                             'generate_s': generate, 'graph_s': graph, 'first_s': first.wall_time,
+                             'median_s': float(np.median(times)), 'p95_s': float(np.percentile(times, 95)),
+                             'min_s': min(times), 'peak_bytes': peak, 'path_length': len(first.path),
+                             'expanded': first.expanded, 'generated': first.generated, 'pushes': first.pushes,
+                             'peak_frontier': first.peak_frontier})
+    return rows
+
+
+def run_suite(sizes: List[int], algorithms: List[str] = ALGORITHMS, generators: List[str] = ('backtrack',),
+              seeds: List[int] = (0,), repeats: int = 10, workers: int = 0) -> List[Dict]:
+    """
+    Benchmark the algorithms on every size, one size per worker process (0 -> in this process).
+    Process pools time the sizes in parallel: use fewer workers than cores so they do not compete.
+
+    Returns: List[Dict] -> rows of run_size, sorted by size, generator, seed and algorithm
+    """
+    arguments = (list(algorithms), list(generators), list(seeds), repeats)
+    if workers:
+        with ProcessPoolExecutor(workers) as executor:
+            shards = list(executor.map(run_size, sizes, *[[argument] * len(sizes) for argument in arguments]))
+    else:
+        shards = [run_size(size, *arguments) for size in sizes]
+    order = {algorithm: index for index, algorithm in enumerate(algorithms)}
+    return sorted((row for rows in shards for row in rows),
+                  key=lambda row: (row['size'], row['generator'], row['seed'], order[row['algorithm']]))
+
+
+def write(rows: List[Dict], path: str) -> None:
+    """
+    Save the rows as CSV if path ends with .csv, JSON otherwise.
+    """
+    with open(path, 'w', newline='') as file:
+        if path.endswith('.csv'):
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, file, indent=1)
+
+def read(path: str) -> List[Dict]:
+    with open(path, newline='') as file:
+        if not path.endswith('.csv'):
+            return json.load(file)
+        return [{field: value if field in ('algorithm', 'generator') else float(value) for field, value in row.items()}
+                for row in csv.DictReader(file)]
+
+
+def compare(rows: List[Dict], baseline: List[Dict], tolerance: float = 0.1, noise: float = 1e-3) -> List[Dict]:
+    """
+    Regressions of rows against a baseline run of the same cases.
+
+    A case regresses when its median time grows more than tolerance (and more than noise seconds, the
+    median of the fastest searches is mostly timer noise), its peak memory grows more than tolerance,
+    or its path length changes.
+
+    Returns: List[Dict] -> algorithm, generator, size, seed, metric, baseline, current and ratio of every regression
+    """
+    cases       = {(row['algorithm'], row['generator'], int(row['size']), int(row['seed'])): row for row in baseline}
+    regressions = []
+    for row in rows:
+        case = (row['algorithm'], row['generator'], int(row['size']), int(row['seed']))
+        if case not in cases:
+            continue
+        base = cases[case]
+        for metric, limit in (('median_s', tolerance), ('peak_bytes', tolerance), ('path_length', 0)):
+            before, after = float(base[metric]), float(row[metric])
+            if after > before * (1 + limit) + (noise if metric == 'median_s' else 0) or (metric == 'path_length' and after != before):
+                regressions.append(dict(zip(('algorithm', 'generator', 'size', 'seed'), case), metric=metric,
+                                        baseline=before, current=after, ratio=after / before if before else float('inf')))
+    return regressions
+
+
+def table(rows: List[Dict]) -> str:
+    lines = [f"{'algorithm':<26}{'generator':<11}{'size':>6}{'seed':>6}{'generate (s)':>14}{'first (s)':>11}"
+             f"{'median (s)':>12}{'p95 (s)':>10}{'peak (MB)':>11}{'length':>8}"]
+    for row in rows:
+        lines.append(f"{row['algorithm']:<26}{row['generator']:<11}{row['size']:>6}{row['seed']:>6}{row['generate_s']:>14.4f}"
+                     f"{row['first_s']:>11.4f}{row['median_s']:>12.4f}{row['p95_s']:>10.4f}{row['peak_bytes'] / 2**20:>11.2f}{row['path_length']:>8}")
+    return '\n'.join(lines)
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[51, 101, 201])
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS)
+    parser.add_argument('--generators', nargs='+', default=['backtrack'], choices=sorted(GENERATORS))
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=0, help='processes, one size per process (0 runs in this process)')
+    parser.add_argument('--output', help='write the results to this .json or .csv file')
+    parser.add_argument('--compare', metavar='BASELINE', help='exit with status 1 if a case regressed against this .json or .csv file')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed relative growth of median time and peak memory')
+    options = parser.parse_args(arguments)
+
+    rows = run_suite(options.sizes, options.algorithms, options.generators, options.seeds, options.repeats, options.workers)
+    print(table(rows))
+    if options.output:
+        write(rows, options.output)
+    if options.compare:
+        regressions = compare(rows, read(options.compare), options.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['algorithm']} {regression['generator']} {regression['size']} seed {regression['seed']}: "
+                  f"{regression['metric']} {regression['baseline']:.6g} -> {regression['current']:.6g} (x{regression['ratio']:.2f})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
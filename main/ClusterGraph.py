@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hierarchical abstract graph of a maze for HPA* (Botea, Müller & Schaeffer 2004).
+"""
+
+from copy import copy
+from itertools import chain
+from typing import Dict, Tuple, List
+
+from GridGraph import *
+from DistanceField import distance_field
+
+import heapq
+import numpy as np
+
+
+# Runs of open border cells at least this long get an entrance at each end instead of one in the middle
+LONG_ENTRANCE = 6
+
+
+def entrances(opened: np.ndarray) -> List[int]:
+    """
+    Entrance positions along a border, one for every run of open cell pairs.
+
+    Parameters: opened (np.ndarray) -> bool, the cells on both sides of the border are open.
+
+    Returns: List[int] -> sorted positions of the entrances
+    """
+    steps       = np.diff(np.concatenate(([0], opened.view(np.int8), [0])))
+    starts      = np.flatnonzero(steps == 1)
+    ends        = np.flatnonzero(steps == -1) - 1
+    long        = ends - starts >= LONG_ENTRANCE - 1
+    positions   = np.concatenate((np.where(long, starts, (starts + ends) // 2), ends[long]))
+    return np.sort(positions).tolist()
+
+
+class ClusterGraph:
+    """
+    Class to represent the abstract graph of a maze split into square clusters.
+
+    The nodes are the entrance cells on the borders between clusters. Entrances facing each other
+    are linked by an edge of length 1, the entrances of the same cluster by their distance inside it.
+    A query connects its start and end to the entrances of their clusters, searches the abstract graph
+    and refines every abstract edge with a search bounded by its cluster.
+
+    The graph listens to Maze.set_cell: only the clusters of the changed cells (and the neighbors whose
+    entrances moved) are rebuilt, on the next query.
+
+    Attributes:
+
+    maze (Maze): The maze.
+
+    cluster_size (int): Side of the clusters, cluster (i, j) has the cells [j*size, (j+1)*size) x [i*size, (i+1)*size).
+
+    columns/rows (int): Number of clusters per row and per column, cluster (i, j) has the id i * columns + j.
+
+    mask (np.ndarray): uint8 neighbor masks of the graph without the edges that cross a cluster border.
+
+    borders (Dict[Tuple[int, int], List[Tuple[int, int]]]): For every pair of adjacent clusters (a < b),
+    the (cell in a, cell in b) entrance pairs.
+
+    links (Dict[int, List[int]]): For every entrance cell, the entrances facing it in other clusters.
+
+    nodes (List[List[int]]): Entrance cells of every cluster.
+
+    intra (Dict[int, List[Tuple[int, int]]]): For every entrance, (entrance, distance) of the entrances
+    of its cluster reachable inside it.
+
+    dirty (set): Clusters changed since the last query.
+    """
+    def __init__(self, maze, cluster_size: int = 32):
+        """
+        Find the entrances of every border and the distances between the entrances of every cluster.
+
+        Args:
+        maze (Maze): The maze.
+        cluster_size (int): Side of the clusters.
+        """
+        graph               = maze.graph
+        self.maze           = maze
+        self.cluster_size   = cluster_size
+        self.columns        = -(-graph.width // cluster_size)
+        self.rows           = -(-graph.height // cluster_size)
+        self.borders: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self.links: Dict[int, List[int]] = {}
+        self.nodes: List[List[int]] = [[] for cluster in range(self.columns * self.rows)]
+        self.intra: Dict[int, List[Tuple[int, int]]] = {}
+        self.dirty          = set()
+        self.stats          = {}  # Counters of the abstract search of the last query
+
+        # Cut the edges that cross a cluster border
+        inside              = np.full((graph.height, graph.width), 15, dtype=np.uint8)
+        inside[:, cluster_size - 1::cluster_size] &= ~np.uint8(EAST)
+        inside[:, ::cluster_size]                 &= ~np.uint8(WEST)
+        inside[cluster_size - 1::cluster_size, :] &= ~np.uint8(SOUTH)
+        inside[::cluster_size, :]                 &= ~np.uint8(NORTH)
+        self.mask           = graph.mask & inside.reshape(-1)
+
+        for cluster in range(self.columns * self.rows):
+            for neighbor in self.adjacent(cluster):
+                if cluster < neighbor: self.set_border(cluster, neighbor)
+        for cluster in range(self.columns * self.rows):
+            self.nodes[cluster] = self.entrances_of(cluster)
+
+        # Distances inside the clusters: the clusters are disconnected in the cut graph, so one
+        # breadth first search from the k-th entrance of every cluster at once gives all their distances
+        cut         = copy(graph)
+        cut.mask    = self.mask
+        cells       = np.array([node for nodes in self.nodes for node in nodes], dtype=np.int64)
+        clusters    = np.repeat(np.arange(len(self.nodes)), [len(nodes) for nodes in self.nodes])
+        rank        = np.concatenate([np.arange(len(nodes)) for nodes in self.nodes] + [np.zeros(0, dtype=np.int64)])
+        source      = np.full(len(self.nodes), -1, dtype=np.int64)
+        for k in range(int(rank.max(initial=-1)) + 1):
+            sources                     = cells[rank == k]
+            source[:]                   = -1
+            source[clusters[rank == k]] = sources
+            distances   = distance_field(cut, sources)[cells]
+            reached     = distances > 0
+            for tail, head, length in zip(source[clusters[reached]].tolist(), cells[reached].tolist(), distances[reached].tolist()):
+                self.intra.setdefault(tail, []).append((head, length))
+
+        maze.subscribe(self.changed)
+
+
+    def close(self) -> None:
+        """
+        Stop listening to the changes of the maze.
+        """
+        self.maze.unsubscribe(self.changed)
+
+    def cluster(self, cell: int) -> int:
+        y, x = divmod(cell, self.maze.graph.width)
+        return (y // self.cluster_size) * self.columns + x // self.cluster_size
+
+    def adjacent(self, cluster: int) -> List[int]:
+        row, column = divmod(cluster, self.columns)
+        return ([cluster + 1] if column + 1 < self.columns else []) + ([cluster - 1] if column > 0 else []) + \
+               ([cluster + self.columns] if row + 1 < self.rows else []) + ([cluster - self.columns] if row > 0 else [])
+
+
+    def set_border(self, cluster: int, neighbor: int) -> bool:
+        """
+        Find the entrance pairs between two adjacent clusters (cluster < neighbor) and link them.
+
+        Returns: bool -> True if the entrances changed
+        """
+        graph, size = self.maze.graph, self.cluster_size
+        cells       = graph.cells.reshape(graph.height, graph.width)
+        row, column = divmod(cluster, self.columns)
+        if neighbor == cluster + 1 and column + 1 < self.columns:
+            # Vertical border, the cells (x, y) | (x + 1, y)
+            x, y    = (column + 1) * size - 1, row * size
+            opened  = (cells[y:y + size, x] == 0) & (cells[y:y + size, x + 1] == 0)
+            pairs   = [((y + position) * graph.width + x, (y + position) * graph.width + x + 1) for position in entrances(opened)]
+        else:
+            # Horizontal border, the cells (x, y) over (x, y + 1)
+            x, y    = column * size, (row + 1) * size - 1
+            opened  = (cells[y, x:x + size] == 0) & (cells[y + 1, x:x + size] == 0)
+            pairs   = [(y * graph.width + x + position, (y + 1) * graph.width + x + position) for position in entrances(opened)]
+
+        previous = self.borders.get((cluster, neighbor), [])
+        if pairs == previous:
+            return False
+        for tail, head in previous:
+            self.links[tail].remove(head)
+            self.links[head].remove(tail)
+            if not self.links[tail]: del self.links[tail]
+            if not self.links[head]: del self.links[head]
+        for tail, head in pairs:
+            self.links.setdefault(tail, []).append(head)
+            self.links.setdefault(head, []).append(tail)
+        if pairs: self.borders[(cluster, neighbor)] = pairs
+        else: del self.borders[(cluster, neighbor)]
+        return True
+
+    def entrances_of(self, cluster: int) -> List[int]:
+        nodes = set()
+        for neighbor in self.adjacent(cluster):
+            side = 0 if cluster < neighbor else 1
+            nodes.update(pair[side] for pair in self.borders.get((min(cluster, neighbor), max(cluster, neighbor)), ()))
+        return sorted(nodes)
+
+
+    def explore(self, source: int, stop: int = -1, hook=None) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Breadth first search from source bounded by its cluster, hook is called with every (x, y) cell reached.
+
+        Returns: (distance, previous) dicts of the cells reached, until stop if given
+        """
+        mask, offsets   = memoryview(self.mask), self.maze.graph.offsets
+        distance        = {source: 0}
+        previous        = {source: source}
+        queue           = [source]
+        for node in queue:
+            if node == stop:
+                break
+            for offset in offsets[mask[node]]:
+                neighbor = node + offset
+                if neighbor not in distance:
+                    distance[neighbor] = distance[node] + 1
+                    previous[neighbor] = node
+                    queue.append(neighbor)
+                    if hook is not None: hook(self.maze.graph.cell(neighbor))
+        return distance, previous
+
+
+    def changed(self, cell: int) -> None:
+        # The cut masks of the cell and its neighbors, as GridGraph.update recomputed them
+        graph = self.maze.graph
+        y, x = divmod(cell, graph.width)
+        for neighbor_x, neighbor_y in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= neighbor_x < graph.width and 0 <= neighbor_y < graph.height:
+                node, mask = neighbor_y * graph.width + neighbor_x, int(graph.mask[neighbor_y * graph.width + neighbor_x])
+                if neighbor_x % self.cluster_size == self.cluster_size - 1: mask &= ~EAST
+                if neighbor_x % self.cluster_size == 0: mask &= ~WEST
+                if neighbor_y % self.cluster_size == self.cluster_size - 1: mask &= ~SOUTH
+                if neighbor_y % self.cluster_size == 0: mask &= ~NORTH
+                self.mask[node] = mask
+        self.dirty.add(self.cluster(cell))
+
+
+    def refresh(self) -> int:
+        """
+        Rebuild the entrances and distances of the changed clusters and of the neighbors whose entrances moved.
+
+        Returns: int -> number of clusters rebuilt
+        """
+        rebuilt = set(self.dirty)
+        for cluster in self.dirty:
+            for neighbor in self.adjacent(cluster):
+                if self.set_border(min(cluster, neighbor), max(cluster, neighbor)):
+                    rebuilt.add(neighbor)
+        self.dirty.clear()
+
+        for cluster in rebuilt:
+            for node in self.nodes[cluster]:
+                self.intra.pop(node, None)
+            self.nodes[cluster] = nodes = self.entrances_of(cluster)
+            for node in nodes:
+                distance, previous = self.explore(node)
+                self.intra[node] = [(other, distance[other]) for other in nodes if other != node and other in distance]
+        return len(rebuilt)
+
+
+    def search(self, start: Tuple[int, int], end: Tuple[int, int], hook=None) -> List[Tuple[int, int]]:
+        """
+        HPA* query: A* on the abstract graph with the start and end connected to it, then refinement.
+        The path is near optimal, it can be longer than a shortest path. hook is called with every (x, y) cell
+        the refinement searches reach (the abstract search only goes through entrances).
+
+        Returns: List[Tuple[int, int]] -> (x, y) coordinates of every cell of the path, empty if there is none.
+        """
+        rebuilt         = self.refresh()
+        graph           = self.maze.graph
+        if not (graph.is_open(start) and graph.is_open(end)):
+            return []
+        start, end      = graph.cell_id(start), graph.cell_id(end)
+        width           = graph.width
+        end_y, end_x    = divmod(end, width)
+
+        # Temporary edges from the start and to the end
+        reached, found  = self.explore(start)
+        start_edges     = [(node, reached[node]) for node in self.nodes[self.cluster(start)] if node in reached and node != start]
+        if end in reached: start_edges.append((end, reached[end]))
+        reached, found  = self.explore(end)
+        end_edges       = {node: reached[node] for node in self.nodes[self.cluster(end)] if node in reached}
+
+        intra, links    = self.intra, self.links
+        heap            = [(0, start)]
+        distance        = {start: 0}
+        previous        = {start: start}
+        expanded        = generated = 0
+        pushes          = peak = 1
+        while heap:
+            priority, node = heapq.heappop(heap)
+            if node == end:
+                break
+            y, x = divmod(node, width)
+            if priority > distance[node] + abs(x - end_x) + abs(y - end_y):
+                continue  # Already expanded with a lower distance
+            expanded += 1
+
+            edges = start_edges if node == start else intra.get(node, ())
+            if node in links: edges = chain(edges, ((link, 1) for link in links[node]))
+            if node in end_edges: edges = chain(edges, ((end, end_edges[node]),))
+            for neighbor, length in edges:
+                generated += 1
+                new_distance = distance[node] + length
+                if neighbor not in distance or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    previous[neighbor] = node
+                    y, x = divmod(neighbor, width)
+                    heapq.heappush(heap, (new_distance + abs(x - end_x) + abs(y - end_y), neighbor))
+                    pushes += 1
+            if len(heap) > peak: peak = len(heap)
+
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak, 'clusters_rebuilt': rebuilt}
+        if end not in previous:
+            return []
+
+        # Refine every abstract edge inside its cluster
+        abstract = [end]
+        while previous[abstract[-1]] != abstract[-1]:
+            abstract.append(previous[abstract[-1]])
+        abstract.reverse()
+        cells = [start]
+        for tail, head in zip(abstract, abstract[1:]):
+            if head in self.links.get(tail, ()):
+                cells.append(head)
+                if hook is not None: hook(graph.cell(head))
+                continue
+            reached, found = self.explore(tail, head, hook)
+            segment = [head]
+            while segment[-1] != tail:
+                segment.append(found[segment[-1]])
+            cells.extend(reversed(segment[:-1]))
+        return [graph.cell(cell) for cell in cells]
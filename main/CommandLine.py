@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line interface: generate maze files, solve them headless and run the benchmarks.
+
+    python main generate --size 1001 --generator eller --seed 7 --output maze.maze
+    python main solve maze.maze other.maze --algorithm a_star --path > paths.jsonl
+    ls mazes/*.maze | python main solve - --output results.jsonl
+    python main bench --sizes 101 301
+    python main serve --port 8765 --workers 4 --maze demo=maze.maze
+    python main loadgen --port 8765 --maze demo --clients 32 --queries 10000
+
+Only the modules a command needs are imported, matplotlib only with --show: solve pays the
+NumPy import and little more. Every solved maze is written as one JSON line when it is done.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Iterator, List
+
+
+GENERATORS = ('backtrack', 'kruskal', 'wilson', 'eller', 'empty')
+
+
+def generate(options) -> int:
+    from Maze import Maze
+    import MazeFile
+
+    height, width = options.size if len(options.size) == 2 else options.size * 2
+    if options.generator == 'empty':
+        maze = Maze.empty_maze(height, width)
+    else:
+        maze = getattr(Maze, f"{options.generator}_generator")(height, width, options.seed)
+    maze.save(options.output, MazeFile.BYTES if options.encoding == 'bytes' else MazeFile.BITS)
+    if options.png:
+        import MazeRaster
+        MazeRaster.save(options.png, maze, scale=options.scale)
+    if options.show:
+        from MazeVisualizer import MazeVisualizer
+        MazeVisualizer(maze).visualize()
+    return 0
+
+
+def paths(names: List[str]) -> Iterator[str]:
+    """
+    Maze files of the command line, '-' reads one file name per line of stdin as they come.
+    """
+    for name in names:
+        if name != '-':
+            yield name
+            continue
+        for line in sys.stdin:
+            if line.strip(): yield line.strip()
+
+
+def solve(options) -> int:
+    from Maze import Maze
+    from MazeSolver import MazeSolver
+
+    visualizer  = None
+    output      = open(options.output, 'w') if options.output else sys.stdout
+    failed      = 0
+    try:
+        for name in paths(options.mazes):
+            maze = Maze.load(name)
+            if options.show:
+                from MazeVisualizer import MazeVisualizer
+                visualizer = MazeVisualizer(maze)
+            solver  = MazeSolver(maze, visualizer)
+            result  = getattr(solver, options.algorithm)(solution=options.show, start=options.start, end=options.end, result=True)
+            failed += not result
+            output.write(json.dumps({'maze': name, **result.to_dict(path=options.path)}) + '\n')
+            output.flush()
+            if options.png:
+                import MazeRaster
+                os.makedirs(options.png, exist_ok=True)
+                image = os.path.join(options.png, os.path.splitext(os.path.basename(name))[0] + '.png')
+                MazeRaster.save(image, maze, result.path, scale=options.scale)
+    finally:
+        if output is not sys.stdout: output.close()
+    return 1 if failed and options.strict else 0
+
+
+def bench(options, arguments: List[str]) -> int:
+    import Benchmark
+    return Benchmark.main(arguments)
+
+
+def serve(options) -> int:
+    import asyncio
+    import MazeService
+
+    mazes = dict(entry.split('=', 1) for entry in options.maze)
+    try:
+        asyncio.run(MazeService.serve(options.host, options.port, options.workers, mazes))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def loadgen(options) -> int:
+    import asyncio
+    import MazeService
+
+    report = asyncio.run(MazeService.load_test(options.host, options.port, options.maze, options.clients, options.queries,
+                                               options.distinct, options.algorithm, options.seed))
+    print(json.dumps(report, indent=1))
+    return 1 if report['failed'] else 0
+
+
+def parser() -> argparse.ArgumentParser:
+    parser      = argparse.ArgumentParser(prog='maze', description=__doc__.strip().splitlines()[0])
+    commands    = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('generate', help='generate a maze file')
+    command.add_argument('--size', type=int, nargs='+', default=[41], metavar='N', help='height [width], odd')
+    command.add_argument('--generator', choices=GENERATORS, default='backtrack')
+    command.add_argument('--seed', type=int)
+    command.add_argument('--encoding', choices=('bytes', 'bits'), default='bytes', help='bytes files are memory mapped on load, bits files are 8 times smaller')
+    command.add_argument('--output', required=True, help='maze file to write')
+    command.add_argument('--png', help='also render the maze to this PNG file (headless)')
+    command.add_argument('--scale', type=int, default=1, help='cells per pixel side of the PNG')
+    command.add_argument('--show', action='store_true', help='show the maze with matplotlib')
+
+    command = commands.add_parser('solve', help='solve maze files, one JSON line per maze')
+    command.add_argument('mazes', nargs='+', help="maze files, '-' reads file names from stdin")
+    command.add_argument('--algorithm', default='a_star')
+    command.add_argument('--start', type=int, nargs=2, metavar=('X', 'Y'))
+    command.add_argument('--end', type=int, nargs=2, metavar=('X', 'Y'))
+    command.add_argument('--path', action='store_true', help='write the cells of the path')
+    command.add_argument('--output', help='JSON lines file, default stdout')
+    command.add_argument('--strict', action='store_true', help='exit with status 1 if a maze has no solution')
+    command.add_argument('--png', metavar='DIRECTORY', help='render every solution to DIRECTORY/<maze>.png (headless)')
+    command.add_argument('--scale', type=int, default=1, help='cells per pixel side of the PNG')
+    command.add_argument('--show', action='store_true', help='show every solution with matplotlib')
+
+    commands.add_parser('bench', help='run the benchmarks (see Benchmark.py --help)', add_help=False)
+
+    command = commands.add_parser('serve', help='serve solve requests, line-delimited JSON over TCP (see MazeService.py)')
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=8765)
+    command.add_argument('--workers', type=int, default=4, help='processes of the solver pool')
+    command.add_argument('--maze', action='append', default=[], metavar='ID=FILE', help='register a maze file, repeatable')
+
+    command = commands.add_parser('loadgen', help='measure the throughput of a running service')
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=8765)
+    command.add_argument('--maze', help='maze id, default the first one registered')
+    command.add_argument('--clients', type=int, default=16, help='connections, one query in flight each')
+    command.add_argument('--queries', type=int, default=1000)
+    command.add_argument('--distinct', type=int, help='distinct (start, end) pairs, fewer than queries repeat them')
+    command.add_argument('--algorithm', default='a_star')
+    command.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+def main(arguments: List[str] = None) -> int:
+    arguments = sys.argv[1:] if arguments is None else arguments
+    options, rest = parser().parse_known_args(arguments)
+    if options.command == 'bench':
+        return bench(options, rest)
+    if rest:
+        parser().error(f"unrecognized arguments: {' '.join(rest)}")
+    return {'generate': generate, 'solve': solve, 'serve': serve, 'loadgen': loadgen}[options.command](options)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Connected components of the open cells of a maze, to tell in O(1) if two cells are connected.
+"""
+
+from collections import deque
+from typing import Dict, List
+
+from GridGraph import *
+
+import numpy as np
+
+
+def label_components(graph: GridGraph) -> np.ndarray:
+    """
+    Label the connected components of the graph with vectorized union-find (hooking and pointer jumping).
+
+    The horizontal runs are joined first with one cumulative maximum, then every round hooks the root of the
+    larger id of every vertical edge between two trees to the smaller root and compresses every run to its
+    root. The edges inside a tree stay inside it and are dropped.
+
+    Returns: np.ndarray (int32) -> label of every cell, the smallest cell id of its component, -1 for walls.
+    """
+    # Every horizontal run of open cells is contracted to its first cell with one cumulative maximum
+    cells   = np.arange(graph.size, dtype=np.int32)
+    joined  = np.zeros(graph.size, dtype=bool)
+    joined[1:] = (graph.mask[:-1] & EAST) != 0  # The cell is joined to the one on its left
+    run     = np.maximum.accumulate(np.where(joined, 0, cells))
+    starts  = np.flatnonzero((graph.cells == 0) & ~joined).astype(np.int32)
+    south   = np.flatnonzero(graph.mask & SOUTH)
+    tails, heads = run[south], run[south + graph.width]
+    parent  = cells.copy()  # Union-find over the runs, only the entries of the first cells are used
+
+    while tails.size:
+        tail_roots, head_roots = parent[tails], parent[heads]
+        apart   = tail_roots != head_roots
+        tails, heads = tails[apart], heads[apart]
+        if not tails.size:
+            break
+        tail_roots, head_roots = tail_roots[apart], head_roots[apart]
+        np.minimum.at(parent, np.maximum(tail_roots, head_roots), np.minimum(tail_roots, head_roots))
+        # Pointer jumping until every run points to its root
+        while True:
+            above = parent[parent[starts]]
+            if np.array_equal(above, parent[starts]):
+                break
+            parent[starts] = above
+    return np.where(graph.cells == 0, parent[run], -1).astype(np.int32)
+
+
+class Components:
+    """
+    Class to keep the connected components of a maze while its cells change (it listens to Maze.set_cell).
+
+    Opening a cell joins the components around it, the smaller ones are relabeled. Closing a cell runs
+    a search from every open neighbor at the same pace: the searches that meet are still connected, a
+    search that runs out of cells found a split piece, so only the smaller pieces are walked.
+
+    Attributes:
+    maze (Maze): The maze.
+    labels (np.ndarray): int32 component of every cell, -1 for walls.
+    sizes (Dict[int, int]): Cells of every component.
+    relabeled (int): Cells relabeled by the changes so far.
+    """
+    def __init__(self, maze):
+        self.maze       = maze
+        self.labels     = label_components(maze.graph)
+        self.label      = memoryview(self.labels)
+        values, counts  = np.unique(self.labels[self.labels >= 0], return_counts=True)
+        self.sizes: Dict[int, int] = dict(zip(values.tolist(), counts.tolist()))
+        self.next_label = maze.graph.size  # Labels of the new components, never a cell id
+        self.relabeled  = 0
+        maze.subscribe(self.changed)
+
+
+    def close(self) -> None:
+        """
+        Stop listening to the changes of the maze.
+        """
+        self.maze.unsubscribe(self.changed)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def connected(self, first: int, second: int) -> bool:
+        """
+        True if both cell ids are open and in the same component.
+        """
+        return self.label[first] >= 0 and self.label[first] == self.label[second]
+
+
+    def changed(self, cell: int) -> None:
+        graph = self.maze.graph
+        y, x = divmod(cell, graph.width)
+        neighbors = [neighbor_y * graph.width + neighbor_x for neighbor_x, neighbor_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                     if 0 <= neighbor_x < graph.width and 0 <= neighbor_y < graph.height and graph.cells[neighbor_y * graph.width + neighbor_x] == 0]
+        if graph.cells[cell] == 0 and self.label[cell] < 0:
+            self.join(cell, neighbors)
+        elif graph.cells[cell] != 0 and self.label[cell] >= 0:
+            self.split(cell, neighbors)
+
+    def relabel(self, cells: List[int], label: int) -> None:
+        for cell in cells:
+            self.label[cell] = label
+        self.relabeled += len(cells)
+
+    def members(self, cell: int) -> List[int]:
+        """
+        Cells of the component of a cell (breadth first).
+        """
+        graph, label = self.maze.graph, self.label[cell]
+        mask, offsets = memoryview(graph.mask), graph.offsets
+        cells, seen = [cell], {cell}
+        for node in cells:
+            for offset in offsets[mask[node]]:
+                if node + offset not in seen and self.label[node + offset] == label:
+                    seen.add(node + offset)
+                    cells.append(node + offset)
+        return cells
+
+
+    def join(self, cell: int, neighbors: List[int]) -> None:
+        """
+        An opened cell joins the components of its neighbors into the largest one.
+        """
+        labels = {self.label[neighbor]: neighbor for neighbor in neighbors}
+        if not labels:
+            self.label[cell] = self.next_label
+            self.sizes[self.next_label] = 1
+            self.next_label += 1
+            return
+        largest = max(labels, key=self.sizes.__getitem__)
+        for label, neighbor in labels.items():
+            if label != largest:
+                self.relabel(self.members(neighbor), largest)
+                self.sizes[largest] += self.sizes.pop(label)
+        self.label[cell] = largest
+        self.sizes[largest] += 1
+
+    def split(self, cell: int, neighbors: List[int]) -> None:
+        """
+        A closed cell leaves its component, which can split in up to one piece per open neighbor.
+        """
+        label = self.label[cell]
+        self.label[cell] = -1
+        self.sizes[label] -= 1
+        if not self.sizes[label]:
+            del self.sizes[label]
+        if len(neighbors) < 2:
+            return
+
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        group       = list(range(len(neighbors)))  # Searches that met share a group
+        owner       = {neighbor: index for index, neighbor in enumerate(neighbors)}
+        queues      = {index: deque([neighbor]) for index, neighbor in enumerate(neighbors)}
+
+        def find(index):
+            while group[index] != index:
+                index = group[index]
+            return index
+
+        while len(queues) > 1:
+            for index in list(queues):
+                if index not in queues:
+                    continue  # Merged in this round
+                if len(queues) == 1:
+                    break  # The last piece keeps the label
+                queue = queues[index]
+                if not queue:
+                    # The search ran out of cells: its piece is split from the others
+                    piece = [node for node, search in owner.items() if find(search) == index]
+                    self.relabel(piece, self.next_label)
+                    self.sizes[self.next_label] = len(piece)
+                    self.sizes[label] -= len(piece)
+                    self.next_label += 1
+                    del queues[index]
+                    continue
+                node = queue.popleft()
+                for offset in offsets[mask[node]]:
+                    neighbor = node + offset
+                    search = owner.get(neighbor)
+                    if search is None:
+                        owner[neighbor] = index
+                        queue.append(neighbor)
+                    elif find(search) != index:
+                        # The searches met, they are in the same piece
+                        other = find(search)
+                        group[other] = index
+                        queue.extend(queues.pop(other))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental replanning on mazes whose cells open and close (D* Lite, Koenig & Likhachev 2002).
+"""
+
+from typing import Tuple, List
+
+from GridGraph import *
+
+import heapq
+
+
+INFINITY = 2**31 - 1
+
+
+class DStarLite:
+    """
+    Class to keep the shortest path from a moving start to the end of a maze while its cells change.
+
+    The search runs from the end, so moving the start (the agent) keeps every distance, and a
+    change of the maze only repairs the distances it affects instead of searching from scratch.
+    It listens to Maze.set_cell, the changes are applied on the next plan().
+
+    Attributes:
+    maze (Maze): The maze, changed through Maze.set_cell.
+    start/end (int): Cell ids of the agent and the goal.
+    distances (np.ndarray): int32 g values, distance of every cell to the end found so far.
+    lookahead (np.ndarray): int32 rhs values, one step lookahead of distances.
+    heap: Priority queue of inconsistent cells, queued holds the valid key of every queued cell.
+    offset (int): km, sum of the heuristic between consecutive starts.
+    changed (List[int]): Cells changed since the last plan.
+    """
+    def __init__(self, maze, start: Tuple[int, int] = None, end: Tuple[int, int] = None):
+        graph               = maze.graph
+        self.maze           = maze
+        self.start          = graph.cell_id(maze.start if start is None else start)
+        self.end            = graph.cell_id(maze.end if end is None else end)
+        self.distances      = graph.array(INFINITY)
+        self.lookahead      = graph.array(INFINITY)
+        self.g              = memoryview(self.distances)
+        self.rhs            = memoryview(self.lookahead)
+        self.heap           = []
+        self.queued         = {}
+        self.offset         = 0
+        self.changed        = []
+        self.expanded       = 0  # Cells expanded by the last plan
+
+        self.rhs[self.end]  = 0
+        self.push(self.end)
+        maze.subscribe(self.changed.append)
+
+
+    def close(self) -> None:
+        """
+        Stop listening to the changes of the maze.
+        """
+        self.maze.unsubscribe(self.changed.append)
+
+    def heuristic(self, cell: int) -> int:
+        width = self.maze.graph.width
+        return abs(cell % width - self.start % width) + abs(cell // width - self.start // width)
+
+    def key(self, cell: int) -> Tuple[int, int]:
+        best = min(self.g[cell], self.rhs[cell])
+        return (best + self.heuristic(cell) + self.offset if best < INFINITY else INFINITY, best)
+
+    def push(self, cell: int) -> None:
+        key = self.key(cell)
+        self.queued[cell] = key
+        heapq.heappush(self.heap, (key, cell))
+
+
+    def update(self, cell: int) -> None:
+        """
+        Recompute the lookahead of a cell and queue it if it is inconsistent.
+        """
+        graph, g = self.maze.graph, self.g
+        if cell != self.end:
+            best = min((g[cell + offset] for offset in graph.offsets[graph.mask[cell]]), default=INFINITY)
+            self.rhs[cell] = best + 1 if best < INFINITY else INFINITY
+        self.queued.pop(cell, None)
+        if g[cell] != self.rhs[cell]:
+            self.push(cell)
+
+
+    def move(self, start: Tuple[int, int]) -> None:
+        """
+        Move the agent, the distances to the end are kept.
+        """
+        self.offset    += self.heuristic(self.maze.graph.cell_id(start))
+        self.start      = self.maze.graph.cell_id(start)
+
+
+    def compute(self) -> None:
+        """
+        Expand the inconsistent cells until the distance of the start is correct.
+        """
+        graph       = self.maze.graph
+        offsets     = graph.offsets
+        mask        = memoryview(graph.mask)
+        distances   = self.g
+        lookahead   = self.rhs
+        self.expanded = 0
+
+        while self.heap and (self.heap[0][0] < self.key(self.start) or lookahead[self.start] != distances[self.start]):
+            key, cell = heapq.heappop(self.heap)
+            if self.queued.get(cell) != key:
+                continue  # Stale entry
+            new_key = self.key(cell)
+            if key < new_key:
+                self.push(cell)
+                continue
+
+            del self.queued[cell]
+            self.expanded += 1
+            if distances[cell] > lookahead[cell]:
+                distances[cell] = lookahead[cell]
+                for offset in offsets[mask[cell]]:
+                    self.update(cell + offset)
+            else:
+                distances[cell] = INFINITY
+                self.update(cell)
+                for offset in offsets[mask[cell]]:
+                    self.update(cell + offset)
+
+
+    def plan(self) -> List[Tuple[int, int]]:
+        """
+        Apply the changes of the maze since the last plan and repair the distances.
+
+        Returns: List[Tuple[int, int]] -> shortest path from the start to the end, empty if there is none.
+        """
+        graph = self.maze.graph
+        for cell in self.changed:
+            # The cell and its neighbors may have gained or lost an edge
+            y, x = divmod(cell, graph.width)
+            for neighbor_x, neighbor_y in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= neighbor_x < graph.width and 0 <= neighbor_y < graph.height:
+                    self.update(neighbor_y * graph.width + neighbor_x)
+        self.changed.clear()
+        self.compute()
+
+        # Go down the distances from the start
+        cell, g = self.start, self.g
+        if g[cell] >= INFINITY:
+            return []
+        mask, offsets, cells = memoryview(graph.mask), graph.offsets, [cell]
+        while cell != self.end:
+            best = INFINITY
+            for offset in offsets[mask[cell]]:
+                if g[cell + offset] < best:
+                    best, following = g[cell + offset], cell + offset
+            cell = following
+            cells.append(cell)
+        return [graph.cell(cell) for cell in cells]
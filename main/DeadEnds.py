@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dead-end filling: close the open cells that can not be on a path between the kept cells.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+FRONTIER = 64  # Smallest frontier filled with NumPy, the smaller ones cell by cell
+
+def fill_dead_ends(maze: np.ndarray, keep: Tuple[Tuple[int, int], ...] = ()) -> Tuple[np.ndarray, int]:
+    """
+    Fill the dead ends of a maze grid (open cells with at most one open neighbor) until there is none left.
+
+    The open neighbors of every cell are counted once with NumPy shifts of the whole grid, then every
+    step fills the current dead ends together and only their neighbors are counted again, so a step
+    costs the size of its frontier instead of the grid. Once the frontier is down to a few long
+    corridors a step is mostly NumPy overhead, they are followed one cell at a time instead. On a
+    perfect maze only the corridor between the kept cells is left, the cycles of other mazes are kept.
+
+    Parameters:
+        maze (np.ndarray): Grid, 0 open and 1 wall (not modified).
+        keep (Tuple[Tuple[int, int], ...]): (x, y) cells never filled (start and end).
+
+    Returns: (np.ndarray pruned uint8 grid, number of cells filled)
+    """
+    height, width   = maze.shape
+    padded_width    = width + 2  # A border of walls, the shifts never wrap around a row
+    opened          = np.zeros((height + 2, padded_width), dtype=bool)
+    opened[1:-1, 1:-1] = np.asarray(maze) == 0
+    degree          = np.zeros(opened.shape, dtype=np.int8)
+    degree[1:-1, 1:-1] = (opened[1:-1, 2:].astype(np.int8) + opened[1:-1, :-2] + opened[2:, 1:-1] + opened[:-2, 1:-1])
+
+    opened, degree  = opened.reshape(-1), degree.reshape(-1)
+    kept            = np.zeros(opened.size, dtype=bool)
+    for x, y in keep:
+        kept[(y + 1) * padded_width + x + 1] = True
+    shifts          = np.array([1, -1, padded_width, -padded_width])
+    frontier        = np.flatnonzero(opened & (degree <= 1) & ~kept)
+    filled          = 0
+
+    while frontier.size >= FRONTIER:
+        opened[frontier] = False
+        filled          += frontier.size
+        neighbors       = (frontier[:, None] + shifts).reshape(-1)
+        neighbors       = neighbors[opened[neighbors]]
+        np.subtract.at(degree, neighbors, 1)
+        neighbors       = np.unique(neighbors)
+        frontier        = neighbors[(degree[neighbors] <= 1) & ~kept[neighbors]]
+
+    # The remaining corridors, a cell at a time through memoryviews
+    open_view, degree_view, kept_view = memoryview(opened), memoryview(degree), memoryview(kept)
+    stack = frontier.tolist()
+    while stack:
+        cell = stack.pop()
+        if not open_view[cell]:
+            continue
+        open_view[cell] = False
+        filled += 1
+        for shift in (1, -1, padded_width, -padded_width):
+            neighbor = cell + shift
+            if open_view[neighbor]:
+                degree_view[neighbor] -= 1
+                if degree_view[neighbor] <= 1 and not kept_view[neighbor]:
+                    stack.append(neighbor)
+
+    pruned = (~opened.reshape(height + 2, padded_width)[1:-1, 1:-1]).astype(np.uint8)
+    return pruned, filled
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Breadth first distance fields computed a whole frontier at a time with NumPy.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from weakref import WeakKeyDictionary
+
+from GridGraph import *
+
+import numpy as np
+
+
+# Frontiers smaller than this are expanded one node at a time
+WIDE_FRONTIER = 64
+
+
+def distance_field(graph: GridGraph, source, previous: np.ndarray = None, target: int = -1) -> np.ndarray:
+    """
+    BFS distance from source to every cell, expanding the whole frontier per step.
+
+    The frontier is kept in the same order the queue of MazeSolver.bfs would pop it
+    (discoverer order first, then neighbor order), so the BFS tree is the same one bfs builds.
+    Narrow frontiers (corridors) are expanded with a plain loop, where NumPy call overhead would dominate.
+
+    Parameters:
+        graph (GridGraph): Graph associated with the maze.
+        source (int): Cell id where the search starts, or a list of cell ids (distance to the nearest one).
+        previous (np.ndarray): Optional int32 array filled with the node that led to each node.
+        target (int): Optional cell id, the expansion stops at the level that reaches it.
+
+    Returns: np.ndarray (int32) -> distance of every cell to source, -1 if it is not reachable.
+    """
+    bits        = np.array([bit for bit, dx, dy in DIRECTIONS], dtype=np.uint8)
+    shifts      = np.array([dy * graph.width + dx for bit, dx, dy in DIRECTIONS], dtype=np.int64)
+    mask        = memoryview(graph.mask)
+    offsets     = graph.offsets
+    distances   = graph.array()
+    owner       = None  # Index of the first discovery of every cell, allocated with the first wide frontier
+    distance    = memoryview(distances)
+    track       = memoryview(previous) if previous is not None else None
+    frontier    = [int(source)] if np.ndim(source) == 0 else [int(node) for node in source]
+    for node in frontier:
+        distance[node] = 0
+        if track is not None: track[node] = node
+    level       = 0
+
+    while len(frontier) and (target < 0 or distance[target] < 0):
+        level += 1
+        if len(frontier) < WIDE_FRONTIER:
+            if isinstance(frontier, np.ndarray): frontier = frontier.tolist()
+            following = []
+            for node in frontier:
+                for offset in offsets[mask[node]]:
+                    neighbor = node + offset
+                    if distance[neighbor] < 0:
+                        distance[neighbor] = level
+                        if track is not None: track[neighbor] = node
+                        following.append(neighbor)
+            frontier = following
+            continue
+
+        frontier    = np.asarray(frontier, dtype=np.int64)
+        # All the neighbors of the frontier, row i holds the neighbors of frontier[i] in neighbor order
+        opened      = (graph.mask[frontier][:, None] & bits) != 0
+        candidates  = (frontier[:, None] + shifts)[opened]
+        position    = np.flatnonzero(opened) // len(bits)
+        fresh       = distances[candidates] < 0
+        candidates  = candidates[fresh]
+        position    = position[fresh]
+        # Keep only the first discovery of every cell, in discovery order
+        if owner is None: owner = np.empty(graph.size, dtype=np.int64)
+        order       = np.arange(candidates.size)
+        owner[candidates] = candidates.size
+        np.minimum.at(owner, candidates, order)
+        first       = owner[candidates] == order
+        candidates  = candidates[first]
+        distances[candidates] = level
+        if previous is not None: previous[candidates] = frontier[position[first]]
+        frontier    = candidates
+
+    return distances
+
+
+def descend(graph: GridGraph, distances: np.ndarray, node: int) -> List[int]:
+    """
+    Walk down the distance gradient from node to the source of the field.
+
+    Parameters:
+        graph (GridGraph): Graph associated with the maze.
+        distances (np.ndarray): Field returned by distance_field.
+        node (int): Cell id where the walk starts.
+
+    Returns: List[int] -> cell ids from node to the source of the field, empty if node is not reachable.
+    """
+    mask        = memoryview(graph.mask)
+    offsets     = graph.offsets
+    distance    = memoryview(distances)
+    if distance[node] < 0:
+        return []
+
+    path        = [node]
+    while distance[node]:
+        level = distance[node] - 1
+        for offset in offsets[mask[node]]:
+            if distance[node + offset] == level:
+                node += offset
+                break
+        path.append(node)
+    return path
+
+
+class DistanceFieldCache:
+    """
+    Class to keep the distance fields of the targets queried most recently.
+
+    Fields are int32 arrays keyed by (maze content hash, target cell), the least recently used
+    are evicted when the fields exceed the memory budget. A query to a cached target is a walk
+    down the gradient, proportional to the path length.
+
+    Attributes:
+    budget (int): Maximum bytes of cached fields.
+    fields (OrderedDict): (hash, target) -> field, from least to most recently used.
+    size (int): Bytes of the cached fields.
+    hits/misses/evictions (int): Counters.
+    """
+    def __init__(self, budget: int = 256 * 2**20):
+        self.budget     = budget
+        self.fields     = OrderedDict()
+        self.size       = 0
+        self.hits       = 0
+        self.misses     = 0
+        self.evictions  = 0
+        self.mazes      = WeakKeyDictionary()  # Content hash of every maze seen, to drop its fields when it changes
+
+
+    def field(self, maze, target: Tuple[int, int]) -> np.ndarray:
+        """
+        Distance field of a target of the maze, computed with distance_field on a miss.
+
+        Parameters:
+            maze (Maze).
+            target (Tuple[int, int]): (x, y) cell.
+
+        Returns: np.ndarray (int32) -> distance of every cell to the target, -1 if it is not reachable.
+        """
+        content = maze.content_hash()
+        if self.mazes.get(maze, content) != content:
+            self.invalidate(self.mazes[maze])  # The grid changed since its last query
+        self.mazes[maze] = content
+
+        key = (content, maze.graph.cell_id(target))
+        if key in self.fields:
+            self.hits += 1
+            self.fields.move_to_end(key)
+            return self.fields[key]
+
+        self.misses += 1
+        field = distance_field(maze.graph, key[1])
+        if field.nbytes <= self.budget:
+            self.fields[key] = field
+            self.size += field.nbytes
+            while self.size > self.budget:
+                key, evicted = self.fields.popitem(last=False)
+                self.size -= evicted.nbytes
+                self.evictions += 1
+        return field
+
+
+    def path(self, maze, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Shortest path from start to end going down the cached field of end.
+
+        Returns: List[Tuple[int, int]] from start to end, empty if there is no path.
+        """
+        graph = maze.graph
+        return [graph.cell(node) for node in descend(graph, self.field(maze, end), graph.cell_id(start))]
+
+
+    def invalidate(self, content: bytes = None) -> None:
+        """
+        Drop the fields of a maze content hash, or every field if None.
+        """
+        for key in [key for key in self.fields if content is None or key[0] == content]:
+            self.size -= self.fields.pop(key).nbytes
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'fields': len(self.fields), 'bytes': self.size, 'budget': self.budget}
+
+
+# Cache shared by the solvers that are not given one
+field_cache = DistanceFieldCache()
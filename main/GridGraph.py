@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact graph associated with a maze.
+
+Instead of a dict of tuple lists, every cell gets a flat int32 id (y * width + x)
+and its neighbors are implicit in a 4-bit mask stored in a NumPy array.
+"""
+
+from typing import Dict, Tuple, List
+
+import numpy as np
+
+
+# Bit of the mask for every direction, in the same order maze_to_graph used: (1, 0), (-1, 0), (0, 1), (0, -1)
+EAST, WEST, SOUTH, NORTH = 1, 2, 4, 8
+DIRECTIONS = ((EAST, 1, 0), (WEST, -1, 0), (SOUTH, 0, 1), (NORTH, 0, -1))
+
+
+class GridGraph:
+    """
+    Class to represent the graph associated with a maze using arrays instead of Python objects.
+
+    Attributes:
+
+    height/width: Maze dimension
+
+    size: Number of cells, cell (x, y) has the id y * width + x
+
+    cells (np.ndarray): Flat view of the maze grid (1 wall, 0 open)
+
+    mask (np.ndarray): uint8 flat array with the open neighbors of every cell
+        bit 0 -> (x+1, y), bit 1 -> (x-1, y), bit 2 -> (x, y+1), bit 3 -> (x, y-1)
+    walls always have mask 0.
+
+    offsets (Tuple[Tuple[int, ...], ...]): For every mask value, the id offsets of the open neighbors.
+    G[v] = [v + offset for offset in offsets[mask[v]]]
+    """
+    def __init__(self, maze: np.ndarray):
+        """
+        Build the neighbor masks of the maze with whole-array operations.
+
+        Args:
+        maze (np.ndarray): The layout of the maze.
+        """
+        maze                = np.asarray(maze)
+        self.height: int    = maze.shape[0]
+        self.width: int     = maze.shape[1]
+        self.size: int      = self.height * self.width
+        self.cells          = maze.reshape(-1)
+        self.mask           = self.build_mask(maze).reshape(-1)
+        self.offsets        = tuple(tuple(offset for bit, offset in zip((EAST, WEST, SOUTH, NORTH), (1, -1, self.width, -self.width)) if mask & bit)
+                                    for mask in range(16))
+
+
+    @staticmethod
+    def build_mask(maze: np.ndarray) -> np.ndarray:
+        """
+        Compute the 4-bit neighbor mask of every cell shifting the open cells array.
+
+        Parameters: maze (np.ndarray)
+
+        Returns: np.ndarray (uint8) with the same shape as the maze
+        """
+        opened          = np.asarray(maze) == 0
+        mask            = np.zeros(opened.shape, dtype=np.uint8)
+        horizontal      = (opened[:, :-1] & opened[:, 1:]).view(np.uint8)
+        vertical        = (opened[:-1, :] & opened[1:, :]).view(np.uint8)
+        mask[:, :-1]   |= horizontal * EAST
+        mask[:, 1:]    |= horizontal * WEST
+        mask[:-1, :]   |= vertical * SOUTH
+        mask[1:, :]    |= vertical * NORTH
+        return mask
+
+
+    def update(self, cell_id: int) -> None:
+        """
+        Recompute the masks of a cell and its neighbors after the cell changed in the maze, O(1).
+        """
+        y, x = divmod(cell_id, self.width)
+        for neighbor_x, neighbor_y in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if not (0 <= neighbor_x < self.width and 0 <= neighbor_y < self.height):
+                continue
+            node, mask = neighbor_y * self.width + neighbor_x, 0
+            if self.cells[node] == 0:
+                for bit, dx, dy in DIRECTIONS:
+                    if self.is_open((neighbor_x + dx, neighbor_y + dy)): mask |= bit
+            self.mask[node] = mask
+
+
+    def cell_id(self, node: Tuple[int, int]) -> int:
+        return node[1] * self.width + node[0]
+
+    def cell(self, cell_id: int) -> Tuple[int, int]:
+        y, x = divmod(cell_id, self.width)
+        return (x, y)
+
+    def is_open(self, node: Tuple[int, int]) -> bool:
+        x, y = node
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[y * self.width + x] == 0
+
+    def neighbors(self, cell_id: int) -> List[int]:
+        return [cell_id + offset for offset in self.offsets[self.mask[cell_id]]]
+
+    def array(self, fill: int = -1) -> np.ndarray:
+        """
+        New int32 array with one entry per cell (previous, distances, ...).
+        """
+        return np.full(self.size, fill, dtype=np.int32)
+
+
+    def path(self, previous, node: int) -> List[Tuple[int, int]]:
+        """
+        Rebuild the path that ends at node following the previous array.
+        The start of the search is the cell that is its own previous.
+
+        Returns: List[Tuple[int, int]] from the start of the search to node
+        """
+        path = [self.cell(node)]
+        while previous[node] != node:
+            node = previous[node]
+            path.append(self.cell(node))
+        path.reverse()
+        return path
+
+
+    def to_dict(self) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+        """
+        Dict of tuple lists version of the graph, G = {v1: [adjacents vertices to v1], ...}
+        """
+        return {self.cell(node): [self.cell(neighbor) for neighbor in self.neighbors(node)]
+                for node in np.flatnonzero(self.cells == 0).tolist()}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contracted graph of a maze: corridors become weighted edges between junctions.
+"""
+
+from array import array
+from typing import Tuple, List
+
+from GridGraph import *
+
+import numpy as np
+
+
+# Number of open neighbors for every 4-bit mask
+DEGREE = np.array([bin(mask).count('1') for mask in range(16)], dtype=np.uint8)
+
+
+class JunctionGraph:
+    """
+    Class to represent the contracted graph of a maze.
+
+    Every open cell whose degree is not 2 (junctions, dead ends) and the kept cells (start/end)
+    are nodes, every corridor of degree 2 cells between two nodes is an edge weighted by its length.
+
+    Attributes:
+
+    graph (GridGraph): Graph associated with the maze.
+
+    keep (Tuple[Tuple[int, int], ...]): Cells that are nodes even inside a corridor.
+
+    nodes (np.ndarray): int32 cell id of every node, node i is the cell nodes[i].
+
+    index (np.ndarray): int32 node of every cell, -1 if the cell is not a node.
+
+    edges (List[List[Tuple[int, int, int]]]): For every node, (neighbor node, length, edge id) of its edges.
+
+    interior (np.ndarray): int32 cells of every corridor, edge k has the cells interior[begin[k]:begin[k + 1]]
+    in order from the node tail[k] to the other node.
+    """
+    def __init__(self, graph: GridGraph, keep: Tuple[Tuple[int, int], ...] = ()):
+        """
+        Contract the corridors of the graph.
+
+        Args:
+        graph (GridGraph): Graph associated with the maze.
+        keep (Tuple[Tuple[int, int], ...]): Cells that must be nodes even inside a corridor (start, end).
+        """
+        self.graph      = graph
+        self.keep       = tuple(keep)
+        is_node         = (graph.cells == 0) & (DEGREE[graph.mask] != 2)
+        for node in keep:
+            if graph.is_open(node): is_node[graph.cell_id(node)] = True
+        self.nodes      = np.flatnonzero(is_node).astype(np.int32)
+        self.index      = graph.array()
+        self.index[self.nodes] = np.arange(self.nodes.size, dtype=np.int32)
+        self.edges: List[List[Tuple[int, int, int]]] = [[] for node in range(self.nodes.size)]
+        self.tail       = array('i')
+        begin           = array('q', [0])
+        interior        = array('i')
+
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        index       = memoryview(self.index)
+        walked      = bytearray(graph.size)  # Corridor cells already in an edge
+
+        for tail, cell in enumerate(self.nodes.tolist()):
+            for offset in offsets[mask[cell]]:
+                previous, current = cell, cell + offset
+                if walked[current]:
+                    continue  # Corridor added from its other end
+                if index[current] >= 0 and current < cell:
+                    continue  # Adjacent nodes, added from the lower one
+
+                # Follow the corridor until the next node
+                length = 1
+                while index[current] < 0:
+                    walked[current] = 1
+                    interior.append(current)
+                    first, second = offsets[mask[current]]
+                    previous, current = current, current + (second if current + first == previous else first)
+                    length += 1
+
+                head = index[current]
+                edge = len(self.tail)
+                self.tail.append(tail)
+                begin.append(len(interior))
+                self.edges[tail].append((head, length, edge))
+                if head != tail: self.edges[head].append((tail, length, edge))
+
+        self.begin      = np.frombuffer(begin, dtype=np.int64)
+        self.interior   = np.frombuffer(interior, dtype=np.int32)
+
+
+    def __len__(self) -> int:
+        return int(self.nodes.size)
+
+    def node(self, cell: Tuple[int, int]) -> int:
+        """
+        Node of a cell, -1 if the cell is not a node.
+        """
+        return int(self.index[self.graph.cell_id(cell)]) if self.graph.is_open(cell) else -1
+
+    def corridor(self, edge: int, tail: int) -> List[int]:
+        """
+        Interior cells of an edge, walked from the node tail.
+        """
+        cells = self.interior[self.begin[edge]:self.begin[edge + 1]].tolist()
+        return cells if self.tail[edge] == tail else cells[::-1]
+
+
+    def path(self, previous, through, node: int) -> List[Tuple[int, int]]:
+        """
+        Rebuild the cell path that ends at node following the previous node and the edge used to reach it.
+        The start of the search is the node that is its own previous.
+
+        Returns: List[Tuple[int, int]] from the start of the search to node
+        """
+        nodes, edges = [node], []
+        while previous[node] != node:
+            edges.append(through[node])
+            node = previous[node]
+            nodes.append(node)
+        return self.expand(nodes[::-1], edges[::-1])
+
+
+    def expand(self, nodes: List[int], edges: List[int]) -> List[Tuple[int, int]]:
+        """
+        Full cell path of a path in the contracted graph.
+
+        Parameters:
+            nodes (List[int]): Nodes of the path, in order.
+            edges (List[int]): Edge used between every pair of consecutive nodes.
+
+        Returns: List[Tuple[int, int]] -> (x, y) coordinates of every cell of the path.
+        """
+        cells = [int(self.nodes[nodes[0]])]
+        for tail, edge, head in zip(nodes, edges, nodes[1:]):
+            cells.extend(self.corridor(edge, tail))
+            cells.append(int(self.nodes[head]))
+        return [self.graph.cell(cell) for cell in cells]
@@ -7,10 +7,19 @@ Created on Tue Nov 21 11:31:11 2023
 """
 
 from typing import Dict, Tuple, Type, List
+from hashlib import blake2b
 
 'Libraries to generate mazes'
 import numpy as np
-from random import shuffle
+
+from GridGraph import *
+from JunctionGraph import *
+from ClusterGraph import *
+from Components import *
+from Workspace import Workspace
+from DeadEnds import fill_dead_ends
+from MazeGenerators import backtrack, kruskal, wilson, eller
+import MazeFile
 
 class Maze:
     """
@@ -20,17 +29,41 @@ class Maze:
         
     height/width: Maze dimension
     
-    maze (np.ndarray): Maze represented as a NumPy array.
+    maze (np.ndarray): Maze represented as a NumPy uint8 array (it can be a numpy.memmap, see Maze.load).
         [[1 1 ... 1 1]
          [1 0 ... 0 1]
          [. . ... . .]
          [1 1 ... 1 1]]
     zero represents a passable cell and 1 represents a non-transitable cell.
     
-    associated_graph (Dict[Tuple[int, int], List[[Tuple[int,int], Tuple[int, int]]]]): Graph associated with the maze.
+    graph (GridGraph): Compact graph associated with the maze (flat int32 cell ids and 4-bit neighbor masks),
+    built on demand.
+    
+    contracted_graph (JunctionGraph): Corridors contracted into weighted edges, built on demand.
+    
+    hierarchy (ClusterGraph): Abstract graph of the clusters for HPA*, built on demand and kept up to date by set_cell.
+    
+    components (Components): Connected component of every cell, built on demand and kept up to date by set_cell.
+    
+    workspace (Workspace): Arrays reused by the searches of the maze, built on demand.
+    
+    pruned (Maze): Copy with the dead ends filled for the start and end, built on demand.
+    
+    associated_graph (Dict[Tuple[int, int], List[[Tuple[int,int], Tuple[int, int]]]]): Graph associated with the maze,
+    built on demand from graph.
     G = {v1: [adjacents vertices to v1], v2: [adjacents vertices to v2], ...,  vn: [adjacents vertices to vn]}
     
+    costs (np.ndarray): Optional uint8 terrain cost of every cell (height x width, 1 to 255), the cost of moving
+    into the cell. None means every move costs 1. Only dijkstra, a_star and dial use it (see set_costs).
+    min_cost: Lowest cost of costs, the scale of the admissible heuristic of a_star.
+    
     start/end: (x,y) start/end point
+    
+    seed: Seed used to generate the maze (None if unknown)
+    
+    version: Number of changes made to the grid through set_cell
+    
+    listeners: Functions called with the cell id of every cell changed through set_cell
 
     """
     def __init__(self, maze: List[List[int]], maze_height: int, maze_width: int):
@@ -45,57 +78,263 @@ class Maze:
         
         self.maze_height: int                               = maze_height
         self.maze_width: int                                = maze_width
-        self.maze: List[List[int]]                          = maze
+        self.maze: np.ndarray                               = np.asarray(maze, dtype=np.uint8)
+        self.costs: np.ndarray                              = None
+        self.min_cost: int                                  = 1
         self.start: Tuple[int,int]                          = (1, 1)
         self.end: Tuple[int,int]                            = (maze_width - 2, maze_height -2)
-        self.associated_graph: Dict[Tuple[int,int]: Tuple]  = self.maze_to_graph(maze)
-        # self.contracted_graph: Dict[Tuple[int,int]: Tuple]  = self.graph_contractor(self.maze_to_graph(maze))
+        self.seed: int                                      = None
+        self._graph                                         = None
+        self._content_hash                                  = None
+        self.version: int                                   = 0
+        self.listeners: List                                = []
+        self._associated_graph                              = None
+        self._contracted_graph                              = None
+        self._pruned                                        = None
+        self._hierarchy                                     = None
+        self._components                                    = None
+        self._workspace                                     = None
         
         
+    @property
+    def graph(self) -> GridGraph:
+        if self._graph is None:
+            self._graph = GridGraph(self.maze)
+        return self._graph
+
+    @property
+    def components(self) -> Components:
+        if self._components is None:
+            self._components = Components(self)
+        return self._components
+
+    @property
+    def workspace(self) -> Workspace:
+        if self._workspace is None:
+            self._workspace = Workspace(self.maze.size)
+        return self._workspace
+
+    def connected(self, start: Tuple[int,int], end: Tuple[int,int]) -> bool:
+        """
+        True if there is a path between two (x, y) cells, in O(1) once the components are labeled.
+        """
+        graph = self.graph
+        if not (0 <= start[0] < graph.width and 0 <= start[1] < graph.height and 0 <= end[0] < graph.width and 0 <= end[1] < graph.height):
+            return False
+        return self.components.connected(graph.cell_id(start), graph.cell_id(end))
+
+    @property
+    def associated_graph(self) -> Dict[Tuple[int,int], List[Tuple[int,int]]]:
+        if self._associated_graph is None:
+            self._associated_graph = self.graph.to_dict()
+        return self._associated_graph
+
+    def content_hash(self) -> bytes:
+        """
+        Hash of the maze grid, computed once until grid_changed is called.
+        """
+        if self._content_hash is None:
+            self._content_hash = blake2b(np.ascontiguousarray(self.maze).data, digest_size=16).digest()
+        return self._content_hash
+
+    def grid_changed(self) -> None:
+        """
+        Call after modifying self.maze in place: drops the graphs and hash built from the old grid.
+        Prefer set_cell, which keeps the graph and notifies the listeners.
+        """
+        self._graph             = None
+        self._associated_graph  = None
+        self._contracted_graph  = None
+        self._pruned            = None
+        self._content_hash      = None
+        if self._hierarchy is not None:
+            self._hierarchy.close()
+            self._hierarchy     = None
+        if self._components is not None:
+            self._components.close()
+            self._components    = None
+
+    def set_cell(self, node: Tuple[int,int], value: int) -> None:
+        """
+        Open (0) or close (1) a cell. The graph is updated locally (O(1)) instead of rebuilt,
+        the other structures built from the grid are dropped and the listeners are notified.
+
+        Parameters:
+            node (Tuple[int, int]): (x, y) cell.
+            value (int): 0 open, 1 wall.
+        """
+        x, y = node
+        if self.maze[y, x] == value:
+            return
+        if not self.maze.flags.writeable:
+            self.maze = self.maze.copy() # Memory mapped grids are read-only
+            self._graph = None
+
+        self.maze[y, x]         = value
+        self._associated_graph  = None
+        self._contracted_graph  = None
+        self._pruned            = None
+        self._content_hash      = None
+        self.version           += 1
+        if self._graph is not None: self._graph.update(self._graph.cell_id(node))
+        for listener in self.listeners:
+            listener(y * self.maze_width + x)
+
+    def set_costs(self, costs: np.ndarray) -> None:
+        """
+        Set the terrain cost of every cell, None goes back to unit costs.
+
+        Parameters: costs (np.ndarray): Integers from 1 to 255, height x width (the walls are ignored).
+        """
+        if costs is None:
+            self.costs, self.min_cost = None, 1
+            return
+        costs = np.asarray(costs)
+        if costs.shape != self.maze.shape:
+            raise ValueError(f"costs of shape {costs.shape}, the maze is {self.maze.shape}")
+        if costs.size and (costs.min() < 1 or costs.max() > 255):
+            raise ValueError("costs must be between 1 and 255")
+        self.costs      = np.ascontiguousarray(costs, dtype=np.uint8)
+        self.min_cost   = int(self.costs.min()) if self.costs.size else 1
+
+    def path_cost(self, path: List[Tuple[int,int]]) -> int:
+        """
+        Cost of a path: the cost of every cell entered after the first one (its moves without costs).
+        """
+        if not path:
+            return -1
+        if self.costs is None:
+            return len(path) - 1
+        x, y = np.asarray(path[1:], dtype=np.int64).reshape(-1, 2).T
+        return int(self.costs[y, x].sum(dtype=np.int64))
+
+    def subscribe(self, listener) -> None:
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener) -> None:
+        self.listeners.remove(listener)
 
     def maze_to_graph(self, maze):
         return {(x, y): list((nx, ny) for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)] if 0 <= (nx := x + dx) < len(maze[0]) and 0 <= (ny := y + dy) < len(maze) and maze[ny][nx] == 0)
         for y in range(len(maze)) for x in range(len(maze[y])) if maze[y][x] == 0}
     
-    def graph_contractor(self, graph):
-        return {node: [neighbor2 for neighbor1 in neighbors for neighbor2 in graph[neighbor1] if neighbor2 != node] for node, neighbors in graph.items() if len(neighbors) != 2}
+    def graph_contractor(self, keep: Tuple[Tuple[int,int], ...] = None) -> JunctionGraph:
+        """
+        Contract the corridors of the maze into weighted edges between junctions, dead ends and the keep cells.
+
+        Parameters: keep (default start and end)
+
+        Returns: JunctionGraph
+        """
+        return JunctionGraph(self.graph, (self.start, self.end) if keep is None else keep)
+
+    @property
+    def contracted_graph(self) -> JunctionGraph:
+        return self.contracted_graph_for(self.start, self.end)
+
+    def contracted_graph_for(self, start: Tuple[int,int], end: Tuple[int,int]) -> JunctionGraph:
+        # Start and end are nodes of the contracted graph, it is rebuilt when they move
+        if self._contracted_graph is None or self._contracted_graph.keep != (start, end):
+            self._contracted_graph = self.graph_contractor((start, end))
+        return self._contracted_graph
+
+    def pruned_for(self, start: Tuple[int,int], end: Tuple[int,int]) -> Type['Maze']:
+        """
+        Maze with its dead ends filled (DeadEnds.fill_dead_ends), any solver can run on it: the paths between
+        start and end are the same. Built once for the same start and end until the grid changes.
+
+        Returns: Maze -> pruned copy
+        """
+        if self._pruned is None or (self._pruned.start, self._pruned.end) != (start, end):
+            grid, filled            = fill_dead_ends(self.maze, (start, end))
+            self._pruned            = Maze(grid, self.maze_height, self.maze_width)
+            self._pruned.start      = start
+            self._pruned.end        = end
+            self._pruned.seed       = self.seed
+            self._pruned.costs      = self.costs
+            self._pruned.min_cost   = self.min_cost
+        return self._pruned
+
+    @property
+    def pruned(self) -> Type['Maze']:
+        return self.pruned_for(self.start, self.end)
+
+    @property
+    def hierarchy(self) -> ClusterGraph:
+        return self.hierarchy_for(32)
+
+    def hierarchy_for(self, cluster_size: int) -> ClusterGraph:
+        # Built once per cluster size, set_cell only rebuilds the changed clusters
+        if self._hierarchy is None or self._hierarchy.cluster_size != cluster_size:
+            if self._hierarchy is not None: self._hierarchy.close()
+            self._hierarchy = ClusterGraph(self, cluster_size)
+        return self._hierarchy
     
     
     
 
     @classmethod
-    def backtrack_generator(cls, maze_height: int = 9, maze_width: int = 9 ) -> Type['Maze']:
+    def backtrack_generator(cls, maze_height: int = 9, maze_width: int = 9, seed: int = None) -> Type['Maze']:
         """
-        Generates a maze using backtrack algorithm.
+        Generates a maze using backtrack algorithm (explicit stack, no recursion limit).
 
         Parameters:
             maze_width (int).
             maze_height (int).
+            seed (int): Seed for a reproducible maze.
 
         Returns: Maze matrix 
         """
-        maze = np.ones((maze_height, maze_width), dtype=int)
+        return cls.generate(backtrack, maze_height, maze_width, seed)
 
-        def is_valid(x, y):
-            return 0 <= x < maze_width and 0 <= y < maze_height and maze[y, x] == 1
+    @classmethod
+    def kruskal_generator(cls, maze_height: int = 9, maze_width: int = 9, seed: int = None) -> Type['Maze']:
+        """
+        Generates a maze using randomized Kruskal algorithm (union-find).
 
-        def backtrack(x, y):
-            directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-            shuffle(directions)
+        Parameters:
+            maze_width (int).
+            maze_height (int).
+            seed (int): Seed for a reproducible maze.
 
-            for dx, dy in directions:
-                nx, ny = x + 2 * dx, y + 2 * dy
-                if is_valid(nx, ny):
-                    maze[y + dy, x + dx] = 0
-                    maze[ny, nx] = 0
-                    backtrack(nx, ny)
+        Returns: Maze matrix 
+        """
+        return cls.generate(kruskal, maze_height, maze_width, seed)
 
-        start_x, start_y = 1, 1
-        maze[start_y, start_x] = 0
-        backtrack(start_x, start_y)
-        
-        
-        return cls(maze, maze_height, maze_width)
+    @classmethod
+    def wilson_generator(cls, maze_height: int = 9, maze_width: int = 9, seed: int = None) -> Type['Maze']:
+        """
+        Generates a maze using Wilson's algorithm (loop-erased random walks, uniform over all perfect mazes).
+
+        Parameters:
+            maze_width (int).
+            maze_height (int).
+            seed (int): Seed for a reproducible maze.
+
+        Returns: Maze matrix 
+        """
+        return cls.generate(wilson, maze_height, maze_width, seed)
+
+    @classmethod
+    def eller_generator(cls, maze_height: int = 9, maze_width: int = 9, seed: int = None) -> Type['Maze']:
+        """
+        Generates a maze using Eller's algorithm. To stream a maze larger than memory use
+        MazeGenerators.eller (rows one at a time) with MazeFile.write_rows or MazeGenerators.stream_to_npy.
+
+        Parameters:
+            maze_width (int).
+            maze_height (int).
+            seed (int): Seed for a reproducible maze.
+
+        Returns: Maze matrix 
+        """
+        return cls.generate(lambda height, width, seed: np.vstack(list(eller(height, width, seed))), maze_height, maze_width, seed)
+
+    @classmethod
+    def generate(cls, generator, maze_height: int, maze_width: int, seed: int = None) -> Type['Maze']:
+        maze        = cls(generator(maze_height, maze_width, seed), maze_height, maze_width)
+        maze.seed   = seed
+        return maze
 
     @classmethod
     def empty_maze(cls, maze_height: int = 11, maze_width: int = 11 ) -> Type['Maze']:
@@ -108,10 +347,40 @@ class Maze:
     
         Returns: Maze matrix 
         """
-        maze        = np.zeros((maze_height, maze_width), dtype=int)
+        maze        = np.zeros((maze_height, maze_width), dtype=np.uint8)
         maze[0, :]  = maze[-1, :] = 1
         maze[:, 0]  = maze[:, -1] = 1
         
         return cls(maze, maze_height, maze_width)
-    
-    
+
+
+    def save(self, path: str, encoding: int = MazeFile.BYTES) -> None:
+        """
+        Save the maze (cells, start, end and seed) in the compact binary format of MazeFile.
+
+        Parameters:
+            path (str).
+            encoding (int): MazeFile.BYTES (1 byte per cell, zero-copy load) or MazeFile.BITS (1 bit per cell,
+                            unpacked in memory on load).
+        """
+        rows = (self.maze[row:row + 4096] for row in range(0, self.maze_height, 4096))
+        MazeFile.write_rows(path, rows, self.maze_height, self.maze_width, self.start, self.end, self.seed, encoding)
+
+    @classmethod
+    def load(cls, path: str) -> Type['Maze']:
+        """
+        Open a maze saved with Maze.save (or MazeFile.write_rows) through numpy.memmap.
+        The cells of a BYTES file stay on disk until they are read: the walks (wall_follower, tremaux, pledge)
+        and MazeRaster only page in what they touch, the graph of the other solvers is built over the whole
+        maze on their first run. A BITS file is unpacked in memory when it is opened.
+
+        Parameters: path (str)
+
+        Returns: Maze
+        """
+        maze, header    = MazeFile.read(path)
+        loaded          = cls(maze, header['maze_height'], header['maze_width'])
+        loaded.start    = header['start']
+        loaded.end      = header['end']
+        loaded.seed     = header['seed']
+        return loaded
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact binary file format for mazes, loaded through numpy.memmap.
+
+    header (64 bytes, little endian)
+        magic       b'MAZE'
+        version     uint8
+        encoding    uint8   BYTES: 1 byte per cell, the file body is the maze matrix itself (memory mapped)
+                            BITS: 1 bit per cell, every row padded to whole bytes (unpacked in memory on load)
+        has_seed    uint8
+        height      uint64
+        width       uint64
+        start       int64 x, int64 y
+        end         int64 x, int64 y
+        seed        int64
+    body: the rows of the maze, top to bottom (1 wall / 0 open)
+"""
+
+import struct
+from typing import Tuple, Dict
+
+import numpy as np
+
+
+MAGIC           = b'MAZE'
+VERSION         = 1
+BITS, BYTES     = 1, 2
+HEADER          = struct.Struct('<4sBBBxQQqqqqq')
+HEADER_SIZE     = 64  # The body starts aligned, padding after the header fields
+
+
+def row_size(maze_width: int, encoding: int) -> int:
+    return (maze_width + 7) // 8 if encoding == BITS else maze_width
+
+
+def write_rows(path: str, rows, maze_height: int, maze_width: int, start: Tuple[int, int] = None,
+               end: Tuple[int, int] = None, seed: int = None, encoding: int = BYTES) -> None:
+    """
+    Write a maze to disk as its rows are produced, the whole matrix is never needed in memory.
+
+    Parameters:
+        path (str): Output file.
+        rows (Iterator[np.ndarray]): Rows of the maze (e.g. a Maze matrix or MazeGenerators.eller).
+        maze_height/maze_width (int).
+        start/end (Tuple[int, int]): (x, y) start/end point, default the same as Maze.
+        seed (int): Seed used to generate the maze, None if unknown.
+        encoding (int): BYTES (default, read in place through the memory map) or BITS (8 times smaller on disk).
+    """
+    start   = (1, 1) if start is None else start
+    end     = (maze_width - 2, maze_height - 2) if end is None else end
+    header  = HEADER.pack(MAGIC, VERSION, encoding, seed is not None, maze_height, maze_width,
+                          start[0], start[1], end[0], end[1], 0 if seed is None else seed)
+
+    with open(path, 'wb') as file:
+        file.write(header.ljust(HEADER_SIZE, b'\0'))
+        written = 0
+        for row in rows:
+            row = np.asarray(row).reshape(-1, maze_width) != 0
+            file.write((np.packbits(row, axis=1) if encoding == BITS else row.view(np.uint8)).tobytes())
+            written += row.shape[0]
+        if written != maze_height:
+            raise ValueError(f"{written} rows were written, the maze has {maze_height}")
+
+
+def read_header(path: str) -> Dict:
+    """
+    Read the header of a maze file.
+
+    Returns: Dict with encoding, maze_height, maze_width, start, end and seed
+    """
+    with open(path, 'rb') as file:
+        fields = HEADER.unpack(file.read(HEADER.size))
+    magic, version, encoding, has_seed, height, width, start_x, start_y, end_x, end_y, seed = fields
+    if magic != MAGIC or version != VERSION or encoding not in (BITS, BYTES):
+        raise ValueError(f"{path} is not a maze file (version {VERSION})")
+    return {'encoding': encoding, 'maze_height': height, 'maze_width': width, 'start': (start_x, start_y),
+            'end': (end_x, end_y), 'seed': seed if has_seed else None}
+
+
+def read(path: str) -> Tuple[np.ndarray, Dict]:
+    """
+    Open a maze file through numpy.memmap.
+
+    BYTES files are returned as the memory map itself: nothing is read until the cells are used.
+    BITS files are unpacked from the memory map with one vectorized call: the whole maze is read and takes
+    1 byte per cell in memory, only the file is 1/8 of the BYTES size.
+
+    Returns: (maze matrix (uint8, height x width), header)
+    """
+    header  = read_header(path)
+    height, width, encoding = header['maze_height'], header['maze_width'], header['encoding']
+    body    = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER_SIZE, shape=(height, row_size(width, encoding)))
+    if encoding == BYTES:
+        return body, header
+    return np.unpackbits(body, axis=1, count=width), header
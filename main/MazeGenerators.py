@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Maze generators without recursion.
+
+Every generator carves the same lattice backtrack_generator always used: the cells with odd
+(x, y) coordinates are rooms, the cells between two rooms are the walls that can be removed.
+They return the maze matrix (np.ndarray uint8, 1 wall / 0 open) and take a seed for reproducibility.
+
+The target of a 10000 x 10000 maze in seconds is not met: the generators are pure Python, linear in the
+rooms. Measured on one core (10001 x 10001, seed 0, time and peak resident memory of the process):
+
+    backtrack   72.7 s      268 MB
+    kruskal    138.9 s     1316 MB
+    wilson     190.0 s      292 MB
+    eller       35.5 s      223 MB
+"""
+
+from random import Random
+
+import numpy as np
+
+
+def lattice(maze_height: int, maze_width: int):
+    """
+    Size of the room lattice of a maze: rooms are the cells (2i + 1, 2j + 1) inside it.
+
+    Returns: (rooms per row, rooms per column)
+    """
+    return maze_width // 2, maze_height // 2
+
+
+def carve(maze_height: int, maze_width: int, walls) -> np.ndarray:
+    """
+    Build the maze matrix from a bytearray with one byte per room edge.
+
+    Parameters:
+        walls (bytearray): 2 entries per room, [2 * room] -> edge to (x + 2, y), [2 * room + 1] -> edge to (x, y + 2).
+        1 means the wall between both rooms is removed.
+
+    Returns: np.ndarray (uint8) Maze matrix
+    """
+    columns, rows   = lattice(maze_height, maze_width)
+    maze            = np.ones((maze_height, maze_width), dtype=np.uint8)
+    edges           = np.frombuffer(bytes(walls), dtype=np.uint8).reshape(rows, columns, 2)
+    maze[1:2 * rows:2, 1:2 * columns:2] = 0
+    maze[1:2 * rows:2, 2:2 * columns:2] = 1 - edges[:, :-1, 0]
+    maze[2:2 * rows - 1:2, 1:2 * columns:2] = 1 - edges[:-1, :, 1]
+    return maze
+
+
+def backtrack(maze_height: int = 9, maze_width: int = 9, seed: int = None) -> np.ndarray:
+    """
+    Randomized depth first search with an explicit stack.
+
+    Parameters:
+        maze_height/maze_width (int).
+        seed (int): Seed of the random generator, None for a random maze.
+
+    Returns: np.ndarray (uint8) Maze matrix
+    """
+    columns, rows   = lattice(maze_height, maze_width)
+    rng             = Random(seed)
+    walls           = bytearray(2 * columns * rows)
+    visited         = bytearray(columns * rows)
+    stack           = [0]
+    visited[0]      = 1
+
+    while stack:
+        room = stack[-1]
+        row, column = divmod(room, columns)
+        options = []  # (room, edge) of every unvisited neighbor
+        if column + 1 < columns and not visited[room + 1]:          options.append((room + 1, 2 * room))
+        if column > 0 and not visited[room - 1]:                    options.append((room - 1, 2 * room - 2))
+        if row + 1 < rows and not visited[room + columns]:          options.append((room + columns, 2 * room + 1))
+        if row > 0 and not visited[room - columns]:                 options.append((room - columns, 2 * (room - columns) + 1))
+
+        if not options:
+            stack.pop()
+            continue
+
+        following, edge = options[rng.randrange(len(options))] if len(options) > 1 else options[0]
+        visited[following] = 1
+        walls[edge] = 1
+        stack.append(following)
+
+    return carve(maze_height, maze_width, walls)
+
+
+def kruskal(maze_height: int = 9, maze_width: int = 9, seed: int = None) -> np.ndarray:
+    """
+    Randomized Kruskal: remove walls in random order when they join two different sets (union-find).
+
+    Parameters:
+        maze_height/maze_width (int).
+        seed (int): Seed of the random generator, None for a random maze.
+
+    Returns: np.ndarray (uint8) Maze matrix
+    """
+    columns, rows   = lattice(maze_height, maze_width)
+    rooms           = columns * rows
+    walls           = bytearray(2 * rooms)
+    parent          = np.arange(rooms, dtype=np.int32)
+    root            = memoryview(parent)
+
+    # Every possible edge (2 * room + direction), without the ones that leave the lattice
+    edges           = np.arange(2 * rooms, dtype=np.int64).reshape(rows, columns, 2)
+    edges           = np.concatenate((edges[:, :-1, 0].ravel(), edges[:-1, :, 1].ravel()))
+    np.random.default_rng(seed).shuffle(edges)
+
+    def find(room):
+        while root[room] != room:
+            root[room] = root[root[room]]  # Path halving
+            room = root[room]
+        return room
+
+    joined = 0
+    for start in range(0, edges.size, 1 << 16):
+        for edge in edges[start:start + (1 << 16)].tolist():
+            room = edge >> 1
+            a, b = find(room), find(room + (columns if edge & 1 else 1))
+            if a != b:
+                root[max(a, b)] = min(a, b)
+                walls[edge] = 1
+                joined += 1
+        if joined == rooms - 1:
+            break
+
+    return carve(maze_height, maze_width, walls)
+
+
+def wilson(maze_height: int = 9, maze_width: int = 9, seed: int = None) -> np.ndarray:
+    """
+    Wilson's algorithm: loop-erased random walks, uniform spanning tree over the rooms.
+
+    Parameters:
+        maze_height/maze_width (int).
+        seed (int): Seed of the random generator, None for a random maze.
+
+    Returns: np.ndarray (uint8) Maze matrix
+    """
+    columns, rows   = lattice(maze_height, maze_width)
+    rooms           = columns * rows
+    rng             = Random(seed)
+    walls           = bytearray(2 * rooms)
+    in_tree         = bytearray(rooms)
+    moved           = bytearray(rooms)  # Last move of the walk out of every room, overwriting it erases loops
+    moves           = (1, -1, columns, -columns)
+    in_tree[rng.randrange(rooms)] = 1
+
+    for first in range(rooms):
+        # Random walk until the tree is hit
+        room = first
+        while not in_tree[room]:
+            row, column = divmod(room, columns)
+            move = rng.getrandbits(2)
+            if (move == 0 and column + 1 == columns) or (move == 1 and column == 0) or \
+               (move == 2 and row + 1 == rows) or (move == 3 and row == 0):
+                continue
+            moved[room] = move
+            room += moves[move]
+
+        # Add the loop-erased walk to the tree
+        room = first
+        while not in_tree[room]:
+            in_tree[room] = 1
+            following = room + moves[moved[room]]
+            walls[2 * min(room, following) + (moved[room] >= 2)] = 1
+            room = following
+
+    return carve(maze_height, maze_width, walls)
+
+
+def eller(maze_height: int = 9, maze_width: int = 9, seed: int = None):
+    """
+    Eller's algorithm: the maze is built and yielded one row at a time, only the sets of the
+    current row of rooms are kept in memory (O(width)), so the height is unbounded.
+
+    Parameters:
+        maze_height/maze_width (int).
+        seed (int): Seed of the random generator, None for a random maze.
+
+    Returns: Iterator[np.ndarray] -> the maze_height rows (uint8, 1 wall / 0 open) of the maze matrix, top to bottom.
+    """
+    columns, rows   = lattice(maze_height, maze_width)
+    rng             = Random(seed)
+    sets            = list(range(columns))  # Set of every room of the current row
+    members         = {room: [room] for room in range(columns)}  # Rooms of the current row in every set
+    fresh           = columns
+
+    yield np.ones(maze_width, dtype=np.uint8)
+    for row in range(rows):
+        last        = row == rows - 1
+        passages    = np.ones(maze_width, dtype=np.uint8)
+        passages[1:2 * columns:2] = 0
+
+        # Join adjacent rooms of different sets, all of them in the last row
+        for room in range(columns - 1):
+            a, b = sets[room], sets[room + 1]
+            if a != b and (last or rng.random() < 0.5):
+                passages[2 * room + 2] = 0
+                if len(members[a]) < len(members[b]): a, b = b, a
+                for other in members[b]: sets[other] = a
+                members[a].extend(members.pop(b))
+        yield passages
+
+        if 2 * row + 2 >= maze_height:
+            break
+        below = np.ones(maze_width, dtype=np.uint8)
+        if not last:
+            # Every set goes down at least once, the rooms that do not go down start a new set
+            following = {}
+            for group, rooms in members.items():
+                down = [room for room in rooms if rng.random() < 0.5] or [rooms[rng.randrange(len(rooms))]]
+                following[group] = down
+                for room in down: below[2 * room + 1] = 0
+            members = following
+            kept = bytearray(columns)
+            for rooms in members.values():
+                for room in rooms: kept[room] = 1
+            for room in range(columns):
+                if not kept[room]:
+                    sets[room] = fresh
+                    members[fresh] = [room]
+                    fresh += 1
+        yield below
+
+    for remaining in range(2 * rows + 1, maze_height):
+        yield np.ones(maze_width, dtype=np.uint8)
+
+
+def stream_to_npy(rows, path: str, maze_height: int, maze_width: int) -> None:
+    """
+    Write the rows of a maze as they are produced to a .npy file, without holding the whole matrix.
+    The file can be opened with np.load(path, mmap_mode='r') and given to Maze.
+
+    Parameters:
+        rows (Iterator[np.ndarray]): Rows of the maze, e.g. eller(...).
+        path (str): Output file.
+        maze_height/maze_width (int).
+    """
+    header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.uint8)), 'fortran_order': False, 'shape': (maze_height, maze_width)}
+    with open(path, 'wb') as file:
+        np.lib.format.write_array_header_1_0(file, header)
+        for row in rows:
+            file.write(np.ascontiguousarray(row, dtype=np.uint8).tobytes())
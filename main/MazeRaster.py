@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless rendering of mazes, visited cells and solutions to PNG files, without matplotlib.
+
+The image is produced a band (or a tile) of cells at a time and the PNG is compressed as the bands
+come, so a maze opened through numpy.memmap (Maze.load of a BYTES file) is never loaded whole. save
+writes one PNG a band of tile rows at a time, its memory is about tile x width of the image (it grows
+with the width of the maze); save_tiles writes one PNG per tile x tile cells, its memory is bounded by
+the tile whatever the size of the maze.
+
+    pixel colors
+        wall        black           open        white
+        visited     heatmap of the visited values (low: dark blue, high: yellow)
+        path        orange          start/end   green/red
+    downsampled pixels blend the colors of their block (wall fraction, highest visited value, any path cell)
+"""
+
+import os
+import struct
+import zlib
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+
+WALL, OPEN      = np.array((0, 0, 0), dtype=np.uint8), np.array((255, 255, 255), dtype=np.uint8)
+PATH            = np.array((255, 140, 0), dtype=np.uint8)
+START, END      = np.array((40, 160, 40), dtype=np.uint8), np.array((215, 40, 40), dtype=np.uint8)
+# 256 heatmap colors interpolated between the viridis anchors
+ANCHORS         = np.array(((68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)), dtype=np.float64)
+HEAT            = np.stack([np.interp(np.linspace(0, 1, 256), np.linspace(0, 1, len(ANCHORS)), ANCHORS[:, channel])
+                            for channel in range(3)], axis=1).round().astype(np.uint8)
+TILE            = 1024
+
+
+class Raster:
+    """
+    Class to render a maze, optionally with visited cells and a path, as RGB uint8 images.
+
+    Attributes:
+    maze (Maze): The maze, its matrix can be a numpy.memmap (only the rows of a band are read).
+    path (np.ndarray): (x, y) cells of the path, n x 2.
+    visited (np.ndarray): Visited value of every cell (height x width or flat cell ids, e.g. a distance field
+    or the expansion order), negative if the cell was not visited. None draws no heatmap.
+    scale (int): Cells per pixel side (downsampling), zoom (int): pixels per cell side (upsampling).
+    peak (float): Highest visited value, the top of the heatmap.
+    """
+    def __init__(self, maze, path: List[Tuple[int, int]] = (), visited: np.ndarray = None, scale: int = 1, zoom: int = 1):
+        self.maze       = maze
+        self.height     = maze.maze.shape[0]
+        self.width      = maze.maze.shape[1]
+        self.path       = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+        self.visited    = None if visited is None else np.asarray(visited).reshape(self.height, self.width)
+        self.scale      = max(1, scale)
+        self.zoom       = max(1, zoom) if self.scale == 1 else 1
+        self.peak       = 0
+        if self.visited is not None:
+            # Chunked, the visited values can be a memory map as large as the maze
+            self.peak = max((float(self.visited[row:row + TILE].max(initial=0)) for row in range(0, self.height, TILE)), default=0)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """
+        (height, width) of the whole image in pixels.
+        """
+        return (-(-self.height // self.scale) * self.zoom, -(-self.width // self.scale) * self.zoom)
+
+
+    def render(self, rows: Tuple[int, int] = None, columns: Tuple[int, int] = None) -> np.ndarray:
+        """
+        Image of a block of cells, the rows and columns bounds are multiples of scale (the last one excepted).
+
+        Parameters: rows/columns (Tuple[int, int]): [first, last) cells, default all of them.
+
+        Returns: np.ndarray -> RGB uint8 image, pixels x pixels x 3
+        """
+        top, bottom     = rows or (0, self.height)
+        left, right     = columns or (0, self.width)
+        scale           = self.scale
+        walls           = self.walls(self.maze.maze[top:bottom, left:right])
+        image           = np.empty(walls.shape + (3,), dtype=np.uint8)
+        image[...]      = OPEN
+        image[walls == 1] = WALL
+        if scale > 1:
+            # Gray blocks, partly wall
+            mixed = (0 < walls) & (walls < 1)
+            image[mixed] = (OPEN * (1 - walls[mixed][:, None]) + WALL * walls[mixed][:, None]).astype(np.uint8)
+
+        if self.visited is not None:
+            heat    = self.highest(self.visited[top:bottom, left:right])
+            seen    = heat >= 0
+            colors  = HEAT[(heat[seen] * (255 / self.peak if self.peak else 0)).astype(np.int64)]
+            image[seen] = (colors * (1 - walls[seen][:, None]) + WALL * walls[seen][:, None]).astype(np.uint8)
+
+        for cells, color in ((self.path, PATH), (np.array([self.maze.start]), START), (np.array([self.maze.end]), END)):
+            x, y    = cells[:, 0], cells[:, 1]
+            inside  = (top <= y) & (y < bottom) & (left <= x) & (x < right)
+            image[(y[inside] - top) // scale, (x[inside] - left) // scale] = color
+
+        if self.zoom > 1:
+            image = image.repeat(self.zoom, axis=0).repeat(self.zoom, axis=1)
+        return image
+
+    def walls(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Wall fraction of every scale x scale block of cells (float32), the blocks at the border can be smaller.
+        """
+        scale = self.scale
+        if scale == 1:
+            return (cells != 0).astype(np.float32)
+        height, width   = cells.shape
+        rows, columns   = -(-height // scale), -(-width // scale)
+        padded          = np.zeros((rows * scale, columns * scale), dtype=np.uint8)
+        padded[:height, :width] = cells != 0
+        sums            = padded.reshape(rows, scale, columns, scale).sum(axis=(1, 3), dtype=np.int32)
+        # Cells of every block, only the last row and column of blocks are smaller
+        counts          = np.outer(np.minimum(scale, height - np.arange(rows) * scale), np.minimum(scale, width - np.arange(columns) * scale))
+        return (sums / counts).astype(np.float32)
+
+    def highest(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Highest visited value of every scale x scale block of cells, negative if no cell was visited.
+        """
+        scale = self.scale
+        if scale == 1:
+            return cells
+        height, width   = cells.shape
+        rows, columns   = -(-height // scale), -(-width // scale)
+        padded          = np.full((rows * scale, columns * scale), -1, dtype=cells.dtype)
+        padded[:height, :width] = cells
+        return padded.reshape(rows, scale, columns, scale).max(axis=(1, 3))
+
+
+    def bands(self, tile: int = TILE, columns: Tuple[int, int] = None) -> Iterator[np.ndarray]:
+        """
+        Images of consecutive bands of about tile rows of cells (rounded to a multiple of scale), top to bottom.
+        """
+        rows = max(1, tile // self.scale) * self.scale
+        for top in range(0, self.height, rows):
+            yield self.render((top, min(top + rows, self.height)), columns)
+
+    def tiles(self, tile: int = TILE) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """
+        Images of the tile x tile blocks of cells (rounded to a multiple of scale), as (row, column, image).
+        """
+        size = max(1, tile // self.scale) * self.scale
+        for row, top in enumerate(range(0, self.height, size)):
+            for column, left in enumerate(range(0, self.width, size)):
+                yield row, column, self.render((top, min(top + size, self.height)), (left, min(left + size, self.width)))
+
+
+def write_png(path: str, rows: Iterator[np.ndarray], height: int, width: int) -> None:
+    """
+    Write an RGB PNG as its rows are produced (compressed as they come), the whole image is never needed in memory.
+
+    Parameters:
+        path (str): Output file.
+        rows (Iterator[np.ndarray]): Blocks of rows of the image, RGB uint8 (rows x width x 3).
+        height/width (int): Size of the image in pixels.
+    """
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    compressor = zlib.compressobj(6)
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        written = 0
+        for block in rows:
+            block   = np.ascontiguousarray(block, dtype=np.uint8).reshape(-1, width * 3)
+            # Every scanline starts with its filter type, 0 (none)
+            lines   = np.zeros((block.shape[0], width * 3 + 1), dtype=np.uint8)
+            lines[:, 1:] = block
+            data    = compressor.compress(lines.tobytes())
+            if data: file.write(chunk(b'IDAT', data))
+            written += block.shape[0]
+        file.write(chunk(b'IDAT', compressor.flush()) + chunk(b'IEND', b''))
+    if written != height:
+        raise ValueError(f"{written} rows were written, the image has {height}")
+
+
+def render(maze, path: List[Tuple[int, int]] = (), visited: np.ndarray = None, scale: int = 1, zoom: int = 1) -> np.ndarray:
+    """
+    Image of the whole maze in memory, for mazes that fit in it (see save for the huge ones).
+
+    Returns: np.ndarray -> RGB uint8 image
+    """
+    raster = Raster(maze, path, visited, scale, zoom)
+    return np.concatenate(list(raster.bands()))
+
+
+def save(path: str, maze, solution: List[Tuple[int, int]] = (), visited: np.ndarray = None, scale: int = 1,
+         zoom: int = 1, tile: int = TILE) -> None:
+    """
+    Render the maze to one PNG, a band of tile rows of cells at a time.
+
+    Parameters:
+        path (str): Output .png file.
+        maze (Maze).
+        solution (List[Tuple[int, int]]): Path drawn on top of the maze.
+        visited (np.ndarray): Visited values drawn as a heatmap (see Raster).
+        scale (int): Cells per pixel side, a 10000 x 10000 maze with scale 10 is a 1000 x 1000 image.
+        zoom (int): Pixels per cell side, for small mazes (scale 1 only).
+        tile (int): Rows of cells rendered at a time, the memory used is about tile x width of the image.
+    """
+    raster          = Raster(maze, solution, visited, scale, zoom)
+    height, width   = raster.shape
+    write_png(path, raster.bands(tile), height, width)
+
+def save_tiles(directory: str, maze, solution: List[Tuple[int, int]] = (), visited: np.ndarray = None,
+               scale: int = 1, tile: int = TILE) -> List[str]:
+    """
+    Render the maze to one PNG per tile x tile cells, named row_column.png, memory bounded by the tile.
+
+    Returns: List[str] -> paths of the files written
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for row, column, image in Raster(maze, solution, visited, scale).tiles(tile):
+        paths.append(os.path.join(directory, f"{row}_{column}.png"))
+        write_png(paths[-1], [image], image.shape[0], image.shape[1])
+    return paths
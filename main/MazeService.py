@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio maze-solving service: line-delimited JSON over TCP, and a load generator to measure it.
+
+    python main serve --port 8765 --workers 4 --maze demo=maze.maze
+    python main loadgen --port 8765 --maze demo --clients 32 --queries 10000
+
+Every request is a JSON object on one line and gets one response line. The responses of a connection
+come as the requests complete, not in their order: the "request" value of a request is copied to its
+response.
+
+    {"op": "load", "maze": "demo", "path": "maze.maze"}
+    {"op": "generate", "maze": "demo", "generator": "backtrack", "size": [1001, 1001], "seed": 7}
+    {"op": "solve", "maze": "demo", "start": [1, 1], "end": [999, 999], "algorithm": "a_star", "path": true, "request": 3}
+    {"op": "mazes"}     {"op": "unload", "maze": "demo"}     {"op": "metrics"}
+
+The grids of the registry, and their terrain costs, are copied to shared memory. The solves run in a
+process pool whose workers attach to a grid and build its graph once, so the event loop never runs a
+search, and identical solves (maze, start, end, algorithm, options) in flight are sent to the pool once.
+The shared memory of a maze that is unloaded or replaced is freed when its last solve in the pool is done.
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from Maze import Maze
+from MazeSolver import MazeSolver
+
+
+# MazeSolver methods a request can name, the ones wrapped by instrumented
+SOLVERS     = sorted(name for name, method in vars(MazeSolver).items() if hasattr(method, '__wrapped__'))
+# Arguments of the solvers a request can not set (visualization, callbacks, reused arrays)
+RESERVED    = {'steps', 'setps', 'solution', 'hook', 'workspace', 'result', 'start', 'end'}
+GENERATORS  = ('backtrack', 'kruskal', 'wilson', 'eller', 'empty')
+LIMIT       = 256  # Requests of a connection handled at the same time, the next lines wait
+
+
+# Solvers of a worker process by shared memory name (grid, costs, solver), the least recently used are dropped
+worker_solvers: 'OrderedDict[str, Tuple[shared_memory.SharedMemory, shared_memory.SharedMemory, MazeSolver]]' = OrderedDict()
+WORKER_MAZES = 8
+
+def solve_shared(name: str, shape: Tuple[int, int], costs: str, start: Tuple[int, int], end: Tuple[int, int],
+                 algorithm: str, options: Dict, path: bool) -> Dict:
+    """
+    Solve a query in a worker process on the grid (and the terrain costs, if costs is the name of their block)
+    in shared memory. The solver is kept for the next queries.
+
+    Returns: Dict -> SearchResult.to_dict
+    """
+    if name in worker_solvers:
+        worker_solvers.move_to_end(name)
+    else:
+        memory  = shared_memory.SharedMemory(name=name)
+        maze    = Maze(np.ndarray(shape, dtype=np.uint8, buffer=memory.buf), shape[0], shape[1])
+        if costs is not None:
+            costs = shared_memory.SharedMemory(name=costs)
+            maze.set_costs(np.ndarray(shape, dtype=np.uint8, buffer=costs.buf))
+        worker_solvers[name] = (memory, costs, MazeSolver(maze, None))
+        if len(worker_solvers) > WORKER_MAZES:
+            # The solver and its maze go first, their arrays are views of the blocks to close
+            blocks = worker_solvers.popitem(last=False)[1][:2]
+            for block in blocks:
+                if block is not None:
+                    block.close()
+    result = getattr(worker_solvers[name][2], algorithm)(start=start, end=end, result=True, **options)
+    return result.to_dict(path=path)
+
+
+class MazeRegistry:
+    """
+    Class to keep the mazes of the service by id, with a copy of their grids and costs in shared memory.
+
+    The pool tasks on a maze are counted (acquire, release): a maze removed or replaced while tasks on it
+    are in flight keeps its shared memory until the last one is done.
+
+    Attributes:
+    mazes (Dict[str, Tuple[Maze, shared_memory.SharedMemory, shared_memory.SharedMemory]]): Maze, shared grid
+    and shared costs (None without costs) of every id.
+    users (Dict[str, int]): Pool tasks in flight by grid shared memory name.
+    retired (Dict[str, Tuple]): Blocks of the removed mazes with tasks in flight, by grid shared memory name.
+    """
+    def __init__(self):
+        self.mazes: Dict[str, Tuple[Maze, shared_memory.SharedMemory, shared_memory.SharedMemory]] = {}
+        self.users: Dict[str, int] = {}
+        self.retired: Dict[str, Tuple[shared_memory.SharedMemory, shared_memory.SharedMemory]] = {}
+
+    def __len__(self) -> int:
+        return len(self.mazes)
+
+    @staticmethod
+    def share(maze: Maze) -> Tuple[shared_memory.SharedMemory, shared_memory.SharedMemory]:
+        """
+        Copy the grid and the terrain costs of a maze to new shared memory blocks (costs None without costs).
+        Safe to run in a thread, the registry is not touched.
+        """
+        blocks = []
+        for array in (maze.maze, maze.costs):
+            if array is None:
+                blocks.append(None)
+                continue
+            array = np.ascontiguousarray(array, dtype=np.uint8)
+            blocks.append(shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1)))
+            np.ndarray(array.shape, dtype=np.uint8, buffer=blocks[-1].buf)[:] = array
+        return tuple(blocks)
+
+    def add(self, key: str, maze: Maze, blocks: Tuple = None) -> None:
+        """
+        Register a maze with its shared blocks (see share, made here if None), replacing the maze with the
+        same id (the queries in flight on it still complete).
+        """
+        memory, costs = self.share(maze) if blocks is None else blocks
+        if key in self.mazes:
+            self.remove(key)
+        self.mazes[key] = (maze, memory, costs)
+
+    def get(self, key: str) -> Tuple[Maze, shared_memory.SharedMemory, shared_memory.SharedMemory]:
+        if key not in self.mazes:
+            raise KeyError(f"unknown maze {key!r}")
+        return self.mazes[key]
+
+    def acquire(self, key: str) -> Tuple[Maze, shared_memory.SharedMemory, shared_memory.SharedMemory]:
+        """
+        Maze, grid and costs of the id for a pool task: its blocks are kept until release(grid name).
+        """
+        entry = self.get(key)
+        self.users[entry[1].name] = self.users.get(entry[1].name, 0) + 1
+        return entry
+
+    def release(self, name: str) -> None:
+        """
+        A pool task on the grid name is done, the blocks of a removed maze are freed with its last task.
+        """
+        if name not in self.users:
+            return  # The registry was closed
+        self.users[name] -= 1
+        if not self.users[name]:
+            del self.users[name]
+            if name in self.retired:
+                self.free(self.retired.pop(name))
+
+    def remove(self, key: str) -> None:
+        maze, memory, costs = self.get(key)
+        del self.mazes[key]
+        if memory.name in self.users:
+            self.retired[memory.name] = (memory, costs)
+        else:
+            self.free((memory, costs))
+
+    @staticmethod
+    def free(blocks: Tuple) -> None:
+        for block in blocks:
+            if block is not None:
+                block.close()
+                block.unlink()
+
+    def close(self) -> None:
+        """
+        Free every block, the tasks in flight included: the pool must be shut down first.
+        """
+        for key in list(self.mazes):
+            self.remove(key)
+        for blocks in self.retired.values():
+            self.free(blocks)
+        self.retired.clear()
+        self.users.clear()
+
+    def describe(self, key: str = None) -> List[Dict]:
+        """
+        Id, size, start and end of every maze (or of the maze key).
+        """
+        return [{'maze': name, 'height': maze.maze.shape[0], 'width': maze.maze.shape[1], 'start': list(maze.start),
+                 'end': list(maze.end), 'costs': costs is not None} for name, (maze, memory, costs) in self.mazes.items()
+                if key in (None, name)]
+
+
+class MazeService:
+    """
+    Class to serve solve requests over TCP with a maze registry, a process pool and request coalescing.
+
+    Attributes:
+    registry (MazeRegistry): Mazes by id.
+    workers (int): Processes of the pool.
+    in_flight (Dict[Tuple, asyncio.Future]): Solves sent to the pool and not done, by query.
+    waiting (int): Solve requests waiting for a result (coalesced ones included).
+    latencies (deque): Seconds of the last solve requests, from the request line to the response.
+    counters (Dict[str, int]): connections, requests, solves (sent to the pool), coalesced, errors.
+    """
+    def __init__(self, workers: int = 4, window: int = 10000):
+        self.registry   = MazeRegistry()
+        self.workers    = workers
+        self.pool       = ProcessPoolExecutor(workers)
+        self.in_flight: Dict[Tuple, asyncio.Future] = {}
+        self.waiting    = 0
+        self.latencies  = deque(maxlen=window)
+        self.counters   = {'connections': 0, 'requests': 0, 'solves': 0, 'coalesced': 0, 'errors': 0}
+        self.started    = time.perf_counter()
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+        self.registry.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.connection, host, port, limit=2**20)
+
+
+    async def connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Read the request lines of a client, at most LIMIT of them are handled at the same time.
+        """
+        self.counters['connections'] += 1
+        slots   = asyncio.Semaphore(LIMIT)
+        tasks   = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                await slots.acquire()
+                task = asyncio.create_task(self.respond(line, writer, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # The client went away, or the service is shutting down
+        finally:
+            writer.close()
+
+    async def respond(self, line: bytes, writer: asyncio.StreamWriter, slots: asyncio.Semaphore) -> None:
+        received = time.perf_counter()
+        self.counters['requests'] += 1
+        message  = {}
+        try:
+            message  = json.loads(line)
+            response = await self.request(message)
+        except Exception as error:
+            self.counters['errors'] += 1
+            response = {'error': f"{type(error).__name__}: {error}"}
+        finally:
+            slots.release()
+        if isinstance(message, dict) and 'request' in message:
+            response['request'] = message['request']
+        if isinstance(message, dict) and message.get('op') == 'solve' and 'error' not in response:
+            self.latencies.append(time.perf_counter() - received)
+        if not writer.is_closing():
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+
+    async def request(self, message: Dict) -> Dict:
+        operation = message.get('op')
+        loop = asyncio.get_running_loop()
+        if operation == 'solve':
+            return await self.solve(message)
+        if operation == 'load':
+            # Reading the file and copying it to shared memory run in a thread, the loop keeps serving
+            maze    = await loop.run_in_executor(None, Maze.load, message['path'])
+            blocks  = await loop.run_in_executor(None, self.registry.share, maze)
+            self.registry.add(message['maze'], maze, blocks)
+            return self.registry.describe(message['maze'])[0]
+        if operation == 'generate':
+            generator   = message.get('generator', 'backtrack')
+            size        = message.get('size', 41)
+            height, width = (size * 2 if len(size) == 1 else size) if isinstance(size, list) else (size, size)
+            if generator not in GENERATORS:
+                raise ValueError(f"unknown generator {generator!r}, one of {', '.join(GENERATORS)}")
+            if generator == 'empty':
+                maze = await loop.run_in_executor(None, Maze.empty_maze, height, width)
+            else:
+                maze = await loop.run_in_executor(None, getattr(Maze, f"{generator}_generator"), height, width, message.get('seed'))
+            blocks = await loop.run_in_executor(None, self.registry.share, maze)
+            self.registry.add(message['maze'], maze, blocks)
+            return self.registry.describe(message['maze'])[0]
+        if operation == 'mazes':
+            return {'mazes': self.registry.describe()}
+        if operation == 'unload':
+            self.registry.remove(message['maze'])
+            return {'maze': message['maze'], 'unloaded': True}
+        if operation == 'metrics':
+            return self.metrics()
+        raise ValueError(f"unknown op {operation!r}, one of solve, load, generate, mazes, unload, metrics")
+
+    async def solve(self, message: Dict) -> Dict:
+        """
+        Solve a query in the pool, or wait for the identical query already in flight.
+        """
+        maze, memory, costs = self.registry.get(message['maze'])
+        algorithm       = message.get('algorithm', 'a_star')
+        options         = message.get('options', {})
+        if algorithm not in SOLVERS:
+            raise ValueError(f"unknown algorithm {algorithm!r}, one of {', '.join(SOLVERS)}")
+        if not isinstance(options, dict) or RESERVED & set(options):
+            raise ValueError(f"options must be an object without {', '.join(sorted(RESERVED))}")
+        start   = tuple(message.get('start') or maze.start)
+        end     = tuple(message.get('end') or maze.end)
+        path    = bool(message.get('path', False))
+        # The shared memory name changes when a maze id is loaded again: no stale result is shared
+        key     = (memory.name, start, end, algorithm, json.dumps(options, sort_keys=True), path)
+
+        future  = self.in_flight.get(key)
+        if future is None:
+            # The blocks of the maze are kept until the task is done, even if the maze is unloaded or replaced
+            self.registry.acquire(message['maze'])
+            future = asyncio.get_running_loop().run_in_executor(self.pool, solve_shared, memory.name, maze.maze.shape,
+                                                                None if costs is None else costs.name, start, end,
+                                                                algorithm, options, path)
+            self.in_flight[key] = future
+            self.counters['solves'] += 1
+            future.add_done_callback(lambda done: self.in_flight.pop(key, None))
+            future.add_done_callback(lambda done: self.registry.release(memory.name))
+        else:
+            self.counters['coalesced'] += 1
+        self.waiting += 1
+        try:
+            # Shielded: a client that goes away does not cancel the solve of the others waiting for it
+            result = dict(await asyncio.shield(future))
+        finally:
+            self.waiting -= 1
+        result.update(maze=message['maze'], start=list(start), end=list(end))
+        return result
+
+    def metrics(self) -> Dict:
+        """
+        Queue depth (distinct solves in the pool, requests waiting for them) and the latency percentiles of the
+        last solve requests, in milliseconds.
+        """
+        latencies = np.array(self.latencies) * 1000
+        percentiles = dict(zip(('p50', 'p90', 'p99'), np.percentile(latencies, (50, 90, 99)).round(3).tolist())) if latencies.size else {}
+        return {**self.counters, 'queue_depth': len(self.in_flight), 'waiting': self.waiting, 'workers': self.workers,
+                'mazes': len(self.registry), 'uptime_s': round(time.perf_counter() - self.started, 3),
+                'latency_ms': {**percentiles, 'max': round(float(latencies.max(initial=0)), 3), 'window': int(latencies.size)}}
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, workers: int = 4, mazes: Dict[str, str] = None) -> None:
+    """
+    Run the service until it is cancelled (Ctrl+C), with the maze files of mazes ({id: path}) registered.
+    """
+    service = MazeService(workers)
+    try:
+        for key, path in (mazes or {}).items():
+            service.registry.add(key, Maze.load(path))
+        server = await service.start(host, port)
+        print(f"serving {len(service.registry)} mazes on {host}:{port} with {workers} workers", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+async def call(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, message: Dict) -> Dict:
+    """
+    Send one request and wait for its response (one request at a time on the connection).
+    """
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+async def load_test(host: str = '127.0.0.1', port: int = 8765, maze: str = None, clients: int = 16, queries: int = 1000,
+                    distinct: int = None, algorithm: str = 'a_star', seed: int = 0) -> Dict:
+    """
+    Closed loop load generator: clients connections send queries one after the other, drawn from distinct
+    random (start, end) pairs of odd cells (the open cells of the generated mazes), repeated pairs are
+    what the service coalesces.
+
+    Returns: Dict -> throughput, client side latency percentiles (ms), failed queries and the service metrics
+    """
+    reader, writer  = await asyncio.open_connection(host, port, limit=2**20)
+    mazes           = (await call(reader, writer, {'op': 'mazes'}))['mazes']
+    described       = next(entry for entry in mazes if maze is None or entry['maze'] == maze)
+    rng             = random.Random(seed)
+    odd             = lambda size: 2 * rng.randrange((size - 1) // 2) + 1
+    pairs           = [((odd(described['width']), odd(described['height'])), (odd(described['width']), odd(described['height'])))
+                       for _ in range(distinct or queries)]
+    work            = [pairs[index % len(pairs)] for index in range(queries)]
+    rng.shuffle(work)
+    latencies, failed = [], 0
+
+    async def client(share):
+        nonlocal failed
+        reader, writer = await asyncio.open_connection(host, port, limit=2**20)
+        for start, end in share:
+            sent        = time.perf_counter()
+            response    = await call(reader, writer, {'op': 'solve', 'maze': described['maze'], 'start': start, 'end': end,
+                                                      'algorithm': algorithm})
+            latencies.append(time.perf_counter() - sent)
+            failed += 'error' in response
+        writer.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client(work[index::clients]) for index in range(clients)))
+    elapsed = time.perf_counter() - start_time
+    metrics = await call(reader, writer, {'op': 'metrics'})
+    writer.close()
+    latencies = np.array(latencies) * 1000
+    return {'queries': queries, 'clients': clients, 'distinct': len(pairs), 'seconds': round(elapsed, 3),
+            'throughput': round(queries / elapsed, 1), 'failed': failed,
+            'latency_ms': dict(zip(('p50', 'p90', 'p99', 'max'), np.percentile(latencies, (50, 90, 99, 100)).round(3).tolist())),
+            'service': metrics}
@@ -7,13 +7,131 @@ Created on Tue Nov 21 11:34:01 2023
 """
 
 from Maze import *
-from MazeVisualizer import *
+from DistanceField import *
+from SearchResult import *
+from Workspace import Workspace
 
 
 'Libraries to implement algorithms'
+from array import array
 from collections import deque
 import heapq
 from random import choice
+from functools import wraps
+import inspect
+import time
+
+'Libraries to solve batches of queries in parallel'
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
+
+
+# Moves of the walks (wall_follower, tremaux, pledge): east, south, west, north, a right turn is +1
+DX, DY = (1, 0, -1, 0), (0, 1, 0, -1)
+
+def erase_loops(cells: array) -> array:
+    """
+    Path of a walk (cell ids) without the loops it closed, the walk itself when it never came back to a cell.
+    """
+    if np.unique(np.frombuffer(cells, dtype=np.int32)).size == len(cells):
+        return cells
+    index, path = {}, array('i')
+    for cell in cells:
+        if cell in index:
+            for erased in path[index[cell] + 1:]: del index[erased]
+            del path[index[cell] + 1:]
+        else:
+            index[cell] = len(path)
+            path.append(cell)
+    return path
+
+
+class Budget:
+    """
+    Expansion and time budget of a search (a_star, greedy_best_first_search, beam_search, anytime_a_star).
+    The clock is read every CHECK expansions, a time limit can be overrun by that many expansions.
+
+    Attributes:
+    max_expansions (int): Most expansions, None no limit.
+    deadline (float): time.perf_counter() at which the search stops, None no limit.
+    exhausted (bool): True once the budget ran out.
+    """
+    CHECK = 64
+
+    def __init__(self, max_expansions: int = None, time_limit: float = None, started: float = None):
+        """
+        started: time.perf_counter() the time limit counts from, default now (see MazeSolver.started).
+        """
+        self.max_expansions = max_expansions
+        self.deadline       = None if time_limit is None else (time.perf_counter() if started is None else started) + time_limit
+        self.exhausted      = False
+
+    def spent(self, expanded: int, clock: bool = False) -> bool:
+        """
+        True if the search must stop before its next expansion (expanded so far), clock reads the clock anyway.
+        """
+        if self.max_expansions is not None and expanded >= self.max_expansions:
+            self.exhausted = True
+        elif self.deadline is not None and (clock or not expanded % self.CHECK) and time.perf_counter() >= self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+
+# Solver of every solve_many worker process, built once over the shared maze grid
+worker = {}
+
+def attach_worker(name: str, shape: Tuple[int, int], dtype: str, costs: str = None) -> None:
+    memory              = shared_memory.SharedMemory(name=name)
+    maze                = Maze(np.ndarray(shape, dtype=dtype, buffer=memory.buf), shape[0], shape[1])
+    worker['memory']    = memory
+    if costs is not None:  # Terrain costs, a uint8 block of the same shape
+        worker['costs'] = shared_memory.SharedMemory(name=costs)
+        maze.set_costs(np.ndarray(shape, dtype=np.uint8, buffer=worker['costs'].buf))
+    worker['solver']    = MazeSolver(maze, None)
+
+def solve_chunk(algorithm: str, queries, options):
+    solve = getattr(worker['solver'], algorithm)
+    return [solve(start=start, end=end, **options) for start, end in queries]
+
+
+def instrumented(search=None, connected: bool = True):
+    """
+    Time a solver method and, when it is called with result=True, return a SearchResult with the
+    counters the method left in self.stats instead of the bare path.
+    The search only runs if start and end are connected (Maze.connected), otherwise the path is empty.
+    @instrumented(connected=False) skips that check, it labels the components of the whole maze: the
+    constant memory walks (wall_follower, tremaux, pledge) find out by themselves. A call with a budget
+    (max_expansions or time_limit) only checks that start and end are open cells (GridGraph.is_open), and
+    its time limit counts from the call (self.started). The (x, y) endpoints of the call are self.query, the
+    steps visualization marks them.
+    """
+    if search is None:
+        return lambda search: instrumented(search, connected)
+    names = list(inspect.signature(search).parameters)[1:]
+
+    def argument(name, args, kwargs):
+        # Value of an argument given by position (after self) or by name, None if it is not given
+        index = names.index(name) if name in names else len(args)
+        return args[index] if index < len(args) else kwargs.get(name)
+
+    @wraps(search)
+    def solve(self, *args, result: bool = False, **kwargs):
+        self.stats  = {}
+        start_time  = self.started = time.perf_counter()
+        start, end  = argument('start', args, kwargs), argument('end', args, kwargs)
+        self.query  = self.endpoints(start, end)
+        budget      = argument('max_expansions', args, kwargs) is not None or argument('time_limit', args, kwargs) is not None
+        if not connected:
+            run = True
+        elif budget:
+            run = all(self.maze.graph.is_open(point) for point in self.query)
+        else:
+            run = self.maze.connected(*self.query)
+        path        = search(self, *args, **kwargs) if run else []
+        wall_time   = time.perf_counter() - start_time
+        return SearchResult(search.__name__, path, self.stats, wall_time) if result else path
+    return solve
 
 
 class MazeSolver:
@@ -23,22 +141,119 @@ class MazeSolver:
     Attributes:
     maze (Maze): The maze to solve.
     visualizer (MazeVisualizer): The visualizer to visualize the steps and solution.
+    cache (DistanceFieldCache): Distance fields of the targets already queried (see cached).
+    workspace (Workspace): Arrays reused by bfs, dfs, dijkstra, a_star and greedy_best_first_search, default
+    maze.workspace; False allocates new arrays for every search. A method's workspace argument overrides it.
     
     Methods: Algorithms to solve the maze throw graphs (bfs, dfs, dijsktra, A*, bi-directional).
+    Every algorithm takes result=True to return a SearchResult (path and counters of the search) and
+    hook, a function called with every (x, y) cell the search reaches (the steps visualization is one).
     """
-    def __init__(self, maze, visualizer):
+    def __init__(self, maze, visualizer, cache: DistanceFieldCache = None, workspace: Workspace = None):
         
         self.maze       = maze
         self.visualizer = visualizer
+        self.cache      = field_cache if cache is None else cache
+        self.workspace  = workspace
+        self.stats      = {}  # Counters of the last search: expanded, generated, pushes, peak_frontier
+        self.started    = None  # time.perf_counter() at the call of the last search, its budget counts from it
+        self.query      = (maze.start, maze.end)  # (x, y) start and end of the last search
+
+
+    def solve_many(self, queries, algorithm: str = 'bfs', workers: int = 0, chunksize: int = 256, **options):
+        """
+        Solve many (start, end) queries on the same maze, its graph is built only once.
+
+        Parameters:
+        - queries: Iterable of ((x, y) start, (x, y) end) pairs, consumed as the results are produced.
+        - algorithm: Name of the MazeSolver method to use (bfs, a_star, ...).
+        - workers: Number of processes, 0 solves in this process. The workers share the maze grid (and its
+                   costs) through shared memory, only the queries and the paths are sent between processes.
+        - chunksize: Queries sent to a worker at a time.
+        - options: Extra arguments of the algorithm (e.g. contracted=True).
+
+        Returns: Iterator[Tuple[start, end, path]] -> one result per query, in the order of the queries.
+        """
+        if not workers:
+            solve = getattr(self, algorithm)
+            for start, end in queries:
+                yield start, end, solve(start=start, end=end, **options)
+            return
 
+        grid    = self.maze.maze
+        memory  = shared_memory.SharedMemory(create=True, size=max(grid.nbytes, 1))
+        costs   = None if self.maze.costs is None else shared_memory.SharedMemory(create=True, size=max(grid.size, 1))
+        try:
+            np.ndarray(grid.shape, dtype=grid.dtype, buffer=memory.buf)[:] = grid
+            if costs is not None:
+                np.ndarray(grid.shape, dtype=np.uint8, buffer=costs.buf)[:] = self.maze.costs
+            queries = iter(queries)
+            chunks  = iter(lambda: list(islice(queries, chunksize)), [])
+            initargs = (memory.name, grid.shape, grid.dtype.str, None if costs is None else costs.name)
+            with ProcessPoolExecutor(workers, initializer=attach_worker, initargs=initargs) as pool:
+                pending = deque()  # At most 4 chunks per worker in flight, the queries are read as they are needed
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(solve_chunk, algorithm, chunk, options)))
+                    if len(pending) >= 4 * workers:
+                        chunk, future = pending.popleft()
+                        for (start, end), path in zip(chunk, future.result()):
+                            yield start, end, path
+                while pending:
+                    chunk, future = pending.popleft()
+                    for (start, end), path in zip(chunk, future.result()):
+                        yield start, end, path
+        finally:
+            for block in (memory, costs):
+                if block is not None:
+                    block.close()
+                    block.unlink()
 
-    def bfs(self, setps: bool = False, solution: bool = False):
+
+    def endpoints(self, start: Tuple[int, int] = None, end: Tuple[int, int] = None):
+        return (self.maze.start if start is None else tuple(start)), (self.maze.end if end is None else tuple(end))
+
+    def step_hook(self, steps: bool, hook=None):
+        """
+        Per-cell callback of a search: hook, and the visualizer steps if steps is True (None if there is neither).
+        The steps are drawn with the start and end of the search (self.query), not the ones of the maze.
+        """
+        if not steps:
+            return hook
+        visited     = []
+        start, end  = self.query
+        def show(cell):
+            visited.append(cell)
+            self.visualizer.steps(cell, visited, start, end)
+            if hook is not None: hook(cell)
+        return show
+
+    def workspace_for(self, workspace: Workspace = None) -> Workspace:
+        """
+        Workspace of a search: the argument, else the solver's, else new arrays for this search only.
+        """
+        workspace = self.workspace if workspace is None else workspace
+        if workspace is None:
+            return self.maze.workspace
+        return workspace if workspace else Workspace(self.maze.graph.size)
+
+    def costs(self):
+        """
+        Flat memoryview of the terrain costs of the maze, None without costs (every move costs 1).
+        """
+        return None if self.maze.costs is None else memoryview(self.maze.costs.reshape(-1))
+
+    @instrumented
+    def bfs(self, setps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None, workspace: Workspace = None):
         """        
         Solve maze using BFS algorithm.
     
         Parameters: 
         - setps: If True, visualize each step of the algorithm.
         - solution: If True, visualize the solution path.
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - hook: Function called with every (x, y) cell reached.
+        - result: If True, return a SearchResult.
+        - workspace: Arrays of the search (see workspace_for).
 
         
     
@@ -51,42 +266,129 @@ class MazeSolver:
                               show solution
         """
         
-        graph       = self.maze.associated_graph # Get the graph associated with the maze
-        queue       = deque([self.maze.start]) # Initialize a queue with the start node
-        previous    = {self.maze.start: None}  # dict to track of the node that led to each node
-        visited     = []     # Keep track of visited nodes
+        graph       = self.maze.graph # Get the graph associated with the maze
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        queue       = deque([start]) # Initialize a queue with the start node
+        workspace   = self.workspace_for(workspace)
+        generation  = workspace.begin()  # A node is reached when its stamp is the generation of this search
+        stamp       = workspace.stamp
+        track       = workspace.track  # Node that led to each node
+        hook        = self.step_hook(setps, hook)
+        stamp[start] = generation
+        track[start] = start
+        path        = [] # Empty list if no path is found
+        expanded    = generated = 0
+        pushes      = peak = 1
 
 
 
         while queue:
             node = queue.popleft() # Get the next node
-            if node == self.maze.end:
-                path = []
-                while node is not None:
-                    path.append(node)
-                    node = previous[node]
-                        
-                if solution: self.visualizer.solution(path[::-1])
-                return path
+            if node == end:
+                path = workspace.path(node, graph.width)
+                break
+            expanded += 1
 
             # Visit all neighbors of the current node
-            for neighbor in graph[node]:
+            neighbors = offsets[mask[node]]
+            generated += len(neighbors)
+            for offset in neighbors:
+                neighbor = node + offset
                 # If the neighbor has not been visited yet
-                if neighbor not in previous:
+                if stamp[neighbor] != generation:
                     queue.append(neighbor)  # Add it to the queue 
-                    previous[neighbor] = node # Add it to track dict with they previous node
-                    visited.append(neighbor) # Add it to visited nodes
-                    if setps: self.visualizer.steps(neighbor, visited)
+                    stamp[neighbor] = generation
+                    track[neighbor] = node # Add it to track array with they previous node
+                    pushes += 1
+                    if hook is not None: hook(graph.cell(neighbor))
+            if len(queue) > peak: peak = len(queue)
+
+
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        if solution and path: self.visualizer.solution(path)
+        return path
+    
+    
+    @instrumented
+    def wavefront(self, steps: bool = False, solution: bool = False, from_end: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """        
+        Solve maze with a BFS distance field computed a whole frontier at a time with NumPy.
+        Same path as bfs, faster on open mazes where the frontiers are wide (about 3x bfs on a 1001 empty maze,
+        the NumPy calls of every level keep it from an order of magnitude).
+    
+        Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - from_end: If True, compute the field from the end and walk down its gradient from the start.
+                    Same length as bfs, ties between shortest paths may be broken differently.
+        - hook: Function called with every (x, y) cell reached, level by level, after the search.
+    
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+                  
+                  Optional -> show the cells reached by the wavefront
+                              show solution
+        """
+        graph       = self.maze.graph
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
 
+        if from_end:
+            distances   = distance_field(graph, end, target=start)
+            path        = [graph.cell(node) for node in descend(graph, distances, start)]
+        else:
+            previous    = graph.array()
+            distances   = distance_field(graph, start, previous, target=end)
+            path        = graph.path(memoryview(previous), end) if distances[end] >= 0 else []
 
-        return [] # Return empty list if no path is found
+        reached     = np.flatnonzero(distances >= 0)
+        levels      = np.bincount(distances[reached])
+        self.stats  = {'expanded': int(reached.size), 'generated': int(DEGREE[graph.mask[reached]].sum(dtype=np.int64)),
+                       'pushes': int(reached.size), 'peak_frontier': int(levels.max(initial=0))}
+        hook        = self.step_hook(steps, hook)
+        if hook is not None:
+            for node in reached[np.argsort(distances[reached], kind='stable')].tolist():
+                hook(graph.cell(node))
+        if solution and path: self.visualizer.solution(path)
+        return path
     
     
-    def dfs(self, steps: bool = False, solution: bool = False):
+    @instrumented
+    def cached(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """        
+        Solve maze walking down the distance field of the end, kept in self.cache.
+        The first query to an end computes its whole field, the next ones take time proportional to the path.
+    
+        Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
+    
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+                  
+                  Optional -> show solution
+        """
+        start, end  = self.endpoints(start, end)
+        hits        = self.cache.hits
+        path        = self.cache.path(self.maze, start, end)
+        self.stats  = {'expanded': len(path), 'cache_hit': self.cache.hits - hits}
+        hook        = self.step_hook(steps, hook)
+        if hook is not None:
+            for cell in path: hook(cell)
+        if solution and path: self.visualizer.solution(path)
+        return path
+    
+    
+    @instrumented
+    def dfs(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None, workspace: Workspace = None):
         """        
         Solve maze using DFS algorithm.
     
         Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
         
     
     
@@ -97,41 +399,60 @@ class MazeSolver:
                   Optional -> show step by stept the algorithm 
                               show solution
         """
-        graph       = self.maze.associated_graph
-        stack       = [self.maze.start] # Initialize stack with start node
-        previous    = {self.maze.start: None}  # Start node has no previous node
-        visited     = []
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        stack       = [start] # Initialize stack with start node
+        workspace   = self.workspace_for(workspace)
+        generation  = workspace.begin()
+        stamp       = workspace.stamp
+        track       = workspace.track
+        hook        = self.step_hook(steps, hook)
+        stamp[start] = generation
+        track[start] = start  # Start node is its own previous node
+        path        = []
+        expanded    = generated = 0
+        pushes      = peak = 1
     
         while stack:
             node = stack.pop()
-            # If end node is reached, reconstruct and return path
-            if node == self.maze.end:
-                path = []
-                while node is not None:
-                    path.append(node)
-                    node = previous[node]
-                path = path[::-1]  ## Reverse path
-                if solution: self.visualizer.solution(path)
-                return path
+            # If end node is reached, reconstruct the path
+            if node == end:
+                path = workspace.path(node, graph.width)
+                break
+            expanded += 1
     
             # For each neighbor of current node
-            for neighbor in graph[node]:
-                if neighbor not in previous:
+            neighbors = offsets[mask[node]]
+            generated += len(neighbors)
+            for offset in neighbors:
+                neighbor = node + offset
+                if stamp[neighbor] != generation:
                     stack.append(neighbor) # Add neighbor to stack
-                    previous[neighbor] = node # Update previous node
-                    visited.append(neighbor)
-                    if steps: self.visualizer.steps(neighbor, visited)
+                    stamp[neighbor] = generation
+                    track[neighbor] = node # Update previous node
+                    pushes += 1
+                    if hook is not None: hook(graph.cell(neighbor))
+            if len(stack) > peak: peak = len(stack)
     
-        return [] 
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        if solution and path: self.visualizer.solution(path)
+        return path
 
 
 
-    def dijkstra(self, steps: bool = False, solution: bool = False):
+    @instrumented
+    def dijkstra(self, steps: bool = False, solution: bool = False, contracted: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None,
+                 workspace: Workspace = None):
         """        
-        Solve maze using Dijkstra algorithm.
+        Solve maze using Dijkstra algorithm, moving into a cell costs its maze.costs (1 without costs).
     
         Parameters: Maze, setps, solution
-        
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - contracted: If True, search the contracted graph (corridors as weighted edges, unit costs only).
     
     
         Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
@@ -141,54 +462,148 @@ class MazeSolver:
                   Optional -> show step by stept the algorithm 
                               show solution
         """
-        graph       = self.maze
-        graph       = self.maze.associated_graph
-        heap        = [(0, self.maze.start)]
-        distances   = {self.maze.start: 0}
-        previous    = {self.maze.start: None}
-        visited     = []
+        if contracted: return self.contracted_search(steps, solution, start=start, end=end, hook=hook)
+
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        heap        = [(0, start)]
+        workspace   = self.workspace_for(workspace)
+        generation  = workspace.begin()
+        stamp       = workspace.stamp
+        distance    = workspace.distance
+        track       = workspace.track
+        cost        = self.costs()
+        hook        = self.step_hook(steps, hook)
+        stamp[start]    = generation
+        distance[start] = 0
+        track[start]    = start
+        path        = []
+        expanded    = generated = 0
+        pushes      = peak = 1
 
         while heap:
             (dist, node) = heapq.heappop(heap)  # Extract node with minimum distance
+            if dist > distance[node]:
+                continue  # Stale entry, the node was reached again with a lower cost
 
-            # If end node is reached, reconstruct and return path
-            if node == self.maze.end:
-                path = []
-                while node is not None:
-                    path.append(node)
-                    node = previous[node]
-                path = path[::-1]  
-                if solution: self.visualizer.solution(path)
-                return path
+            # If end node is reached, reconstruct the path
+            if node == end:
+                path = workspace.path(node, graph.width)
+                break
+            expanded += 1
 
 
             # For each neighbor of current node
-            for neighbor in graph[node]:
-                new_dist = distances[node] + 1  # new tentative distance
+            neighbors = offsets[mask[node]]
+            generated += len(neighbors)
+            for offset in neighbors:
+                neighbor = node + offset
+                new_dist = distance[node] + (1 if cost is None else cost[neighbor])  # new tentative distance
 
                 # If new distance is shorter
-                if neighbor not in distances or new_dist < distances[neighbor]:
-                    distances[neighbor] = new_dist  # Update distance
+                if stamp[neighbor] != generation or new_dist < distance[neighbor]:
+                    stamp[neighbor] = generation
+                    distance[neighbor] = new_dist  # Update distance
                     heapq.heappush(heap, (new_dist, neighbor))  # Add neighbor to heap
-                    previous[neighbor] = node  # Update previous node
-                    visited.append(neighbor)
-                    if steps: self.visualizer.steps(neighbor, visited)
+                    track[neighbor] = node  # Update previous node
+                    pushes += 1
+                    if hook is not None: hook(graph.cell(neighbor))
+            if len(heap) > peak: peak = len(heap)
 
-        return []  
-    
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+    @instrumented
+    def dial(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """        
+        Dijkstra with a bucket queue (Dial's algorithm) for the small integer costs of maze.costs.
 
+        The tentative distances of the queued cells are within max cost of the distance being expanded,
+        so max cost + 1 buckets used circularly hold the queue: pushing and popping are O(1) instead of
+        the O(log n) of a heap. Without costs it expands the cells in bfs order.
     
+        Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
     
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+        """
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        cost        = self.costs()
+        buckets     = [[] for bucket in range(2 if cost is None else int(self.maze.costs.max()) + 1)]
+        distances   = graph.array()
+        previous    = graph.array()
+        hook        = self.step_hook(steps, hook)
+        distances[start] = 0
+        previous[start]  = start
+        distance    = memoryview(distances)
+        track       = memoryview(previous)
+        path        = []
+        expanded    = generated = 0
+        pushes      = peak = queued = 1
+        buckets[0].append(start)
+        current     = 0  # Distance of the cells in the current bucket
+
+        while queued and not path:
+            bucket = buckets[current % len(buckets)]
+            while bucket:
+                node = bucket.pop()
+                queued -= 1
+                if distance[node] != current:
+                    continue  # Stale entry, the cell was reached again with a lower cost
+                if node == end:
+                    path = graph.path(track, node)
+                    break
+                expanded += 1
+
+                neighbors = offsets[mask[node]]
+                generated += len(neighbors)
+                for offset in neighbors:
+                    neighbor = node + offset
+                    new_distance = current + (1 if cost is None else cost[neighbor])
+                    if distance[neighbor] < 0 or new_distance < distance[neighbor]:
+                        distance[neighbor] = new_distance
+                        track[neighbor] = node
+                        buckets[new_distance % len(buckets)].append(neighbor)
+                        queued += 1
+                        pushes += 1
+                        if hook is not None: hook(graph.cell(neighbor))
+                if queued > peak: peak = queued
+            current += 1
+
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
 
     def heuristic(self, node):
         return abs(node[0] - self.maze.end[0]) + abs(node[1] - self.maze.end[1])
     
-    def a_star(self, steps: bool = False, solution: bool = False):
+    @instrumented
+    def a_star(self, steps: bool = False, solution: bool = False, contracted: bool = False, weight: float = 1, max_expansions: int = None, time_limit: float = None,
+               start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None, workspace: Workspace = None):
         """        
-        Solve maze using A* algorithm.
+        Solve maze using A* algorithm, moving into a cell costs its maze.costs (1 without costs).
+        The heuristic is the manhattan distance times the lowest cost (maze.min_cost), admissible with costs.
     
         Parameters: Maze, setps, solution
-        
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - contracted: If True, search the contracted graph (corridors as weighted edges, unit costs only, no weight or budget).
+        - weight: Weighted A* (epsilon), priority g + weight * h: fewer expansions, the path costs at most weight
+                  times the shortest one.
+        - max_expansions/time_limit: Budget of the search (see Budget), when it runs out the path goes to the
+                  reached cell closest to the end (stats partial = 1).
     
     
         Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
@@ -198,39 +613,73 @@ class MazeSolver:
                   Optional -> show step by stept the algorithm 
                               show solution
         """
+        if contracted:
+            if weight != 1 or max_expansions is not None or time_limit is not None:
+                raise ValueError("contracted a_star takes no weight, max_expansions or time_limit")
+            return self.contracted_search(steps, solution, heuristic=True, start=start, end=end, hook=hook)
         
-        graph       = self.maze.associated_graph
-        heap        = [(0, self.maze.start)]
-        distances   = {self.maze.start: 0}
-        previous    = {self.maze.start: None}
-        visited     = []
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        width       = graph.width
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        end_x, end_y = graph.cell(end)
+        heap        = [(0, start)]
+        workspace   = self.workspace_for(workspace)
+        generation  = workspace.begin()
+        stamp       = workspace.stamp
+        distance    = workspace.distance
+        track       = workspace.track
+        cost        = self.costs()
+        scale       = self.maze.min_cost * weight
+        budget      = Budget(max_expansions, time_limit, self.started)
+        closest, closest_h = start, abs(graph.cell(start)[0] - end_x) + abs(graph.cell(start)[1] - end_y)
+        hook        = self.step_hook(steps, hook)
+        stamp[start]    = generation
+        distance[start] = 0
+        track[start]    = start
+        path        = []
+        expanded    = generated = 0
+        pushes      = peak = 1
     
         while heap:
-            (distance, node) = heapq.heappop(heap) # Extract node with minimum distance
+            (priority, node) = heapq.heappop(heap) # Extract node with minimum distance
             
-            # If end node is reached, reconstruct and return path
-            if node == self.maze.end:
-                path = []
-                while node is not None:
-                    path.append(node)
-                    node = previous[node]
-                path = path[::-1]  
-                if solution: self.visualizer.solution(path)
-                return path
-    
-            for neighbor in graph[node]:
-                new_distance = distances[node] + 1
+            # If end node is reached, reconstruct the path
+            if node == end:
+                path = workspace.path(node, width)
+                break
+            if budget.spent(expanded):
+                break
+            expanded += 1
+    
+            neighbors = offsets[mask[node]]
+            generated += len(neighbors)
+            for offset in neighbors:
+                neighbor = node + offset
+                new_distance = distance[node] + (1 if cost is None else cost[neighbor])
                 
                 # If new distance is lower
-                if neighbor not in distances or new_distance < distances[neighbor]:
-                    distances[neighbor] = new_distance
-                    priority = new_distance + self.heuristic(neighbor)
+                if stamp[neighbor] != generation or new_distance < distance[neighbor]:
+                    stamp[neighbor] = generation
+                    distance[neighbor] = new_distance
+                    y, x = divmod(neighbor, width)
+                    h = abs(x - end_x) + abs(y - end_y) # Same as self.heuristic on the cell id
+                    priority = new_distance + scale * h # Times the lowest cost (and the weight)
                     heapq.heappush(heap, (priority, neighbor)) # Add neighbor to heap with priority
-                    previous[neighbor] = node
-                    visited.append(neighbor)
-                    if steps: self.visualizer.steps(neighbor, visited)
+                    pushes += 1
+                    track[neighbor] = node
+                    if h < closest_h: closest, closest_h = neighbor, h
+                    if hook is not None: hook(graph.cell(neighbor))
+            if len(heap) > peak: peak = len(heap)
     
-        return []
+        partial     = not path and budget.exhausted
+        if partial: path = workspace.path(closest, width)
+        self.stats  = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak, 'partial': int(partial)}
+        if solution and path: self.visualizer.solution(path)
+        return path
     
     
 
@@ -240,12 +689,132 @@ class MazeSolver:
         
 
     
-    def bidirectional(self, steps: bool = False, solution: bool = False):
+    @instrumented
+    def jump_point_search(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """        
+        Solve maze using Jump Point Search for 4-connected grids.
+        A* that only pushes jump points: from every node it moves in a straight line while the cells
+        on the way have no neighbor that can not be reached as well by a symmetric path.
+    
+        Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
+    
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+                  
+                  Optional -> show the jump points step by step
+                              show solution
+        """
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        width       = graph.width
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        end_x, end_y = graph.cell(end)
+        distances   = graph.array()
+        previous    = graph.array()
+        distance    = memoryview(distances)
+        track       = memoryview(previous)
+        closed      = bytearray(graph.size)
+        hook        = self.step_hook(steps, hook)
+        moves       = {EAST: 1, WEST: -1, SOUTH: width, NORTH: -width} # Cell offset of every direction bit
+
+        def jump_horizontal(cell, offset, bit):
+            # Move while possible, stop at the end or where a vertical neighbor appears (forced neighbor)
+            while mask[cell] & bit:
+                cell += offset
+                if cell == end: return cell
+                here, behind = mask[cell], mask[cell - offset]
+                if (here & NORTH and not behind & NORTH) or (here & SOUTH and not behind & SOUTH):
+                    return cell
+            return -1
+
+        def jump(cell, bit):
+            offset = moves[bit]
+            if bit == EAST or bit == WEST:
+                return jump_horizontal(cell, offset, bit)
+            # Vertical moves stop where a horizontal move can reach a jump point
+            while mask[cell] & bit:
+                cell += offset
+                if cell == end: return cell
+                here, behind = mask[cell], mask[cell - offset]
+                if (here & WEST and not behind & WEST) or (here & EAST and not behind & EAST):
+                    return cell
+                if (here & EAST and jump_horizontal(cell, 1, EAST) >= 0) or (here & WEST and jump_horizontal(cell, -1, WEST) >= 0):
+                    return cell
+            return -1
+
+        def directions(node):
+            # Pruned directions: forward and the two perpendicular ones, every one from the start
+            if node == start:
+                return (EAST, WEST, SOUTH, NORTH)
+            parent = track[node]
+            if node // width == parent // width: # Reached moving horizontally
+                return (NORTH, SOUTH, EAST if node > parent else WEST)
+            return (WEST, EAST, SOUTH if node > parent else NORTH)
+
+        heap        = [(0, start)]
+        path        = []
+        expanded    = generated = 0
+        pushes      = peak = 1
+        distance[start] = 0
+        track[start]    = start
+
+        while heap:
+            priority, node = heapq.heappop(heap)
+            if closed[node]:
+                continue
+            closed[node] = 1
+
+            if node == end:
+                # Expand the straight segments between jump points
+                jumps = [node]
+                while track[node] != node:
+                    node = track[node]
+                    jumps.append(node)
+                jumps.reverse()
+                path = [graph.cell(jumps[0])]
+                for tail, head in zip(jumps, jumps[1:]):
+                    offset = (1 if head > tail else -1) * (1 if tail // width == head // width else width)
+                    path.extend(graph.cell(cell) for cell in range(tail + offset, head + offset, offset))
+                break
+            expanded += 1
+
+            y, x = divmod(node, width)
+            for bit in directions(node):
+                if not mask[node] & bit:
+                    continue
+                point = jump(node, bit)
+                generated += 1
+                if point < 0 or closed[point]:
+                    continue
+                point_y, point_x = divmod(point, width)
+                new_distance = distance[node] + abs(point_x - x) + abs(point_y - y)
+                if distance[point] < 0 or new_distance < distance[point]:
+                    distance[point] = new_distance
+                    track[point] = node
+                    heapq.heappush(heap, (new_distance + abs(point_x - end_x) + abs(point_y - end_y), point))
+                    pushes += 1
+                    if hook is not None: hook(graph.cell(point))
+            if len(heap) > peak: peak = len(heap)
+
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        if solution and path: self.visualizer.solution(path)
+        return path
+    
+    
+    @instrumented
+    def bidirectional(self, steps: bool = False, solution: bool = False, contracted: bool = False, heuristic: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
         """        
         Solve maze using bi-directional (bfs) algorithm.
+        Every step expands a whole level of the smaller frontier, the shortest meeting of the level is the
+        shortest path (a meeting of a later level can not be shorter).
     
         Parameters: Maze, setps, solution
-        
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - contracted: If True, run a bi-directional Dijkstra on the contracted graph (corridors as weighted edges).
+        - heuristic: If True, run a bi-directional A* (see bidirectional_a_star).
     
     
         Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
@@ -255,80 +824,533 @@ class MazeSolver:
                   Optional -> show step by stept the algorithm 
                               show solution
         """
+        if contracted: return self.contracted_bidirectional(steps, solution, start=start, end=end, hook=hook)
+        if heuristic: return self.bidirectional_a_star(steps, solution, start=start, end=end, hook=hook)
         
-        graph               = self.maze.associated_graph
-        forward_queue       = [self.maze.start]
-        backward_queue      = [self.maze.end]
-        forward_previous    = {self.maze.start: None}
-        backward_previous   = {self.maze.end: None}
-        forward_visited     = []
-        backward_visited    = []
-    
-        while forward_queue and backward_queue:
-            # Expand the forward search
-            node = forward_queue.pop(0)
-            for neighbor in graph[node]:
-                if neighbor in backward_previous:
-                    # The searches have met, reconstruct the path
-                    forward_path = []
-                    while node is not None:
-                        forward_path.append(node)
-                        node = forward_previous[node]
-                    forward_path = forward_path[::-1]
-    
-                    backward_path = []
-                    node = neighbor
-                    while node is not None:
-                        backward_path.append(node)
-                        node = backward_previous[node]
-    
-                    path = forward_path + backward_path
-                    if solution: self.visualizer.solution(path)
-                    return path
-    
-                if neighbor not in forward_previous:
-                    forward_queue.append(neighbor)
-                    forward_previous[neighbor] = node
-                    forward_visited.append(neighbor)
-                    if steps: self.visualizer.steps(neighbor, forward_visited + backward_visited)
-    
-            # Expand the backward search
-            node = backward_queue.pop(0)
-            for neighbor in graph[node]:
-                if neighbor in forward_previous:
-                    # The searches have met, reconstruct the path
-                    forward_path = []
-                    node = neighbor
-                    while node is not None:
-                        forward_path.append(node)
-                        node = forward_previous[node]
-                    forward_path = forward_path[::-1]
-    
-                    backward_path = []
-                    node = node
-                    while node is not None:
-                        backward_path.append(node)
-                        node = backward_previous[node]
-    
-                    path = forward_path + backward_path
-                    if solution: self.visualizer.solution(path)
-                    return path
-    
-                if neighbor not in backward_previous:
-                    backward_queue.append(neighbor)
-                    backward_previous[neighbor] = node
-                    backward_visited.append(neighbor)
-                    if steps: self.visualizer.steps(neighbor, backward_visited + forward_visited)
-    
-        return []  # No path was found
-    
-    
-    
-    def random(self, steps: bool = False, solution: bool = False):
+        graph               = self.maze.graph
+        mask                = memoryview(graph.mask)
+        offsets             = graph.offsets
+        start, end          = self.endpoints(start, end)
+        start               = graph.cell_id(start)
+        end                 = graph.cell_id(end)
+        queues              = (deque([start]), deque([end]))
+        previous            = (graph.array(), graph.array())
+        distances           = (graph.array(), graph.array())
+        tracks              = tuple(memoryview(array) for array in previous)
+        levels              = tuple(memoryview(array) for array in distances)
+        hook                = self.step_hook(steps, hook)
+        for side, source in enumerate((start, end)):
+            tracks[side][source] = source
+            levels[side][source] = 0
+        best, meeting       = (0, (start, end)) if start == end else (None, None)  # Forward and backward cells of the shortest meeting
+        expanded            = generated = 0
+        pushes              = peak = 2
+    
+        while meeting is None and queues[0] and queues[1]:
+            side = 0 if len(queues[0]) <= len(queues[1]) else 1
+            queue, track, distance, other = queues[side], tracks[side], levels[side], levels[1 - side]
+            for count in range(len(queue)):
+                node = queue.popleft()
+                expanded += 1
+                neighbors = offsets[mask[node]]
+                generated += len(neighbors)
+                for offset in neighbors:
+                    neighbor = node + offset
+                    if other[neighbor] >= 0:
+                        # The searches have met, keep the shortest meeting of the level
+                        length = distance[node] + 1 + other[neighbor]
+                        if best is None or length < best:
+                            best, meeting = length, ((node, neighbor) if side == 0 else (neighbor, node))
+                    elif distance[neighbor] < 0:
+                        queue.append(neighbor)
+                        distance[neighbor] = distance[node] + 1
+                        track[neighbor] = node
+                        pushes += 1
+                        if hook is not None: hook(graph.cell(neighbor))
+            if len(queues[0]) + len(queues[1]) > peak: peak = len(queues[0]) + len(queues[1])
+    
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        path = [] if meeting is None else graph.path(tracks[0], meeting[0])
+        if meeting is not None and start != end: path += graph.path(tracks[1], meeting[1])[::-1]
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+    @instrumented
+    def bidirectional_a_star(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """        
+        Bi-directional A*, expanding the side with the smaller heap.
+
+        Both sides use the average of the manhattan distances, (to end - to start) / 2 forward and its opposite
+        backward, which is consistent for both: a node is final when it is popped, and no path can be shorter
+        than the best meeting once the keys on top of the heaps add up to it (keys are doubled to stay integers).
+    
+        Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
+    
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+        """
+        graph               = self.maze.graph
+        width               = graph.width
+        mask                = memoryview(graph.mask)
+        offsets             = graph.offsets
+        start, end          = self.endpoints(start, end)
+        (start_x, start_y), (end_x, end_y) = start, end
+        start               = graph.cell_id(start)
+        end                 = graph.cell_id(end)
+        previous            = (graph.array(), graph.array())
+        distances           = (graph.array(), graph.array())
+        tracks              = tuple(memoryview(array) for array in previous)
+        levels              = tuple(memoryview(array) for array in distances)
+        closed              = (bytearray(graph.size), bytearray(graph.size))
+        hook                = self.step_hook(steps, hook)
+
+        # Keys: twice the distance plus (to end - to start) forward, minus it backward
+        distance            = abs(end_x - start_x) + abs(end_y - start_y)
+        heaps               = ([(distance, start)], [(distance, end)])
+        for side, source in enumerate((start, end)):
+            tracks[side][source] = source
+            levels[side][source] = 0
+        best, meeting       = (0, start) if start == end else (None, -1)
+        expanded            = generated = 0
+        pushes              = peak = 2
+
+        while heaps[0] and heaps[1]:
+            if best is not None and heaps[0][0][0] + heaps[1][0][0] >= 2 * best:
+                break
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            heap, track, distance, other, done = heaps[side], tracks[side], levels[side], levels[1 - side], closed[side]
+            sign = 1 if side == 0 else -1
+            key, node = heapq.heappop(heap)
+            if done[node]:
+                continue  # Stale entry
+            done[node] = 1
+            expanded += 1
+            neighbors = offsets[mask[node]]
+            generated += len(neighbors)
+            new_distance = distance[node] + 1
+            for offset in neighbors:
+                neighbor = node + offset
+                if distance[neighbor] < 0 or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    track[neighbor] = node
+                    y, x = divmod(neighbor, width)
+                    heapq.heappush(heap, (2 * new_distance + sign * (abs(x - end_x) + abs(y - end_y) - abs(x - start_x) - abs(y - start_y)), neighbor))
+                    pushes += 1
+                    if hook is not None: hook(graph.cell(neighbor))
+                    if other[neighbor] >= 0 and (best is None or new_distance + other[neighbor] < best):
+                        best, meeting = new_distance + other[neighbor], neighbor
+            if len(heaps[0]) + len(heaps[1]) > peak: peak = len(heaps[0]) + len(heaps[1])
+
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        path = [] if meeting < 0 else graph.path(tracks[0], meeting) + graph.path(tracks[1], meeting)[::-1][1:]
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+    @instrumented
+    def contracted_search(self, steps: bool = False, solution: bool = False, heuristic: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """        
+        Dijkstra (or A* with heuristic) on the contracted graph of the maze, the path is expanded back to every cell.
+    
+        Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - heuristic: If True, use the manhattan distance to the end (A*).
+    
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+        """
+        start, end  = self.endpoints(start, end)
+        junctions   = self.maze.contracted_graph_for(start, end)
+        edges       = junctions.edges
+        width       = junctions.graph.width
+        cells       = junctions.nodes.tolist()
+        start       = junctions.node(start)
+        end         = junctions.node(end)
+        end_y, end_x = divmod(cells[end], width) if end >= 0 else (0, 0)
+        distances   = np.full(len(junctions), -1, dtype=np.int32)
+        previous    = np.full(len(junctions), -1, dtype=np.int32)
+        through     = np.full(len(junctions), -1, dtype=np.int32) # Edge used to reach every node
+        distance, track, used = memoryview(distances), memoryview(previous), memoryview(through)
+        hook        = self.step_hook(steps, hook)
+        if start < 0 or end < 0:
+            return []
+
+        def estimate(node):
+            if not heuristic: return 0
+            y, x = divmod(cells[node], width)
+            return abs(x - end_x) + abs(y - end_y)
+
+        heap            = [(estimate(start), start)]
+        distance[start] = 0
+        track[start]    = start
+        path            = []
+        expanded        = generated = 0
+        pushes          = peak = 1
+
+        while heap:
+            priority, node = heapq.heappop(heap)
+            if node == end:
+                path = junctions.path(track, used, node)
+                break
+            if priority > distance[node] + estimate(node):
+                continue # Already expanded with a lower distance
+            expanded += 1
+            generated += len(edges[node])
+
+            for neighbor, length, edge in edges[node]:
+                new_distance = distance[node] + length
+                if distance[neighbor] < 0 or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    track[neighbor] = node
+                    used[neighbor] = edge
+                    heapq.heappush(heap, (new_distance + estimate(neighbor), neighbor))
+                    pushes += 1
+                    if hook is not None: hook(junctions.graph.cell(cells[neighbor]))
+            if len(heap) > peak: peak = len(heap)
+
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+    @instrumented
+    def contracted_bidirectional(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """        
+        Bi-directional Dijkstra on the contracted graph of the maze, expanding the side with the smaller heap.
+        It stops when no path through the frontiers can be shorter than the best meeting found.
+    
+        Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
+    
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+        """
+        start, end  = self.endpoints(start, end)
+        junctions   = self.maze.contracted_graph_for(start, end)
+        edges       = junctions.edges
+        cells       = junctions.nodes.tolist()
+        start       = junctions.node(start)
+        end         = junctions.node(end)
+        if start < 0 or end < 0:
+            return []
+
+        # Forward (from start) and backward (from end) searches
+        searches    = []
+        for source in (start, end):
+            distances, previous, through = (np.full(len(junctions), -1, dtype=np.int32) for array in range(3))
+            distances[source] = 0
+            previous[source]  = source
+            searches.append(([(0, source)], memoryview(distances), memoryview(previous), memoryview(through)))
+        best, meeting = (0, start) if start == end else (None, -1)
+        hook        = self.step_hook(steps, hook)
+        expanded    = generated = 0
+        pushes      = peak = 2
+
+        while searches[0][0] and searches[1][0]:
+            if best is not None and searches[0][0][0][0] + searches[1][0][0][0] >= best:
+                break
+            side = 0 if len(searches[0][0]) <= len(searches[1][0]) else 1
+            heap, distance, track, used = searches[side]
+            other = searches[1 - side][1]
+            dist, node = heapq.heappop(heap)
+            if dist > distance[node]:
+                continue
+            expanded += 1
+            generated += len(edges[node])
+
+            for neighbor, length, edge in edges[node]:
+                new_distance = dist + length
+                if distance[neighbor] < 0 or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    track[neighbor] = node
+                    used[neighbor] = edge
+                    heapq.heappush(heap, (new_distance, neighbor))
+                    pushes += 1
+                    if hook is not None: hook(junctions.graph.cell(cells[neighbor]))
+                if other[neighbor] >= 0 and (best is None or distance[neighbor] + other[neighbor] < best):
+                    best, meeting = distance[neighbor] + other[neighbor], neighbor
+            if len(searches[0][0]) + len(searches[1][0]) > peak: peak = len(searches[0][0]) + len(searches[1][0])
+
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        if meeting < 0:
+            return []
+        path = junctions.path(searches[0][2], searches[0][3], meeting) + junctions.path(searches[1][2], searches[1][3], meeting)[::-1][1:]
+        if solution: self.visualizer.solution(path)
+        return path
+
+
+    @instrumented
+    def hierarchical(self, steps: bool = False, solution: bool = False, cluster_size: int = 32, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """
+        HPA*: search the cached abstract graph of the maze clusters (Maze.hierarchy) and refine the path
+        inside the clusters. The path is near optimal, it can be a few cells longer than the shortest one.
+
+        Parameters: Maze, steps (the cells reached by the refinement searches), solution
+        - cluster_size: Side of the clusters, the abstract graph is built once per maze and size.
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - hook: Function called with every (x, y) cell the refinement searches reach inside the clusters.
+
+        Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
+                  If there is no solution, it returns an empty list.
+        """
+        hierarchy   = self.maze.hierarchy_for(cluster_size)
+        path        = hierarchy.search(*self.endpoints(start, end), hook=self.step_hook(steps, hook))
+        self.stats  = dict(hierarchy.stats)
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+
+    def grid(self):
+        """
+        Flat memoryview of the maze cells (0 open), read in place: a numpy.memmap grid is only paged in where a walk goes.
+        """
+        return memoryview(self.maze.maze.reshape(-1))
+
+
+    @instrumented(connected=False)
+    def wall_follower(self, steps: bool = False, solution: bool = False, left: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """
+        Solve maze keeping a hand on the wall (right hand: turn right if possible, else straight, left or back).
+
+        It only reads the cells around the walker, no graph, no components, no per cell state: the extra memory
+        is the walk without its steps back, 4 bytes per cell. It reaches the end of simply connected mazes (perfect mazes, and the end on the
+        same wall as the start), on other mazes it can circle an island forever: the walk is deterministic, so
+        a repeated (cell, heading) state is caught with Brent's cycle detection (O(1) memory) and no path is returned.
+
+        Parameters:
+        - left: If True, follow the wall with the left hand.
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - hook: Function called with every (x, y) cell of the walk.
+
+        Returns: List[Tuple[int, int]] -> Path from the start to the end (the walk with its loops erased), empty if
+                 the walker looped.
+        """
+        cells       = self.grid()
+        height, width = self.maze.maze.shape
+        start, end  = self.endpoints(start, end)
+        hook        = self.step_hook(steps, hook)
+        turns       = (3, 0, 1, 2) if left else (1, 0, 3, 2)  # Directions tried, relative to the heading
+        x, y        = start
+        heading     = 0  # East, South, West, North: clockwise, a right turn is +1
+        path        = array('i', [y * width + x])  # Cell ids of the walk, the steps back are popped
+        saved, power, length = (x, y, heading), 1, 0  # Brent's cycle detection
+        moves = reads = peak = 0
+        looped      = False
+
+        while (x, y) != end:
+            for turn in turns:
+                direction = (heading + turn) & 3
+                next_x, next_y = x + DX[direction], y + DY[direction]
+                reads += 1
+                if 0 <= next_x < width and 0 <= next_y < height and not cells[next_y * width + next_x]:
+                    break
+            else:
+                looped = True  # Walled in
+                break
+            heading, x, y = direction, next_x, next_y
+            moves += 1
+            cell = y * width + x
+            if len(path) > 1 and path[-2] == cell:
+                path.pop()
+            else:
+                path.append(cell)
+                if len(path) > peak: peak = len(path)
+            if hook is not None: hook((x, y))
+
+            if (x, y, heading) == saved:
+                looped = True
+                break
+            length += 1
+            if length == power:
+                saved, power, length = (x, y, heading), power * 2, 0
+
+        path        = [] if looped else [divmod(cell, width)[::-1] for cell in erase_loops(path)]
+        self.stats  = {'expanded': moves, 'generated': reads, 'pushes': moves + 1, 'peak_frontier': peak, 'looped': int(looped)}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+    @instrumented(connected=False)
+    def tremaux(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """
+        Solve maze with Trémaux's algorithm: every passage (edge between two open cells) is marked when it is walked.
+        A new cell reached by a new passage is explored, an old cell reached by a new passage is a loop and the
+        walker goes back. Otherwise it takes an unmarked passage, or goes back through its once marked passage.
+
+        It finds a path in any maze. The marks (0, 1 or 2 walks) of the east and south passages of every cell
+        take 4 bits, half a byte per cell instead of the 4 byte previous array and the graph of bfs. At the end,
+        the passages marked once are exactly the path from the start.
+
+        Parameters:
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - hook: Function called with every (x, y) cell of the walk.
+
+        Returns: List[Tuple[int, int]] -> Path from the start to the end, empty if there is none.
+        """
+        cells       = self.grid()
+        height, width = self.maze.maze.shape
+        start, end  = self.endpoints(start, end)
+        hook        = self.step_hook(steps, hook)
+        marks       = bytearray((height * width + 1) // 2)
+
+        def passage(x, y, direction):
+            """
+            Bit position of the marks of a passage: the east passage of a cell takes 2 bits, then its south passage.
+            """
+            if direction == 2: x -= 1
+            elif direction == 3: y -= 1
+            cell = y * width + x
+            return cell >> 1, ((cell & 1) << 2) | (2 if direction & 1 else 0)
+
+        def opened(x, y, direction):
+            x, y = x + DX[direction], y + DY[direction]
+            return 0 <= x < width and 0 <= y < height and not cells[y * width + x]
+
+        x, y        = start
+        back        = -1  # Direction of the passage the walker came through
+        moves = reads = 0
+        found       = (x, y) == end
+
+        while not found:
+            marked = {}  # Marks of the open passages of the cell
+            for direction in range(4):
+                reads += 1
+                if opened(x, y, direction):
+                    byte, shift = passage(x, y, direction)
+                    marked[direction] = (marks[byte] >> shift) & 3
+            if back >= 0 and marked[back] == 1 and any(marked[direction] for direction in marked if direction != back):
+                direction = back  # New passage to an old cell: a loop, go back
+            else:
+                direction = next((direction for direction in marked if marked[direction] == 0), None)
+                if direction is None:
+                    direction = next((direction for direction in marked if marked[direction] == 1), None)
+                if direction is None:
+                    break  # Back at the start with every passage walked twice: no path
+            byte, shift = passage(x, y, direction)
+            marks[byte] += 1 << shift
+            x, y        = x + DX[direction], y + DY[direction]
+            back        = (direction + 2) & 3
+            moves      += 1
+            found       = (x, y) == end
+            if hook is not None: hook((x, y))
+
+        path = []
+        if found:
+            # The passages marked once lead from the start to the end
+            x, y    = start
+            back    = -1
+            path    = [start]
+            while (x, y) != end:
+                for direction in range(4):
+                    if direction != back and opened(x, y, direction):
+                        byte, shift = passage(x, y, direction)
+                        if (marks[byte] >> shift) & 3 == 1:
+                            break
+                x, y    = x + DX[direction], y + DY[direction]
+                back    = (direction + 2) & 3
+                path.append((x, y))
+
+        self.stats = {'expanded': moves, 'generated': reads, 'pushes': moves + 1, 'peak_frontier': len(path), 'mark_bytes': len(marks)}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+    @instrumented(connected=False)
+    def pledge(self, steps: bool = False, solution: bool = False, limit: int = None, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """
+        Solve maze with the Pledge algorithm aimed at the end: walk straight along the longer axis towards the end;
+        when a wall blocks the way, turn left and follow it with the right hand, counting the turns (right +1,
+        left -1), and leave it when the count is back to 0, heading the same way as before the wall.
+
+        The counter lets it get around obstacles that trap a plain wall follower (e.g. rooms and islands of
+        obstacle grids), with O(1) memory besides the walk without its steps back. It is a heuristic walk: it is not
+        guaranteed to reach an end inside the maze, a repeated state is caught with Brent's cycle detection and
+        the walk stops after limit moves, both without a path.
+
+        Parameters:
+        - limit: Most moves of the walk, default 8 moves per cell of the maze.
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - hook: Function called with every (x, y) cell of the walk.
+
+        Returns: List[Tuple[int, int]] -> Path from the start to the end (the walk with its loops erased), empty if
+                 the walk failed.
+        """
+        cells       = self.grid()
+        height, width = self.maze.maze.shape
+        start, end  = self.endpoints(start, end)
+        hook        = self.step_hook(steps, hook)
+        limit       = 8 * height * width if limit is None else limit
+        x, y        = start
+        heading     = 0
+        count       = None  # Turns while following a wall, None when walking free
+        path        = array('i', [y * width + x])
+        saved, power, length = (x, y, heading, count), 1, 0
+        moves = reads = peak = 0
+        failed      = False
+
+        def opened(x, y, direction):
+            x, y = x + DX[direction], y + DY[direction]
+            return 0 <= x < width and 0 <= y < height and not cells[y * width + x]
+
+        while (x, y) != end:
+            if moves >= limit:
+                failed = True
+                break
+            if count is None:
+                dx, dy  = end[0] - x, end[1] - y
+                heading = (0 if dx > 0 else 2) if abs(dx) >= abs(dy) else (1 if dy > 0 else 3)
+                reads  += 1
+                if not opened(x, y, heading):
+                    # Blocked: turn left until the wall is on the right hand
+                    count = 0
+                    while not opened(x, y, heading):
+                        heading, count, reads = (heading + 3) & 3, count - 1, reads + 1
+                        if count == -4:
+                            break
+                    if count == -4:
+                        failed = True  # Walled in
+                        break
+            else:
+                for turn, change in ((1, 1), (0, 0), (3, -1), (2, -2)):
+                    reads += 1
+                    if opened(x, y, (heading + turn) & 3):
+                        break
+                heading, count = (heading + turn) & 3, count + change
+
+            x, y    = x + DX[heading], y + DY[heading]
+            moves  += 1
+            if count == 0:
+                count = None  # Same heading as before the wall, walk free again
+            cell = y * width + x
+            if len(path) > 1 and path[-2] == cell:
+                path.pop()
+            else:
+                path.append(cell)
+                if len(path) > peak: peak = len(path)
+            if hook is not None: hook((x, y))
+
+            if (x, y, heading, count) == saved:
+                failed = True
+                break
+            length += 1
+            if length == power:
+                saved, power, length = (x, y, heading, count), power * 2, 0
+
+        path        = [] if failed else [divmod(cell, width)[::-1] for cell in erase_loops(path)]
+        self.stats  = {'expanded': moves, 'generated': reads, 'pushes': moves + 1, 'peak_frontier': peak, 'looped': int(failed)}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+
+    @instrumented
+    def random(self, steps: bool = False, solution: bool = False, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
         """        
         Solve maze using random choices .
     
         Parameters: Maze, setps, solution
+        - start/end: (x, y) points of the query, default the maze start/end.
         
     
     
@@ -339,15 +1361,24 @@ class MazeSolver:
                   Optional -> show step by stept the algorithm 
                               show solution
         """
-        graph = self.maze.associated_graph
-        start = self.maze.start
-        end = self.maze.end
-        path = [start]
-        visited = {start}
+        graph   = self.maze.graph
+        mask    = memoryview(graph.mask)
+        offsets = graph.offsets
+        start, end = self.endpoints(start, end)
+        start   = graph.cell_id(start)
+        end     = graph.cell_id(end)
+        path    = [start]
+        visited = bytearray(graph.size) # One byte per cell, 1 if visited
+        visited[start] = 1
+        hook    = self.step_hook(steps, hook)
+        expanded = generated = 0
+        pushes  = peak = 1
     
-        while path[-1] != end:
+        while path and path[-1] != end:
             current_node = path[-1]
-            neighbors = [node for node in graph[current_node] if node not in visited]
+            expanded += 1
+            generated += len(offsets[mask[current_node]])
+            neighbors = [current_node + offset for offset in offsets[mask[current_node]] if not visited[current_node + offset]]
             
             if not neighbors:  
                 path.pop()
@@ -355,22 +1386,32 @@ class MazeSolver:
             
             next_node = neighbors[0] if len(neighbors) == 1 else choice(neighbors)
             path.append(next_node)
-            visited.add(next_node)
-            if steps: self.visualizer.steps(next_node, visited)
+            visited[next_node] = 1
+            pushes += 1
+            if len(path) > peak: peak = len(path)
+            if hook is not None: hook(graph.cell(next_node))
     
+        self.stats = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak}
+        path = [graph.cell(node) for node in path]
         if solution: self.visualizer.solution(path)
         
         return path
     
     
 
-    def greedy_best_first_search(self, steps: bool = False, solution: bool = False):
+    @instrumented
+    def greedy_best_first_search(self, steps: bool = False, solution: bool = False, max_expansions: int = None, time_limit: float = None,
+                                 start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None, workspace: Workspace = None):
         
         """        
-        Solve maze using Greedy best first search Algorithm.
+        Solve maze using Greedy best first search Algorithm: the reached cell closest to the end (manhattan
+        distance, self.heuristic) is expanded first, whatever the way to it costs. Every cell is reached once,
+        the path is found with few expansions but is not the shortest one.
     
         Parameters: Maze, setps, solution
-        
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - max_expansions/time_limit: Budget of the search (see Budget), when it runs out the path goes to the
+                  reached cell closest to the end (stats partial = 1).
     
     
         Returns: List[Tuple[int, int]] ->  List of tuples that represent the path from the start to the end of the maze.
@@ -380,45 +1421,244 @@ class MazeSolver:
                   Optional -> show step by stept the algorithm 
                               show solution
         """
-        
-        
-        graph       = self.maze.associated_graph
-        open_set    = []     # Initialize the open set, which will store nodes to be explored
-        previous    = {self.maze.start: None} # Initialize the dict, which will store the path
-        distances   = {self.maze.start: 0}  # Initialize the score  dictionary, which will store the scores of nodes
-        heuristic   = lambda a,b: abs(a[0] - b[0]) + abs(a[1] - b[1])
-        heapq.heappush(open_set, (0, self.maze.start)) # Add the start node to the open set
-        # We use a heap to get the lowest cost node efficiently
-
-
-    
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        width       = graph.width
+        start, end  = self.endpoints(start, end)
+        closest_h   = abs(start[0] - end[0]) + abs(start[1] - end[1])  # self.heuristic for any end
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        end_x, end_y = graph.cell(end)
+        open_set    = [(closest_h, start)]  # Heap of the reached cells by distance to the end
+        workspace   = self.workspace_for(workspace)
+        generation  = workspace.begin()
+        stamp       = workspace.stamp
+        track       = workspace.track  # Cell that led to every cell
+        budget      = Budget(max_expansions, time_limit, self.started)
+        closest     = start
+        hook        = self.step_hook(steps, hook)
+        expanded    = generated = 0
+        pushes      = peak = 1
+        stamp[start] = generation
+        track[start] = start
+        path        = []
     
         while open_set:
-            current = heapq.heappop(open_set)[1]  # Get the node with the lowest cost
-            if steps: self.visualizer.steps(current, list(previous.keys()))
-            if current == self.maze.end:  # We found the end
+            current = heapq.heappop(open_set)[1]  # Get the cell closest to the end
+            if current == end:  # We found the end
+                path = workspace.path(current, width)
+                break
+            if budget.spent(expanded):
                 break
+            expanded += 1
     
-            for neighbor in graph[current]:
-                tentative_distance = distances[current] + heuristic(current, neighbor)
-                
-                # If the neighbor has not been explored before or if the tentative score is less than its current score
-                if neighbor not in distances or tentative_distance < distances[neighbor]: 
-                    previous[neighbor] = current
-                    distances[neighbor] = tentative_distance # Update the neighbor's previous node and score
-                    heapq.heappush(open_set, (distances[neighbor], neighbor)) # Add the neighbor to the open set
-    
-    
-        if current == self.maze.end:  # If we found a path
-            path = []
-            while current is not None:  # Backtrack to find the path
-                path.append(current)
-                current = previous[current]
-            path.reverse()  # Reverse to get path from start to end
-            if solution: self.visualizer.solution(path)
-            return path
-    
-        return []  # No path found
+            neighbors = offsets[mask[current]]
+            generated += len(neighbors)
+            for offset in neighbors:
+                neighbor = current + offset
+                if stamp[neighbor] != generation:
+                    stamp[neighbor] = generation
+                    track[neighbor] = current
+                    y, x = divmod(neighbor, width)
+                    h = abs(x - end_x) + abs(y - end_y)
+                    heapq.heappush(open_set, (h, neighbor))
+                    pushes += 1
+                    if h < closest_h: closest, closest_h = neighbor, h
+                    if hook is not None: hook(graph.cell(neighbor))
+            if len(open_set) > peak: peak = len(open_set)
+    
+        partial     = not path and budget.exhausted
+        if partial: path = workspace.path(closest, width)
+        self.stats  = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak, 'partial': int(partial)}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+    @instrumented
+    def beam_search(self, steps: bool = False, solution: bool = False, beam_width: int = 64, max_expansions: int = None, time_limit: float = None,
+                    start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """
+        Solve maze with beam search: breadth first a layer at a time, but only the beam_width cells of a layer with
+        the lowest g + h (cost so far plus manhattan distance times maze.min_cost) go on to the next layer.
+
+        The work and the memory of a layer are bounded by the width. The cells cut from the beam are not reached
+        again, so it can miss the end even when there is a path: the path then goes to the reached cell closest
+        to the end (stats partial = 1), as when the budget runs out.
+
+        Parameters:
+        - beam_width: Cells kept per layer.
+        - max_expansions/time_limit: Budget of the search (see Budget).
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - hook: Function called with every (x, y) cell reached.
+
+        Returns: List[Tuple[int, int]] -> Path from the start to the end (or to the closest cell), empty if there is no path
+                 (with a budget the ends are not checked first, the path then goes to the closest cell).
+        """
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        width       = graph.width
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        end_x, end_y = graph.cell(end)
+        distances   = graph.array()
+        previous    = graph.array()
+        cost        = self.costs()
+        scale       = self.maze.min_cost
+        budget      = Budget(max_expansions, time_limit, self.started)
+        closest, closest_h = start, abs(graph.cell(start)[0] - end_x) + abs(graph.cell(start)[1] - end_y)
+        hook        = self.step_hook(steps, hook)
+        distances[start] = 0
+        previous[start]  = start
+        distance    = memoryview(distances)
+        track       = memoryview(previous)
+        layer       = [start]
+        found       = start == end
+        expanded    = generated = layers = 0
+        pushes      = peak = 1
+
+        while layer and not found and not budget.exhausted:
+            candidates = []  # (g + h, cell) of the next layer
+            for node in layer:
+                if budget.spent(expanded):
+                    break
+                expanded += 1
+                neighbors = offsets[mask[node]]
+                generated += len(neighbors)
+                for offset in neighbors:
+                    neighbor = node + offset
+                    if distance[neighbor] < 0:
+                        distance[neighbor] = distance[node] + (1 if cost is None else cost[neighbor])
+                        track[neighbor] = node
+                        y, x = divmod(neighbor, width)
+                        h = abs(x - end_x) + abs(y - end_y)
+                        candidates.append((distance[neighbor] + scale * h, neighbor))
+                        if h < closest_h: closest, closest_h = neighbor, h
+                        if hook is not None: hook(graph.cell(neighbor))
+                        if neighbor == end: found = True
+                if found:
+                    break
+            if len(candidates) > peak: peak = len(candidates)
+            if len(candidates) > beam_width:
+                candidates = heapq.nsmallest(beam_width, candidates)
+            layer   = [node for _, node in candidates]
+            pushes += len(layer)
+            layers += 1
+
+        partial     = not found
+        path        = graph.path(track, end if found else closest)
+        self.stats  = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak, 'layers': layers, 'partial': int(partial)}
+        if solution and path: self.visualizer.solution(path)
+        return path
+
+
+    @instrumented
+    def anytime_a_star(self, steps: bool = False, solution: bool = False, weight: float = 3, decrease: float = 0.5, max_expansions: int = None,
+                       time_limit: float = None, start: Tuple[int, int] = None, end: Tuple[int, int] = None, hook=None):
+        """
+        Solve maze with Anytime Repairing A* (ARA*): a weighted A* search (g + weight * h) finds a first path with
+        few expansions, then the weight is lowered by decrease and the search goes on from its open cells, plus the
+        closed cells whose cost improved since (kept aside instead of being expanded again), until the weight is 1
+        and the path is the shortest one, or the budget runs out.
+
+        The last path found is returned with its bound (stats bound): its cost is at most bound times the cost of
+        the shortest path. If the budget runs out before the first path, the path goes to the reached cell closest
+        to the end (stats partial = 1).
+
+        Parameters:
+        - weight: Weight of the first search, decrease: Weight removed after every path.
+        - max_expansions/time_limit: Budget of all the searches together (see Budget).
+        - start/end: (x, y) points of the query, default the maze start/end.
+        - hook: Function called with every (x, y) cell reached.
+
+        Returns: List[Tuple[int, int]] -> Best path from the start to the end found, empty if there is no path.
+        """
+        graph       = self.maze.graph
+        mask        = memoryview(graph.mask)
+        offsets     = graph.offsets
+        width       = graph.width
+        start, end  = self.endpoints(start, end)
+        start       = graph.cell_id(start)
+        end         = graph.cell_id(end)
+        end_x, end_y = graph.cell(end)
+        distances   = graph.array()
+        previous    = graph.array()
+        closed      = graph.array()  # Iteration in which every cell was expanded, no reset between iterations
+        cost        = self.costs()
+        scale       = self.maze.min_cost
+        budget      = Budget(max_expansions, time_limit, self.started)
+        hook        = self.step_hook(steps, hook)
+        distances[start] = 0
+        previous[start]  = start
+        distance    = memoryview(distances)
+        track       = memoryview(previous)
+        done        = memoryview(closed)
+        closest, closest_h = start, abs(graph.cell(start)[0] - end_x) + abs(graph.cell(start)[1] - end_y)
+        heap        = [(weight * scale * closest_h, 0, start)]  # (g + weight * h, g when pushed, cell)
+        inconsistent = set()  # Closed cells whose cost improved in this iteration
+        bound       = None
+        expanded    = generated = iterations = 0
+        pushes      = peak = 1
+
+        def h(node):
+            y, x = divmod(node, width)
+            return abs(x - end_x) + abs(y - end_y)
+
+        while True:
+            # Weighted A* until no open cell can improve the path to the end
+            while heap:
+                key, pushed, node = heap[0]
+                if pushed != distance[node] or done[node] == iterations:
+                    heapq.heappop(heap)  # Stale entry
+                    continue
+                if 0 <= distance[end] <= key or budget.spent(expanded):
+                    break
+                heapq.heappop(heap)
+                done[node] = iterations
+                expanded += 1
+                neighbors = offsets[mask[node]]
+                generated += len(neighbors)
+                for offset in neighbors:
+                    neighbor = node + offset
+                    new_distance = distance[node] + (1 if cost is None else cost[neighbor])
+                    if distance[neighbor] < 0 or new_distance < distance[neighbor]:
+                        if hook is not None and distance[neighbor] < 0: hook(graph.cell(neighbor))
+                        distance[neighbor] = new_distance
+                        track[neighbor] = node
+                        if done[neighbor] == iterations:
+                            inconsistent.add(neighbor)
+                            continue
+                        estimate = h(neighbor)
+                        heapq.heappush(heap, (new_distance + weight * scale * estimate, new_distance, neighbor))
+                        pushes += 1
+                        if estimate < closest_h: closest, closest_h = neighbor, estimate
+                if len(heap) > peak: peak = len(heap)
+
+            if budget.exhausted or distance[end] < 0:
+                break
+            # The open and inconsistent cells bound the cost of the shortest path from below
+            frontier = {node for _, pushed, node in heap if pushed == distance[node] and done[node] != iterations} | inconsistent
+            lowest   = min((distance[node] + scale * h(node) for node in frontier), default=distance[end])
+            bound    = min(weight, distance[end] / lowest) if lowest else 1
+            iterations += 1
+            if weight <= 1 or budget.spent(expanded, clock=True):
+                break
+            weight       = max(1, weight - decrease)
+            heap         = [(distance[node] + weight * scale * h(node), distance[node], node) for node in frontier]
+            heapq.heapify(heap)
+            inconsistent = set()
+
+        # The previous cells of the end lead back to the start through cells of lower cost: a path no costlier
+        # than the last one bounded (even if the budget ran out in the middle of an iteration)
+        path        = graph.path(track, end) if distance[end] >= 0 else []
+        partial     = not path and budget.exhausted
+        if partial: path = graph.path(track, closest)
+        self.stats  = {'expanded': expanded, 'generated': generated, 'pushes': pushes, 'peak_frontier': peak,
+                       'iterations': iterations, 'bound': bound, 'partial': int(partial)}
+        if solution and path: self.visualizer.solution(path)
+        return path
         
     
-    
\ No newline at end of file
+    
@@ -8,11 +8,147 @@ Created on Tue Nov 21 11:31:52 2023
 
 from Maze import *
 from typing import Dict, Tuple, Type, List
+from array import array
 
 
 'Libraries to plot mazes, associated graphs and algorithms step by step'
 import matplotlib.pyplot as plt
-import networkx as nx
+from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+
+
+# RGBA colors of the animation buffer
+WALL, OPEN      = np.array((0, 0, 0, 255), dtype=np.uint8), np.array((255, 255, 255, 255), dtype=np.uint8)
+VISITED         = np.array((66, 110, 230, 255), dtype=np.uint8)
+CURRENT         = np.array((200, 40, 200, 255), dtype=np.uint8)
+PATH            = np.array((255, 190, 0, 255), dtype=np.uint8)
+START, END      = np.array((40, 160, 40, 255), dtype=np.uint8), np.array((215, 40, 40, 255), dtype=np.uint8)
+
+
+class MazeAnimation:
+    """
+    Class to animate a search in one figure, updating a single RGBA image in place.
+
+    It is a MazeSolver hook: every call paints one reached cell in the buffer, and every k-th call the
+    image is redrawn with blitting (only the image artist, the rest of the figure is not redrawn).
+    The painted cells are recorded, so the animation can be exported to GIF/MP4 after the search
+    with memory proportional to the cells and not to the frames.
+
+        animation = MazeAnimation(maze, every=20)
+        path = MazeSolver(maze, None).bfs(hook=animation)
+        animation.solution(path)
+        animation.save('bfs.gif')
+
+    Attributes:
+    maze (Maze): The maze searched.
+    start, end (Tuple[int, int]): Endpoints of the search, marked and never painted over (default the maze's).
+    every (int): Frame skipping, the image is redrawn every k cells.
+    show (bool): Draw the frames in a window, False only records them (headless).
+    buffer (np.ndarray): height x width x 4 uint8 image.
+    cells (array): Cell ids in the order they were painted, frames (array) the number of cells of every frame.
+    """
+    def __init__(self, maze: Type['Maze'], every: int = 1, show: bool = True, figsize: Tuple[int, int] = (8, 8),
+                 start: Tuple[int, int] = None, end: Tuple[int, int] = None):
+        self.maze       = maze
+        self.start      = maze.start if start is None else tuple(start)
+        self.end        = maze.end if end is None else tuple(end)
+        self.every      = max(1, every)
+        self.show       = show
+        self.figsize    = figsize
+        self.buffer     = self.background()
+        self.width      = maze.maze.shape[1]
+        self.current    = -1
+        self.cells      = array('i')
+        self.frames     = array('q')
+        self.path       = []
+        self.figure     = None
+        if show:
+            self.figure = plt.figure(figsize=figsize)
+            self.axes   = self.figure.add_axes((0, 0, 1, 1))
+            self.axes.axis('off')
+            self.image  = self.axes.imshow(self.buffer, interpolation='nearest', animated=True)
+            plt.show(block=False)
+            self.figure.canvas.draw()
+            self.axes.draw_artist(self.image)
+            self.figure.canvas.blit(self.axes.bbox)
+
+
+    def background(self) -> np.ndarray:
+        """
+        RGBA image of the maze without any visited cell, with the start and end.
+        """
+        buffer = np.where((np.asarray(self.maze.maze) == 0)[:, :, None], OPEN, WALL)
+        for (x, y), color in ((self.start, START), (self.end, END)):
+            buffer[y, x] = color
+        return buffer
+
+    def paint(self, buffer: np.ndarray, cell: int, color: np.ndarray) -> None:
+        y, x = divmod(cell, self.width)
+        if (x, y) != self.start and (x, y) != self.end:
+            buffer[y, x] = color
+
+
+    def __call__(self, cell: Tuple[int, int]) -> None:
+        if self.current >= 0: self.paint(self.buffer, self.current, VISITED)
+        self.current = cell[1] * self.width + cell[0]
+        self.paint(self.buffer, self.current, CURRENT)
+        self.cells.append(self.current)
+        if len(self.cells) % self.every == 0:
+            self.frame()
+
+    def frame(self) -> None:
+        """
+        Record a frame and redraw the image (blitting).
+        """
+        self.frames.append(len(self.cells))
+        if self.show:
+            self.image.set_data(self.buffer)
+            self.axes.draw_artist(self.image)
+            self.figure.canvas.blit(self.axes.bbox)
+            self.figure.canvas.flush_events()
+
+    def solution(self, path: List[Tuple[int, int]]) -> None:
+        """
+        Paint the path on top of the visited cells as the last frame.
+        """
+        if self.current >= 0: self.paint(self.buffer, self.current, VISITED)
+        self.current = -1
+        self.path = list(path)
+        for x, y in self.path:
+            self.paint(self.buffer, y * self.width + x, PATH)
+        self.frame()
+
+
+    def save(self, filename: str, fps: int = 30, dpi: int = 100) -> None:
+        """
+        Export the recorded frames, to GIF (Pillow) or MP4 (ffmpeg) depending on the extension.
+        The frames are replayed from the recorded cells on a new buffer, off screen.
+        """
+        buffer  = self.background()
+        figure  = plt.figure(figsize=self.figsize)
+        axes    = figure.add_axes((0, 0, 1, 1))
+        axes.axis('off')
+        image   = axes.imshow(buffer, interpolation='nearest')
+        painted = [0, -1]  # Cells painted so far, current cell
+
+        def update(frame):
+            # Paint the cells up to the frame, the last frame also has the path
+            if painted[1] >= 0: self.paint(buffer, painted[1], VISITED)
+            for cell in self.cells[painted[0]:self.frames[frame]]:
+                self.paint(buffer, cell, VISITED)
+            painted[0] = self.frames[frame]
+            painted[1] = self.cells[painted[0] - 1] if painted[0] else -1
+            if painted[1] >= 0: self.paint(buffer, painted[1], CURRENT)
+            if frame == len(self.frames) - 1 and self.path:
+                if painted[1] >= 0: self.paint(buffer, painted[1], VISITED)
+                for x, y in self.path:
+                    self.paint(buffer, y * self.width + x, PATH)
+            image.set_data(buffer)
+            return (image,)
+
+        animation = FuncAnimation(figure, update, frames=len(self.frames), blit=True)
+        animation.save(filename, writer='pillow' if filename.lower().endswith('.gif') else 'ffmpeg', fps=fps, dpi=dpi)
+        plt.close(figure)
 
 
 class MazeVisualizer:
@@ -21,11 +157,16 @@ class MazeVisualizer:
     
     Attributes:
     maze (Maze): The maze to visualize.
+    every (int): Frame skipping of the steps animation, redraw every k steps.
+    animation (MazeAnimation): Animation of the steps of the current search, created by the first step.
 
     """
-    def __init__(self, maze: Type['Maze']):
+    def __init__(self, maze: Type['Maze'], every: int = 1):
         
-        self.maze = maze
+        self.maze       = maze
+        self.every      = every
+        self.animation  = None
+        self.shown      = 0  # Visited cells already in the animation
 
     def visualize(self):
         """
@@ -53,13 +194,17 @@ class MazeVisualizer:
         Returns: Shows the maze solution
         """
 
-        if path:
+        if path and self.animation is not None:
+            # Last frame of the steps animation
+            self.animation.solution(path)
+            self.animation, self.shown = None, 0
+        elif path:
             plt.figure(figsize=(8, 8))
 
             plt.imshow(self.maze.maze, cmap='binary', interpolation='nearest')
 
-            plt.plot(self.maze.start[0], self.maze.start[1], 'go', markersize=10)
-            plt.plot(self.maze.end[0], self.maze.end[1], 'ro', markersize=10)
+            plt.plot(path[0][0], path[0][1], 'go', markersize=10)
+            plt.plot(path[-1][0], path[-1][1], 'ro', markersize=10)
             path_x, path_y = zip(*path)
             plt.plot(path_x, path_y, color='blue', linewidth=2)
             plt.axis('off')
@@ -70,32 +215,97 @@ class MazeVisualizer:
 
     
     
-    def steps(self, current: [Tuple[int, int]], visited: List[Tuple[int, int]]) -> None:
+    def steps(self, current: [Tuple[int, int]], visited: List[Tuple[int, int]], start: Tuple[int, int] = None,
+              end: Tuple[int, int] = None) -> None:
         """
         Draw the steps of the  algorithms using Matplotlib.
+        Only the cells visited since the last call are painted, in the same figure (see MazeAnimation).
         
-        Parameters: visited_nodes (List[Tuple[int, int]])
+        Parameters: visited_nodes (List[Tuple[int, int]]), start and end of the search (default the maze's)
         
         Returns: Shows the steps of the  algorithm
         """
-    
-        plt.figure(figsize=(8, 8))
-        plt.imshow(self.maze.maze, cmap='binary', interpolation='nearest')
-        plt.plot(self.maze.start[0], self.maze.start[1], 'go', markersize=10)
-        plt.plot(self.maze.end[0], self.maze.end[1], 'ro', markersize=10)
-        if visited:
-            for point in visited:
-                plt.plot(point[0], point[1], 'bs', markersize=10)
+        start   = self.maze.start if start is None else tuple(start)
+        end     = self.maze.end if end is None else tuple(end)
+        if self.animation is None or len(visited) < self.shown or (self.animation.start, self.animation.end) != (start, end):
+            self.animation, self.shown = MazeAnimation(self.maze, self.every, start=start, end=end), 0
+        for point in visited[self.shown:]:
+            if point != current: self.animation(point)
         if current:
-            plt.plot(current[0], current[1], 'ms', markersize=10) 
-        plt.axis('off')
-        plt.show()
+            self.animation(current)
+        self.shown = len(visited)
         
         
-    def graph(self):
+    def edges(self, contracted: bool = False, runs: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Positions of the nodes and segments of the edges of the maze graph, the cell (x, y) is the layout.
+
+        Parameters: contracted (bool): Junction graph (maze.contracted_graph) instead of every open cell,
+        a corridor is drawn as a straight segment between its nodes.
+        runs (bool): Merge the straight runs of edges between cells into one segment (fewer segments to draw).
+
+        Returns: (np.ndarray n x 2 node positions, np.ndarray m x 2 x 2 edge segments)
         '''
+        graph = self.maze.graph
+        if contracted:
+            junctions   = self.maze.contracted_graph
+            nodes       = junctions.nodes.astype(np.int64)
+            # Every edge once, from its tail
+            pairs       = np.array([(tail, head) for tail, edges in enumerate(junctions.edges)
+                                    for head, length, edge in edges if junctions.tail[edge] == tail], dtype=np.int64).reshape(-1, 2)
+            sources, targets = nodes[pairs[:, 0]], nodes[pairs[:, 1]]
+        else:
+            nodes       = np.flatnonzero(graph.cells == 0)
+            east        = (graph.mask & EAST) != 0
+            south       = ((graph.mask & SOUTH) != 0).reshape(graph.height, graph.width).T.reshape(-1)
+            if runs:
+                # The last column has no EAST edge and the last row no SOUTH edge, runs never wrap
+                first = lambda edges: np.flatnonzero(edges & ~np.roll(edges, 1))
+                last  = lambda edges: np.flatnonzero(edges & ~np.roll(edges, -1)) + 1
+                east_sources, east_targets = first(east), last(east)
+                south_sources, south_targets = first(south), last(south)
+            else:
+                east_sources = np.flatnonzero(east)
+                east_targets = east_sources + 1
+                south_sources = np.flatnonzero(south)
+                south_targets = south_sources + 1
+            # South edges were found column by column, back to cell ids
+            transpose   = lambda cells: cells % graph.height * graph.width + cells // graph.height
+            sources     = np.concatenate((east_sources, transpose(south_sources)))
+            targets     = np.concatenate((east_targets, transpose(south_targets)))
+        position = lambda cells: np.stack((cells % graph.width, cells // graph.width), axis=-1)
+        return position(nodes), np.stack((position(sources), position(targets)), axis=1)
+
+
+    def graph(self, contracted: bool = False, nodes: bool = None, labels: bool = False, show: bool = True):
+        '''
+        Draw the graph associated with the maze using Matplotlib.
+        The nodes are at their cells and the edges are one LineCollection, large mazes draw in one pass.
+
+        Parameters:
+            contracted (bool): Draw the junction graph instead of every open cell.
+            nodes (bool): Draw the nodes, default only when there are few of them.
+            labels (bool): Write the (x, y) of every node, for small mazes.
+            show (bool): Show the figure, False returns it (e.g. to save it).
+
+        Returns: Shows the graph
         '''
-        nx.draw(nx.Graph(self.maze.associated_graph), nx.spring_layout(nx.Graph(self.maze.associated_graph)), with_labels=True, node_color='blue', font_color='white')
+        positions, segments = self.edges(contracted, runs=True)
+        figure, axes = plt.subplots(figsize=(8, 8))
+        axes.add_collection(LineCollection(segments, colors='blue', linewidths=0.5 if len(segments) > 10000 else 1.5))
+        if nodes or (nodes is None and len(positions) <= 10000):
+            axes.scatter(positions[:, 0], positions[:, 1], s=12, c='blue', zorder=2)
+        if labels:
+            for x, y in positions.tolist():
+                axes.annotate(f"({x}, {y})", (x, y), fontsize=6, ha='center', va='bottom')
+        axes.plot(*self.maze.start, 'go', markersize=10, zorder=3)
+        axes.plot(*self.maze.end, 'ro', markersize=10, zorder=3)
+        axes.set_xlim(-1, self.maze.maze.shape[1])
+        axes.set_ylim(self.maze.maze.shape[0], -1)  # Rows grow downwards, as in the maze images
+        axes.set_aspect('equal')
+        axes.axis('off')
+        if not show:
+            return figure
         plt.show()
 
 
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Outcome of a MazeSolver search with the counters of the work it did.
+"""
+
+from typing import Dict, Tuple, List
+
+
+class SearchResult:
+    """
+    Class to represent the result of a search, returned by the MazeSolver methods called with result=True.
+
+    Attributes:
+    algorithm (str): Name of the MazeSolver method.
+    path (List[Tuple[int, int]]): (x, y) cells from the start to the end, empty if there is no path.
+    length (int): Moves of the path (len(path) - 1), -1 if there is no path.
+    expanded (int): Nodes taken out of the frontier and expanded.
+    generated (int): Neighbors looked at by the expansions.
+    pushes (int): Insertions in the frontier (queue, stack or heap), the start included.
+    peak_frontier (int): Largest size of the frontier.
+    wall_time (float): Seconds spent in the search.
+    extra (Dict[str, int]): Other counters of the algorithm (e.g. clusters_rebuilt of hierarchical).
+    """
+    __slots__ = ('algorithm', 'path', 'length', 'expanded', 'generated', 'pushes', 'peak_frontier', 'wall_time', 'extra')
+    COUNTERS  = ('expanded', 'generated', 'pushes', 'peak_frontier')
+
+    def __init__(self, algorithm: str, path: List[Tuple[int, int]], stats: Dict[str, int], wall_time: float):
+        self.algorithm      = algorithm
+        self.path           = path
+        self.length         = len(path) - 1
+        self.wall_time      = wall_time
+        for counter in self.COUNTERS:
+            setattr(self, counter, stats.get(counter, 0))
+        self.extra          = {key: value for key, value in stats.items() if key not in self.COUNTERS}
+
+    def __bool__(self) -> bool:
+        return bool(self.path)
+
+    def __repr__(self) -> str:
+        return (f"SearchResult({self.algorithm}, length={self.length}, expanded={self.expanded}, generated={self.generated}, "
+                f"pushes={self.pushes}, peak_frontier={self.peak_frontier}, wall_time={self.wall_time:.6f})")
+
+    def to_dict(self, path: bool = False) -> Dict:
+        """
+        Counters as a dict (JSON friendly), with the path only if path is True.
+        """
+        result = {'algorithm': self.algorithm, 'length': self.length, 'wall_time': self.wall_time}
+        result.update((counter, getattr(self, counter)) for counter in self.COUNTERS)
+        result.update(self.extra)
+        if path: result['path'] = [list(cell) for cell in self.path]
+        return result
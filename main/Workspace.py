@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-cell arrays of the searches of a maze, allocated once and reused from one query to the next.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+class Workspace:
+    """
+    Class to hold the int32 previous and distances arrays of the searches (bfs, dfs, dijkstra, a_star,
+    greedy_best_first_search) and the buffer their paths are rebuilt in.
+
+    Resetting the arrays between queries costs O(cells), a lot for short queries on a large maze. Instead,
+    every search gets a new generation number (begin) and a cell's previous and distance only count if its
+    stamp is the current generation: a cell is reached when its stamp is set. The stamps are cleared only
+    when the generation wraps around int32.
+
+    A workspace is used by one search at a time (one per maze, see Maze.workspace, and per thread).
+
+    Attributes:
+    size (int): Cells of the maze.
+    stamps (np.ndarray): int32 generation of the search that last reached every cell.
+    previous (np.ndarray): int32 cell that led to every cell, the start is its own previous.
+    distances (np.ndarray): int32 cost from the start of every cell.
+    cells (np.ndarray): int32 buffer of the cell ids of a path.
+    generation (int): Generation of the current search.
+    searches (int): Searches that used the workspace.
+    """
+    WRAP = 2**31 - 1
+
+    def __init__(self, size: int):
+        self.size       = size
+        self.stamps     = np.zeros(size, dtype=np.int32)
+        self.previous   = np.zeros(size, dtype=np.int32)
+        self.distances  = np.zeros(size, dtype=np.int32)
+        self.cells      = np.zeros(size, dtype=np.int32)
+        self.stamp      = memoryview(self.stamps)
+        self.track      = memoryview(self.previous)
+        self.distance   = memoryview(self.distances)
+        self.buffer     = memoryview(self.cells)
+        self.generation = 0
+        self.searches   = 0
+
+    def begin(self) -> int:
+        """
+        Start a search: every cell is unreached again, in O(1).
+
+        Returns: int -> generation of the search, the stamp of the cells it reaches
+        """
+        self.generation += 1
+        self.searches   += 1
+        if self.generation == self.WRAP:
+            self.stamps.fill(0)
+            self.generation = 1
+        return self.generation
+
+    def path(self, node: int, width: int) -> List[Tuple[int, int]]:
+        """
+        Rebuild the path that ends at node following previous, in the reused buffer (from node back to the
+        start, the (x, y) cells are then made in one pass from the start).
+
+        Returns: List[Tuple[int, int]] from the start of the search to node
+        """
+        buffer, track   = self.buffer, self.track
+        count           = 0
+        while True:
+            buffer[count] = node
+            count += 1
+            if track[node] == node:
+                break
+            node = track[node]
+        y, x = np.divmod(self.cells[count - 1::-1], width)
+        return list(zip(x.tolist(), y.tolist()))
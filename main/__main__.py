@@ -8,47 +8,366 @@ Created on Tue Nov 21 11:36:27 2023
 
 from Maze import *
 from MazeSolver import *
-from MazeVisualizer import *
-import seaborn as sns
-from tqdm import tqdm
-import pandas as pd
+from DStarLite import *
+import Benchmark
+import CommandLine
+import sys
 import time
+import tracemalloc
+import random
 
 
-#  Show benchamark plot of time execution of Algorithms
-def benchmark_algorithms():
-    sizes       = range(5,111, 2)
-    algorithms = [MazeSolver.bfs, MazeSolver.dfs, MazeSolver.dijkstra, MazeSolver.a_star, MazeSolver.bidirectional,MazeSolver.random, MazeSolver.greedy_best_first_search]
-    times       = {alg.__name__: [] for alg in algorithms}
-    sns.set(style="dark", palette="pastel")
+#  Time every algorithm on the same seeded mazes (see Benchmark.py for the options, JSON/CSV output and baseline comparison)
+def benchmark_algorithms(sizes = (51, 101, 201, 501), seeds = (0, 1, 2), workers = 4, output = None):
+    rows = Benchmark.run_suite(sizes, seeds=seeds, workers=workers)
+    print(Benchmark.table(rows))
+    if output: Benchmark.write(rows, output)
+    return rows
+
+
+
+#  Compare bfs against the NumPy wavefront on open and backtrack mazes: about 3x on a 1001 empty maze, not the order of
+#  magnitude aimed at (the NumPy calls of every level bound it), and little on the narrow frontiers of backtrack mazes
+def benchmark_wavefront():
+    mazes = [('empty', Maze.empty_maze, (101, 201, 501, 1001)), ('backtrack', Maze.backtrack_generator, (101, 201))]
+    print(f"{'maze':<10}{'size':>6}{'bfs (s)':>12}{'wavefront (s)':>16}{'speedup':>10}  same path")
+    for name, generator, sizes in mazes:
+        for size in sizes:
+            maze       = generator(size, size)
+            solver     = MazeSolver(maze, None)
+            start_time = time.perf_counter()
+            bfs_path   = solver.bfs()
+            bfs_time   = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            wave_path  = solver.wavefront()
+            wave_time  = time.perf_counter() - start_time
+            print(f"{name:<10}{size:>6}{bfs_time:>12.4f}{wave_time:>16.4f}{bfs_time / wave_time:>9.1f}x  {bfs_path == wave_path}")
+
+
+
+#  Generation time and peak memory of every maze generator
+def benchmark_generators(sizes = (501, 1001, 2001), seed = 0):
+    generators = [Maze.backtrack_generator, Maze.kruskal_generator, Maze.wilson_generator]
+    print(f"{'generator':<22}{'size':>6}{'time (s)':>12}{'peak memory (MB)':>20}")
+    for generator in generators:
+        for size in sizes:
+            start_time = time.perf_counter()
+            generator(size, size, seed)
+            total_time = time.perf_counter() - start_time
 
-    for size in tqdm(sizes, desc="Testing", unit="size"):
+            tracemalloc.start() # Traced separately, tracing slows the generator down
+            generator(size, size, seed)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{generator.__name__:<22}{size:>6}{total_time:>12.3f}{peak / 2**20:>20.1f}")
+
+
+
+#  Node reduction and speedup of the contracted graph
+def benchmark_contraction(sizes = (201, 501, 1001), seed = 0):
+    algorithms = [MazeSolver.dijkstra, MazeSolver.a_star, MazeSolver.bidirectional]
+    print(f"{'size':>6}{'cells':>10}{'nodes':>9}{'build (s)':>11}  {'algorithm':<15}{'cells (s)':>11}{'contracted (s)':>16}{'speedup':>9}")
+    for size in sizes:
+        maze       = Maze.backtrack_generator(size, size, seed)
+        start_time = time.perf_counter()
+        junctions  = maze.contracted_graph
+        build_time = time.perf_counter() - start_time
+        cells      = int((maze.maze == 0).sum())
+        solver     = MazeSolver(maze, None)
         for algorithm in algorithms:
-            def time_execution(algorithm, size):
-                maze       = Maze.backtrack_generator(size, size)
-                solver     = MazeSolver(maze, MazeVisualizer(maze))
-                start_time = time.perf_counter()
-                algorithm(solver, False, False)
-                return time.perf_counter() - start_time
-            total_time = sum(time_execution(algorithm, size) for _ in range(10)) / 10
-            times[algorithm.__name__].append(total_time)
+            start_time      = time.perf_counter()
+            algorithm(solver)
+            cells_time      = time.perf_counter() - start_time
+            start_time      = time.perf_counter()
+            algorithm(solver, contracted=True)
+            contracted_time = time.perf_counter() - start_time
+            print(f"{size:>6}{cells:>10}{len(junctions):>9}{build_time:>11.3f}  {algorithm.__name__:<15}{cells_time:>11.4f}{contracted_time:>16.4f}{cells_time / contracted_time:>8.1f}x")
+
+
+
+#  Queries per second of MazeSolver.solve_many against the number of worker processes
+def benchmark_batch(size = 301, queries = 1000, algorithm = 'a_star', workers = (0, 1, 2, 4, 8), seed = 0):
+    maze        = Maze.backtrack_generator(size, size, seed)
+    solver      = MazeSolver(maze, None)
+    rng         = np.random.default_rng(seed)
+    cells       = np.argwhere(maze.maze == 0)[:, ::-1].tolist()
+    pairs       = [(tuple(cells[a]), tuple(cells[b])) for a, b in rng.integers(len(cells), size=(queries, 2))]
+    print(f"{'workers':>8}{'queries/s':>12}")
+    for count in workers:
+        start_time = time.perf_counter()
+        for result in solver.solve_many(pairs, algorithm, workers=count):
+            pass
+        print(f"{count:>8}{queries / (time.perf_counter() - start_time):>12.1f}")
+
+
+
+#  Heap operations and time of A* against Jump Point Search on open and corridor mazes
+def benchmark_jump_points(sizes = (101, 301, 1001), seed = 0):
+    print(f"{'maze':<10}{'size':>6}{'a_star pushes':>15}{'jps pushes':>12}{'saved':>8}{'a_star (s)':>12}{'jps (s)':>10}")
+    for name, generator in [('empty', Maze.empty_maze), ('backtrack', lambda height, width: Maze.backtrack_generator(height, width, seed))]:
+        for size in sizes:
+            solver      = MazeSolver(generator(size, size), None)
+            a_star      = solver.a_star(result=True)
+            jps         = solver.jump_point_search(result=True)
+            print(f"{name:<10}{size:>6}{a_star.pushes:>15}{jps.pushes:>12}{1 - jps.pushes / a_star.pushes:>8.1%}{a_star.wall_time:>12.4f}{jps.wall_time:>10.4f}")
+
+
+
+def obstacle_grid(size, density = 0.2, seed = 0):
+    # Open grid with random obstacles, start and end kept open
+    maze = Maze.empty_maze(size, size)
+    maze.maze[1:-1, 1:-1] = np.random.default_rng(seed).random((size - 2, size - 2)) < density
+    maze.maze[maze.start[1], maze.start[0]] = maze.maze[maze.end[1], maze.end[0]] = 0
+    maze.grid_changed()
+    return maze
+
+
+def benchmark_replanning(size = 301, changes = (1, 10, 100, 1000), density = 0.2, seed = 0):
+    # Cells toggled at random after the first plan
+    print(f"{'changed':>8}{'replan (s)':>12}{'expanded':>10}{'a_star (s)':>12}{'speedup':>9}")
+    rng = random.Random(seed)
+    for count in changes:
+        maze    = obstacle_grid(size, density, seed)
+        planner = DStarLite(maze)
+        planner.plan()
+        for change in range(count):
+            x, y = rng.randrange(1, size - 1), rng.randrange(1, size - 1)
+            if (x, y) not in (maze.start, maze.end):
+                maze.set_cell((x, y), 1 - int(maze.maze[y, x]))
+        start_time  = time.perf_counter()
+        path        = planner.plan()
+        replan_time = time.perf_counter() - start_time
+        start_time  = time.perf_counter()
+        assert len(MazeSolver(maze, None).a_star()) == len(path)
+        a_star_time = time.perf_counter() - start_time
+        print(f"{count:>8}{replan_time:>12.4f}{planner.expanded:>10}{a_star_time:>12.4f}{a_star_time / replan_time:>9.1f}")
+        planner.close()
+
+
+
+def benchmark_hierarchical(sizes = (501, 1001, 2001), queries = 20, cluster_size = 32, seed = 0):
+    print(f"{'maze':<10}{'size':>6}{'build (s)':>11}{'a_star (ms)':>13}{'hpa* (ms)':>11}{'speedup':>9}{'length':>8}{'rebuild (ms)':>14}")
+    rng = random.Random(seed)
+    for name, generator in [('obstacles', lambda size: obstacle_grid(size, seed=seed)), ('backtrack', lambda size: Maze.backtrack_generator(size, size, seed))]:
+        for size in sizes:
+            maze        = generator(size)
+            solver      = MazeSolver(maze, None)
+            opened      = np.flatnonzero(maze.maze.reshape(-1) == 0)
+            start_time  = time.perf_counter()
+            hierarchy   = maze.hierarchy_for(cluster_size)
+            build_time  = time.perf_counter() - start_time
+
+            a_star_times, hpa_times, ratios = [], [], []
+            while len(ratios) < queries:
+                start, end  = [maze.graph.cell(int(opened[rng.randrange(opened.size)])) for point in range(2)]
+                start_time  = time.perf_counter()
+                shortest    = solver.a_star(start=start, end=end)
+                a_star_time = time.perf_counter() - start_time
+                if not shortest:
+                    continue
+                start_time  = time.perf_counter()
+                path        = solver.hierarchical(cluster_size=cluster_size, start=start, end=end)
+                hpa_times.append(time.perf_counter() - start_time)
+                a_star_times.append(a_star_time)
+                ratios.append(len(path) / len(shortest))
+
+            # Open a wall: only its cluster, and the neighbors whose entrances moved, are rebuilt
+            x, y = 0, 0
+            while maze.maze[y, x] == 0 or x in (0, size - 1) or y in (0, size - 1):
+                x, y = rng.randrange(1, size - 1), rng.randrange(1, size - 1)
+            maze.set_cell((x, y), 0)
+            start_time  = time.perf_counter()
+            hierarchy.refresh()
+            rebuild_time = time.perf_counter() - start_time
+            a_star_time, hpa_time = np.median(a_star_times), np.median(hpa_times)
+            print(f"{name:<10}{size:>6}{build_time:>11.2f}{a_star_time * 1e3:>13.1f}{hpa_time * 1e3:>11.1f}{a_star_time / hpa_time:>9.1f}"
+                  f"{np.mean(ratios):>8.3f}{rebuild_time * 1e3:>14.2f}")
 
-    df              = pd.DataFrame(times)
-    df["Maze Size"] = sizes
 
-    plt.figure(figsize=(12, 8))
-    sns.lineplot(data=df.melt(id_vars="Maze Size"), x="Maze Size", y="value", hue="variable")
 
-    plt.xlabel('Maze Size', fontsize=14)
-    plt.ylabel('Average Time (s)', fontsize=14)
-    plt.title('Average Execution Time vs Maze Size', fontsize=16)
-    plt.legend(title="Algorithm", title_fontsize='13', fontsize='12')
-    plt.show()
+#  Expansions of A* against the bi-directional searches (bfs and A*) on the same random queries
+def benchmark_bidirectional(sizes = (501, 1001, 2001), queries = 5, seed = 0):
+    print(f"{'maze':<10}{'size':>6}{'a_star':>11}{'bidir bfs':>11}{'bidir a*':>11}{'saved':>8}{'a_star (s)':>12}{'bidir bfs (s)':>15}{'bidir a* (s)':>14}")
+    rng = random.Random(seed)
+    for name, generator in [('backtrack', lambda size: Maze.backtrack_generator(size, size, seed)), ('obstacles', lambda size: obstacle_grid(size, seed=seed))]:
+        for size in sizes:
+            maze        = generator(size)
+            solver      = MazeSolver(maze, None)
+            opened      = np.flatnonzero(maze.maze.reshape(-1) == 0)
+            totals      = np.zeros((3, 2))  # Expanded and seconds of every search
+            solved      = 0
+            while solved < queries:
+                start, end  = [maze.graph.cell(int(opened[rng.randrange(opened.size)])) for point in range(2)]
+                results     = [solver.a_star(start=start, end=end, result=True), solver.bidirectional(start=start, end=end, result=True),
+                               solver.bidirectional(start=start, end=end, heuristic=True, result=True)]
+                if not results[0]:
+                    continue
+                assert len({result.length for result in results}) == 1
+                totals     += [(result.expanded, result.wall_time) for result in results]
+                solved     += 1
+            (a_star, bfs, bidirectional), times = totals[:, 0].astype(int), totals[:, 1]
+            print(f"{name:<10}{size:>6}{a_star:>11}{bfs:>11}{bidirectional:>11}{1 - bidirectional / a_star:>8.1%}{times[0]:>12.3f}{times[1]:>15.3f}{times[2]:>14.3f}")
+
+
+
+#  Heap Dijkstra against the bucket queue (Dial) and weighted A* on random terrain costs 1..highest
+def benchmark_costs(size = 1001, highest = (1, 4, 16, 64, 255), seed = 0):
+    print(f"{'maze':<10}{'costs':>8}{'dijkstra (s)':>14}{'dial (s)':>10}{'speedup':>9}{'a_star (s)':>12}{'expanded d/a*':>16}{'cost':>9}")
+    for name, maze in [('terrain', Maze.empty_maze(size, size)), ('backtrack', Maze.backtrack_generator(size, size, seed))]:
+        solver = MazeSolver(maze, None)
+        for high in highest:
+            maze.set_costs(np.random.default_rng(seed).integers(1, high + 1, maze.maze.shape))
+            dijkstra    = solver.dijkstra(result=True)
+            dial        = solver.dial(result=True)
+            a_star      = solver.a_star(result=True)
+            assert maze.path_cost(dijkstra.path) == maze.path_cost(dial.path) == maze.path_cost(a_star.path)
+            print(f"{name:<10}{'1..' + str(high):>8}{dijkstra.wall_time:>14.3f}{dial.wall_time:>10.3f}{dijkstra.wall_time / dial.wall_time:>9.2f}"
+                  f"{a_star.wall_time:>12.3f}{f'{dijkstra.expanded}/{a_star.expanded}':>16}{maze.path_cost(dial.path):>9}")
+        maze.set_costs(None)
+
+
+
+#  Labeling time, unreachable queries with and without the components check, and incremental updates
+def benchmark_components(sizes = (501, 1001, 2001), toggles = 1000, density = 0.4, seed = 0):
+    print(f"{'size':>6}{'components':>12}{'label (s)':>11}{'unreachable a_star (s)':>24}{'checked (s)':>13}{'update (ms)':>13}{'relabeled':>11}")
+    rng = random.Random(seed)
+    for size in sizes:
+        maze        = obstacle_grid(size, density, seed)
+        solver      = MazeSolver(maze, None)
+        start_time  = time.perf_counter()
+        components  = maze.components
+        label_time  = time.perf_counter() - start_time
+
+        # Start in the largest component, end in another one
+        largest     = max(components.sizes, key=components.sizes.get)
+        start       = maze.graph.cell(int(np.flatnonzero(components.labels == largest)[0]))
+        end         = maze.graph.cell(int(np.flatnonzero((components.labels >= 0) & (components.labels != largest))[-1]))
+        start_time  = time.perf_counter()
+        assert MazeSolver.a_star.__wrapped__(solver, start=start, end=end) == []  # The search without the check
+        search_time = time.perf_counter() - start_time
+        checked     = solver.a_star(start=start, end=end, result=True).wall_time
+
+        start_time  = time.perf_counter()
+        for toggle in range(toggles):
+            x, y = rng.randrange(1, size - 1), rng.randrange(1, size - 1)
+            maze.set_cell((x, y), 1 - int(maze.maze[y, x]))
+        update_time = (time.perf_counter() - start_time) / toggles
+        print(f"{size:>6}{len(components):>12}{label_time:>11.3f}{search_time:>24.4f}{checked:>13.6f}{update_time * 1e3:>13.3f}{components.relabeled:>11}")
+
+
+
+#  Dead-end filling: fraction of open cells filled, search time and end-to-end time (graph, labels and search of a fresh maze)
+def benchmark_dead_ends(sizes = (501, 1001, 2001), algorithms = ('bfs', 'dfs', 'a_star'), seed = 0):
+    print(f"{'maze':<10}{'size':>6}{'fill (s)':>10}{'pruned':>8}{'algorithm':>10}{'search (s)':>12}{'pruned (s)':>12}{'end to end (s)':>16}{'pruned (s)':>12}{'speedup':>9}")
+    for name, generator in [('backtrack', Maze.backtrack_generator), ('kruskal', Maze.kruskal_generator)]:
+        for size in sizes:
+            for algorithm in algorithms:
+                maze        = generator(size, size, seed)
+                start_time  = time.perf_counter()
+                first       = getattr(MazeSolver(maze, None), algorithm)()
+                end_to_end  = time.perf_counter() - start_time
+                search      = getattr(MazeSolver(maze, None), algorithm)(result=True).wall_time
+
+                maze        = generator(size, size, seed)
+                start_time  = time.perf_counter()
+                pruned      = maze.pruned
+                fill_time   = time.perf_counter() - start_time
+                path        = getattr(MazeSolver(pruned, None), algorithm)()
+                pruned_end_to_end = time.perf_counter() - start_time
+                assert len(path) == len(first)
+                pruned_search = getattr(MazeSolver(pruned, None), algorithm)(result=True).wall_time
+                fraction    = 1 - np.count_nonzero(pruned.maze == 0) / np.count_nonzero(maze.maze == 0)
+                print(f"{name:<10}{size:>6}{fill_time:>10.3f}{fraction:>8.1%}{algorithm:>10}{search:>12.4f}{pruned_search:>12.4f}"
+                      f"{end_to_end:>16.3f}{pruned_end_to_end:>12.3f}{end_to_end / pruned_end_to_end:>9.2f}")
+
+
+
+#  Constant memory walks on a memory-mapped maze: first query of a fresh load (graph and components included),
+#  the peak traced memory in one more query (tracing slows it down)
+def benchmark_constant_memory(sizes = (501, 1001, 2001), algorithms = ('bfs', 'dfs', 'a_star', 'wall_follower', 'tremaux', 'pledge'), seed = 0):
+    import os, tempfile
+    print(f"{'size':>6}{'algorithm':>15}{'time (s)':>10}{'peak (MB)':>11}{'path':>8}{'moves':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            name = os.path.join(directory, f"{size}.maze")
+            Maze.backtrack_generator(size, size, seed).save(name, MazeFile.BYTES)
+            for algorithm in algorithms:
+                result      = getattr(MazeSolver(Maze.load(name), None), algorithm)(result=True)
+                solve       = getattr(MazeSolver(Maze.load(name), None), algorithm)
+                tracemalloc.start()
+                solve()
+                peak        = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{size:>6}{algorithm:>15}{result.wall_time:>10.3f}{peak / 2**20:>11.2f}{len(result.path):>8}{result.expanded:>10}")
+
+
+
+#  Budget-bounded searches: length (and bound) of the path returned within an expansion or time budget
+def benchmark_budget(size = 1001, time_limits = (0.01, 0.05, 0.2, None), density = 0.2, seed = 2):  # Seed 2: the obstacle grid has a path
+    searches = [('a_star', {}), ('a_star', {'weight': 1.5}), ('a_star', {'weight': 3}), ('greedy_best_first_search', {}),
+                ('beam_search', {'beam_width': 16}), ('beam_search', {'beam_width': 256}), ('anytime_a_star', {})]
+    print(f"{'maze':<10}{'algorithm':>26}{'options':>20}{'limit (s)':>10}{'time (s)':>10}{'expanded':>10}{'length':>8}{'partial':>8}{'bound':>7}")
+    for name, maze in [('backtrack', Maze.backtrack_generator(size, size, seed)), ('obstacles', obstacle_grid(size, density, seed))]:
+        solver = MazeSolver(maze, None)
+        for algorithm, options in searches:
+            for time_limit in time_limits:
+                result  = getattr(solver, algorithm)(time_limit=time_limit, result=True, **options)
+                bound   = result.extra.get('bound')
+                print(f"{name:<10}{algorithm:>26}{str(options or ''):>20}{str(time_limit):>10}{result.wall_time:>10.3f}{result.expanded:>10}"
+                      f"{result.length:>8}{result.extra.get('partial', 0):>8}{'' if bound is None else f'{bound:.2f}':>7}")
+
+
+
+def allocated_blocks(solve, pairs):
+    # Memory blocks every query allocated and still holds when it reaches its first cell (its arrays, queue and
+    # path buffer are made by then): traced allocations between a snapshot before the query and one from its hook
+    ignore  = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    counts  = []
+    tracemalloc.start()
+    for start, end in pairs:
+        before  = tracemalloc.take_snapshot().filter_traces(ignore)
+        during  = []
+        solve(start=start, end=end, hook=lambda cell: during or during.append(tracemalloc.take_snapshot().filter_traces(ignore)))
+        counts.append(sum(stat.count_diff for stat in during[0].compare_to(before, 'filename') if stat.count_diff > 0) if during else 0)
+    tracemalloc.stop()
+    return counts
+
+
+#  Short queries with and without the reused workspace: latency percentiles, allocated blocks and peak traced bytes of a query
+def benchmark_workspace(size = 1001, queries = 2000, radius = 10, algorithms = ('bfs', 'dijkstra', 'a_star'), density = 0.2, seed = 2):
+    maze    = obstacle_grid(size, density, seed)
+    rng     = random.Random(seed)
+    pairs   = []
+    while len(pairs) < queries:
+        x, y    = rng.randrange(1, size - 1), rng.randrange(1, size - 1)
+        end     = (min(size - 2, max(1, x + rng.randint(-radius, radius))), min(size - 2, max(1, y + rng.randint(-radius, radius))))
+        if maze.connected((x, y), end):
+            pairs.append(((x, y), end))
+
+    print(f"{'algorithm':>10}{'workspace':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'blocks':>8}{'max (ms)':>10}{'peak (KB)':>11}")
+    for algorithm in algorithms:
+        for workspace in (False, None):
+            solve   = getattr(MazeSolver(maze, None, workspace=workspace), algorithm)
+            solve(start=pairs[0][0], end=pairs[0][1])
+            tracemalloc.start()
+            solve(start=pairs[0][0], end=pairs[0][1])
+            peak    = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            times   = []
+            for start, end in pairs:
+                start_time = time.perf_counter()
+                solve(start=start, end=end)
+                times.append(time.perf_counter() - start_time)
+            p50, p99 = np.percentile(times, (50, 99)) * 1000
+            blocks  = np.mean(allocated_blocks(solve, pairs[:100]))
+            print(f"{algorithm:>10}{'reused' if workspace is None else 'new':>10}{p50:>10.3f}{p99:>10.3f}{blocks:>8.1f}{max(times) * 1000:>10.3f}"
+                  f"{peak / 1024:>11.1f}")
 
 
 
 # Show all Algorithms step by step
 def show_algorithms():
+    from MazeVisualizer import MazeVisualizer
     maze = Maze.backtrack_generator(41,41)
     algorithms = [MazeSolver.bfs, MazeSolver.dfs, MazeSolver.dijkstra, MazeSolver.a_star, MazeSolver.bidirectional,MazeSolver.random, MazeSolver.greedy_best_first_search]
     for algorithm in algorithms:
@@ -76,6 +395,7 @@ def solver():
         mazeSolver(maze, visualizer(maze)).algorithm(steps: bool, solution:bool)
 
     '''
+    from MazeVisualizer import MazeVisualizer
 
     maze = Maze.empty_maze(21,21)
     MazeVisualizer(maze).visualize()
@@ -88,6 +408,9 @@ def solver():
 
 
 if __name__ == '__main__':
+    # Subcommands (generate, solve, bench) run headless, without arguments the interactive demos
+    if len(sys.argv) > 1:
+        sys.exit(CommandLine.main())
     solver()
     show_algorithms()
 
@@ -0,0 +1,142 @@
+"""
+Mazes and path checks shared by the tests. The modules of main/ import each other by name, so main/ is
+put on the path the way `python main` runs them.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main'))
+
+import numpy as np
+import pytest
+
+from DistanceField import DistanceFieldCache
+from Maze import Maze
+from MazeSolver import MazeSolver
+
+
+SIZE = 31
+
+
+def obstacle_grid(size: int = SIZE, density: float = 0.3, seed: int = 0) -> Maze:
+    """
+    Open grid with random obstacles: loops, several shortest paths and cells cut off from the start.
+    """
+    maze = Maze.empty_maze(size, size)
+    maze.maze[1:-1, 1:-1] = np.random.default_rng(seed).random((size - 2, size - 2)) < density
+    maze.maze[maze.start[1], maze.start[0]] = maze.maze[maze.end[1], maze.end[0]] = 0
+    maze.grid_changed()
+    return maze
+
+
+MAZES = {
+    'backtrack':    lambda seed: Maze.backtrack_generator(SIZE, SIZE, seed),
+    'kruskal':      lambda seed: Maze.kruskal_generator(SIZE, SIZE, seed),
+    'wilson':       lambda seed: Maze.wilson_generator(SIZE, SIZE, seed),
+    'eller':        lambda seed: Maze.eller_generator(SIZE, SIZE, seed),
+    'empty':        lambda seed: Maze.empty_maze(SIZE, SIZE),
+    'obstacles':    lambda seed: obstacle_grid(SIZE, 0.3, seed),
+}
+
+PERFECT = ('backtrack', 'kruskal', 'wilson', 'eller')
+
+
+def open_cells(maze: Maze):
+    return [(x, y) for y, x in np.argwhere(maze.maze == 0).tolist()]
+
+
+def queries(maze: Maze, count: int = 40, seed: int = 0):
+    """
+    Random (start, end) pairs of open cells, with start == end pairs and the maze start and end.
+    """
+    rng     = random.Random(seed)
+    cells   = open_cells(maze)
+    pairs   = [(maze.start, maze.end), (maze.start, maze.start)]
+    for index in range(count):
+        start = rng.choice(cells)
+        pairs.append((start, start if index % 8 == 0 else rng.choice(cells)))
+    return pairs
+
+
+def assert_path(maze: Maze, path, start, end=None) -> None:
+    """
+    The path goes from start (to end, if given) through open cells, one move at a time.
+    """
+    assert path, f"no path from {start}"
+    assert tuple(path[0]) == tuple(start)
+    if end is not None:
+        assert tuple(path[-1]) == tuple(end)
+    for x, y in path:
+        assert maze.maze[y, x] == 0, f"{(x, y)} is a wall"
+    for (x, y), (next_x, next_y) in zip(path, path[1:]):
+        assert abs(next_x - x) + abs(next_y - y) == 1, f"{(x, y)} -> {(next_x, next_y)} is not a move"
+
+
+def solver_for(maze: Maze):
+    """
+    Solver with its own distance field cache, the fields of one test do not answer the queries of another.
+    """
+    return MazeSolver(maze, None, cache=DistanceFieldCache())
+
+
+def assert_shortest(maze: Maze, method: str, count: int = 40, **options) -> None:
+    """
+    The solver method returns a path as long as the bfs one on every query ([start] when start == end), and no
+    path when bfs finds none.
+    """
+    solver = solver_for(maze)
+    for start, end in queries(maze, count):
+        expected    = solver.bfs(start=start, end=end)
+        path        = getattr(solver, method)(start=start, end=end, **options)
+        if not expected:
+            assert path == [], f"{method} found a path from {start} to {end}, bfs did not"
+            continue
+        assert_path(maze, path, start, end)
+        assert len(path) == len(expected), f"{method} from {start} to {end}"
+
+
+def assert_any_path(maze: Maze, method: str, count: int = 40, **options) -> None:
+    """
+    The solver method returns a path, not shorter than the bfs one, when there is one and no path otherwise.
+    """
+    solver = solver_for(maze)
+    for start, end in queries(maze, count):
+        expected    = solver.bfs(start=start, end=end)
+        path        = getattr(solver, method)(start=start, end=end, **options)
+        if not expected:
+            assert path == [], f"{method} found a path from {start} to {end}, bfs did not"
+            continue
+        assert_path(maze, path, start, end)
+        assert len(path) >= len(expected)
+
+
+@pytest.fixture(params=sorted(MAZES))
+def maze(request):
+    return MAZES[request.param](1)
+
+
+def toggles(maze: Maze, count: int, seed: int):
+    """
+    Inner cells other than the start and the end, to open or close.
+    """
+    rng     = random.Random(seed)
+    cells   = []
+    while len(cells) < count:
+        cell = (rng.randrange(1, maze.maze_width - 1), rng.randrange(1, maze.maze_height - 1))
+        if cell not in (maze.start, maze.end):
+            cells.append(cell)
+    return cells
+
+
+def toggle(maze: Maze, cell) -> None:
+    x, y = cell
+    maze.set_cell(cell, 1 - int(maze.maze[y, x]))
+
+
+def rebuilt(maze: Maze) -> Maze:
+    """
+    The same grid in a new Maze: its graph and other structures are built from scratch.
+    """
+    return Maze(maze.maze.copy(), maze.maze_height, maze.maze_width)
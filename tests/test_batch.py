@@ -0,0 +1,19 @@
+"""
+MazeSolver.solve_many: the same answers with worker processes as in this process, in the order of the queries.
+"""
+
+import pytest
+
+from conftest import MAZES, queries
+from MazeSolver import MazeSolver
+
+
+@pytest.mark.parametrize('algorithm, options', [('bfs', {}), ('a_star', {}), ('dijkstra', {'contracted': True})])
+def test_workers_match_serial(algorithm, options):
+    maze    = MAZES['obstacles'](6)
+    solver  = MazeSolver(maze, None)
+    pairs   = queries(maze, count=30)
+    serial  = list(solver.solve_many(pairs, algorithm, **options))
+    pooled  = list(solver.solve_many(iter(pairs), algorithm, workers=2, chunksize=4, **options))
+    assert [(start, end) for start, end, path in pooled] == pairs
+    assert [len(path) for start, end, path in pooled] == [len(path) for start, end, path in serial]
@@ -0,0 +1,23 @@
+"""
+Bidirectional BFS and A* against bfs: they stop at a shortest path.
+"""
+
+import pytest
+
+from conftest import assert_shortest, obstacle_grid, solver_for
+
+
+SEARCHES = [('bidirectional', {}), ('bidirectional', {'heuristic': True}), ('bidirectional_a_star', {})]
+
+
+@pytest.mark.parametrize('method, options', SEARCHES, ids=[f"{method} {options}" for method, options in SEARCHES])
+def test_shortest(maze, method, options):
+    assert_shortest(maze, method, **options)
+
+
+@pytest.mark.parametrize('method, options', SEARCHES, ids=[f"{method} {options}" for method, options in SEARCHES])
+def test_fewer_expansions_on_open_mazes(method, options):
+    solver  = solver_for(obstacle_grid(101, 0.1, 1))
+    bfs     = solver.bfs(result=True)
+    result  = getattr(solver, method)(result=True, **options)
+    assert result.length == bfs.length and result.expanded < bfs.expanded
@@ -0,0 +1,88 @@
+"""
+Budget-bounded searches: weighted A*, beam search and anytime A*, whole and partial paths.
+"""
+
+import time
+
+import pytest
+
+from conftest import SIZE, assert_any_path, assert_path, assert_shortest, queries, solver_for
+from Maze import Maze
+from MazeSolver import MazeSolver
+
+
+def test_shortest(maze):
+    assert_shortest(maze, 'a_star', max_expansions=10**9)
+    assert_shortest(maze, 'a_star', time_limit=60)
+    assert_shortest(maze, 'anytime_a_star')
+
+
+def test_anytime_bound(maze):
+    solver = solver_for(maze)
+    for start, end in queries(maze, count=20):
+        expected    = solver.bfs(start=start, end=end)
+        result      = solver.anytime_a_star(start=start, end=end, weight=3, max_expansions=50, result=True)
+        if result.path and not result.extra['partial'] and result.extra['bound'] is not None:
+            assert result.length <= result.extra['bound'] * (len(expected) - 1) + 1e-9
+
+
+def test_weighted_a_star(maze):
+    assert_any_path(maze, 'a_star', weight=2)
+    solver = solver_for(maze)
+    for start, end in queries(maze):
+        expected = solver.bfs(start=start, end=end)
+        if expected:
+            assert len(solver.a_star(start=start, end=end, weight=2)) - 1 <= 2 * (len(expected) - 1)
+
+
+def test_budget_runs_out(maze):
+    solver = solver_for(maze)
+    for method in ('a_star', 'greedy_best_first_search', 'beam_search', 'anytime_a_star'):
+        for start, end in queries(maze, count=10):
+            result = getattr(solver, method)(start=start, end=end, max_expansions=3, result=True)
+            if result.extra['partial']:
+                assert_path(maze, result.path, start)
+                assert result.path[-1] != end
+            elif result.path:
+                assert_path(maze, result.path, start, end)
+
+
+def test_beam_search(maze):
+    solver = solver_for(maze)
+    for start, end in queries(maze):
+        expected    = solver.bfs(start=start, end=end)
+        result      = solver.beam_search(start=start, end=end, beam_width=4, result=True)
+        if not expected:
+            assert result.path == []
+        elif result.extra['partial']:
+            assert_path(maze, result.path, start)
+        else:
+            assert_path(maze, result.path, start, end)
+        wide = solver.beam_search(start=start, end=end, beam_width=SIZE * SIZE)
+        assert len(wide) == len(expected)
+
+
+def test_contracted_a_star_rejects_budgets(maze):
+    with pytest.raises(ValueError):
+        solver_for(maze).a_star(contracted=True, weight=2)
+
+
+def test_time_limit_on_a_fresh_maze():
+    # The clock starts at the call: the graph is built within the limit, no components are labelled
+    for method in ('a_star', 'greedy_best_first_search', 'beam_search', 'anytime_a_star'):
+        solver      = MazeSolver(Maze.backtrack_generator(501, 501, 0), None)
+        start_time  = time.perf_counter()
+        result      = getattr(solver, method)(time_limit=0.01, result=True)
+        assert time.perf_counter() - start_time < 0.1, method
+        assert result.extra['partial'] == 1
+
+
+def test_walls_are_not_endpoints():
+    maze    = Maze.backtrack_generator(SIZE, SIZE, 0)
+    solver  = MazeSolver(maze, None)
+    wall    = (0, 0)
+    for method in ('a_star', 'greedy_best_first_search', 'beam_search', 'anytime_a_star'):
+        for budget in ({'max_expansions': 100}, {'time_limit': 1}):
+            assert getattr(solver, method)(start=wall, **budget) == [], method
+            assert getattr(solver, method)(end=wall, **budget) == [], method
+            assert getattr(solver, method)(start=(SIZE, 1), **budget) == [], method
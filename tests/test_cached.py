@@ -0,0 +1,34 @@
+"""
+Solving down cached distance fields: shortest paths, hits on repeated targets, fields dropped when the maze changes.
+"""
+
+import random
+
+from conftest import MAZES, assert_shortest, open_cells, solver_for, toggle, toggles
+from DistanceField import DistanceFieldCache
+from MazeSolver import MazeSolver
+
+
+def test_shortest(maze):
+    assert_shortest(maze, 'cached')
+
+
+def test_hits_and_evictions():
+    maze    = MAZES['obstacles'](7)
+    field   = maze.graph.size * 4
+    cache   = DistanceFieldCache(budget=2 * field)
+    solver  = MazeSolver(maze, None, cache=cache)
+    for end in random.Random(0).sample(open_cells(maze), 3):
+        solver.cached(start=end, end=end)
+        solver.cached(start=end, end=end)
+    assert cache.misses == 3 and cache.hits == 3
+    assert cache.evictions == 1 and cache.size <= cache.budget
+
+
+def test_changed_maze():
+    maze    = MAZES['obstacles'](8)
+    solver  = solver_for(maze)
+    solver.cached()
+    for cell in toggles(maze, 20, 0):
+        toggle(maze, cell)
+        assert solver.cached() == solver.wavefront(from_end=True)
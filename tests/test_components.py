@@ -0,0 +1,37 @@
+"""
+Connected components kept through Maze.set_cell against the labels of the same maze built anew.
+"""
+
+import numpy as np
+import pytest
+
+from conftest import MAZES, queries, rebuilt, toggle, toggles
+from Components import label_components
+from MazeSolver import MazeSolver
+
+
+@pytest.fixture(params=['backtrack', 'obstacles'])
+def maze(request):
+    return MAZES[request.param](5)
+
+
+def test_components(maze):
+    components = maze.components
+    for step, cell in enumerate(toggles(maze, 120, 1)):
+        toggle(maze, cell)
+        assert maze.components is components  # Updated, not rebuilt
+        labels, expected = components.labels, label_components(rebuilt(maze).graph)
+        assert np.array_equal(labels < 0, expected < 0)
+        # Same partition of the open cells: the labels map one to one
+        opened  = labels >= 0
+        pairs   = np.unique(np.stack((labels[opened], expected[opened])), axis=1)
+        assert pairs.shape[1] == np.unique(labels[opened]).size == np.unique(expected[opened]).size
+        assert len(components) == np.unique(expected[opened]).size
+
+
+def test_components_answer_connected(maze):
+    solver = MazeSolver(maze, None)
+    for step, cell in enumerate(toggles(maze, 40, 2)):
+        toggle(maze, cell)
+        for start, end in queries(maze, count=10, seed=step):
+            assert maze.connected(start, end) == bool(solver.wavefront(start=start, end=end))
@@ -0,0 +1,31 @@
+"""
+Searches of the contracted junction graph against bfs.
+"""
+
+import random
+
+import pytest
+
+from conftest import assert_shortest, open_cells, solver_for
+
+
+SEARCHES = [
+    ('dijkstra',                    {'contracted': True}),
+    ('a_star',                      {'contracted': True}),
+    ('bidirectional',               {'contracted': True}),
+    ('contracted_search',           {}),
+    ('contracted_search',           {'heuristic': True}),
+    ('contracted_bidirectional',    {}),
+]
+
+
+@pytest.mark.parametrize('method, options', SEARCHES, ids=[f"{method} {options}" for method, options in SEARCHES])
+def test_shortest(maze, method, options):
+    assert_shortest(maze, method, **options)
+
+
+def test_start_is_end(maze):
+    solver = solver_for(maze)
+    for cell in random.Random(0).sample(open_cells(maze), 10):
+        for method, options in SEARCHES:
+            assert getattr(solver, method)(start=cell, end=cell, **options) == [cell], method
@@ -0,0 +1,54 @@
+"""
+Terrain costs: dijkstra, dial, a_star and anytime_a_star find paths of the same lowest cost, also in solve_many workers.
+"""
+
+import numpy as np
+import pytest
+
+from conftest import assert_path, assert_shortest, obstacle_grid, queries, solver_for
+from MazeSolver import MazeSolver
+
+
+def test_dial_without_costs(maze):
+    assert_shortest(maze, 'dial')
+
+
+def test_costs():
+    maze = obstacle_grid(seed=3)
+    maze.set_costs(np.random.default_rng(3).integers(1, 10, maze.maze.shape))
+    solver = solver_for(maze)
+    for start, end in queries(maze):
+        expected = solver.dijkstra(start=start, end=end)
+        if not expected:
+            assert solver.dial(start=start, end=end) == solver.a_star(start=start, end=end) == []
+            continue
+        best = maze.path_cost(expected)
+        for method, options in (('dial', {}), ('a_star', {}), ('anytime_a_star', {})):
+            path = getattr(solver, method)(start=start, end=end, **options)
+            assert_path(maze, path, start, end)
+            assert maze.path_cost(path) == best, method
+        path = solver.a_star(start=start, end=end, weight=2)
+        assert maze.path_cost(path) <= 2 * best
+
+
+def test_solve_many_workers():
+    maze = obstacle_grid(seed=4)
+    maze.set_costs(np.random.default_rng(4).integers(1, 10, maze.maze.shape))
+    solver  = MazeSolver(maze, None)
+    pairs   = queries(maze, count=30)
+    serial  = [maze.path_cost(path) for start, end, path in solver.solve_many(pairs, 'dijkstra')]
+    pooled  = [maze.path_cost(path) for start, end, path in solver.solve_many(pairs, 'dijkstra', workers=2, chunksize=8)]
+    assert serial == pooled
+
+
+def test_set_costs():
+    maze = obstacle_grid(seed=5)
+    path = solver_for(maze).bfs()
+    assert maze.path_cost(path) == len(path) - 1
+    for costs in (np.zeros(maze.maze.shape), np.full(maze.maze.shape, 256), np.ones((3, 3))):
+        with pytest.raises(ValueError):
+            maze.set_costs(costs)
+    maze.set_costs(np.full(maze.maze.shape, 3))
+    assert maze.min_cost == 3 and maze.path_cost(path) == 3 * (len(path) - 1)
+    maze.set_costs(None)
+    assert maze.costs is None and maze.min_cost == 1
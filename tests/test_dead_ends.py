@@ -0,0 +1,39 @@
+"""
+Dead-end filling keeps the paths between the kept cells: the same lengths, and on perfect mazes the path alone.
+"""
+
+import numpy as np
+import pytest
+
+from conftest import MAZES, PERFECT, queries, solver_for
+from DeadEnds import fill_dead_ends
+from Maze import Maze
+
+
+def test_path_lengths(maze):
+    solver = solver_for(maze)
+    for start, end in queries(maze, count=20):
+        pruned = solver_for(maze.pruned_for(start, end))
+        assert len(pruned.bfs(start=start, end=end)) == len(solver.bfs(start=start, end=end))
+        assert len(pruned.a_star(start=start, end=end)) == len(solver.bfs(start=start, end=end))
+
+
+@pytest.mark.parametrize('kind', PERFECT)
+def test_perfect_mazes_keep_the_path_alone(kind):
+    maze    = MAZES[kind](3)
+    path    = solver_for(maze).bfs()
+    grid    = maze.maze.copy()
+    pruned, filled = fill_dead_ends(grid, (maze.start, maze.end))
+    assert sorted((x, y) for y, x in np.argwhere(pruned == 0).tolist()) == sorted(path)
+    assert filled == int((grid == 0).sum()) - len(path)
+    assert np.array_equal(grid, maze.maze)  # The grid is not modified
+
+
+def test_large_frontiers():
+    # A comb of 99 corridors: their dead ends are filled with NumPy together, the last ones cell by cell
+    maze = Maze.empty_maze(201, 201)
+    maze.maze[2:-1:2, 1:-2] = 1
+    maze.grid_changed()
+    for start, end in queries(maze, count=10):
+        pruned = solver_for(maze.pruned_for(start, end))
+        assert len(pruned.bfs(start=start, end=end)) == len(solver_for(maze).bfs(start=start, end=end))
@@ -0,0 +1,55 @@
+"""
+HPA* over the cached cluster graph: a path when bfs finds one, also after cells change.
+"""
+
+import pytest
+
+from conftest import MAZES, assert_any_path, assert_path, queries, toggle, toggles
+from MazeSolver import MazeSolver
+
+
+@pytest.mark.parametrize('cluster_size', [4, 8, 32])
+def test_paths(maze, cluster_size):
+    assert_any_path(maze, 'hierarchical', cluster_size=cluster_size)
+
+
+@pytest.mark.parametrize('kind', ['backtrack', 'obstacles'])
+@pytest.mark.parametrize('cluster_size', [4, 8])
+def test_changed_cells(kind, cluster_size):
+    maze        = MAZES[kind](5)
+    solver      = MazeSolver(maze, None)
+    hierarchy   = maze.hierarchy_for(cluster_size)
+    for step, cell in enumerate(toggles(maze, 40, 4)):
+        toggle(maze, cell)
+        if step % 5:
+            continue
+        for start, end in queries(maze, count=10, seed=step):
+            expected    = solver.bfs(start=start, end=end)
+            path        = solver.hierarchical(cluster_size=cluster_size, start=start, end=end)
+            if not expected:
+                assert path == []
+                continue
+            assert_path(maze, path, start, end)
+            assert len(path) >= len(expected)
+    assert maze.hierarchy_for(cluster_size) is hierarchy  # Rebuilt cluster by cluster, not from scratch
+
+
+class Recorder:
+    """
+    Visualizer that keeps the cells of the steps it is shown.
+    """
+    def __init__(self):
+        self.cells = []
+
+    def steps(self, cell, visited, start=None, end=None):
+        self.cells.append(cell)
+
+
+def test_hook_and_steps():
+    maze        = MAZES['obstacles'](5)
+    recorder    = Recorder()
+    solver      = MazeSolver(maze, recorder)
+    cells       = []
+    path        = solver.hierarchical(cluster_size=8, hook=cells.append, steps=True)
+    assert set(path[1:]) <= set(cells)  # The refinement searches reach every cell of the path
+    assert recorder.cells == cells
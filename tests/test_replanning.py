@@ -0,0 +1,41 @@
+"""
+Local cell toggles (Maze.set_cell) and D* Lite replanning against the same maze built anew.
+"""
+
+import numpy as np
+import pytest
+
+from conftest import MAZES, assert_path, queries, rebuilt, toggle, toggles
+from DStarLite import DStarLite
+from MazeSolver import MazeSolver
+
+
+@pytest.fixture(params=['backtrack', 'obstacles'])
+def maze(request):
+    return MAZES[request.param](5)
+
+
+def test_graph(maze):
+    solver = MazeSolver(maze, None)
+    solver.bfs()
+    for step, cell in enumerate(toggles(maze, 60, 0)):
+        toggle(maze, cell)
+        assert np.array_equal(maze.graph.mask, rebuilt(maze).graph.mask)
+        if step % 10 == 0:
+            fresh = MazeSolver(rebuilt(maze), None)
+            for start, end in queries(maze, count=10, seed=step):
+                assert solver.bfs(start=start, end=end) == fresh.bfs(start=start, end=end)
+
+
+def test_d_star_lite(maze):
+    planner = DStarLite(maze)
+    planner.plan()
+    for step, cells in enumerate(np.array_split(np.array(toggles(maze, 90, 3)), 9)):
+        for cell in cells.tolist():
+            toggle(maze, tuple(cell))
+        path        = planner.plan()
+        expected    = MazeSolver(rebuilt(maze), None).bfs(start=maze.start, end=maze.end)
+        if expected:
+            assert_path(maze, path, maze.start, maze.end)
+        assert len(path) == len(expected)
+    planner.close()
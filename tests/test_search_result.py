@@ -0,0 +1,37 @@
+"""
+SearchResult counters and the per-cell hook of the solvers.
+"""
+
+import inspect
+
+import pytest
+
+from conftest import SIZE
+from Maze import Maze
+from MazeSolver import MazeSolver
+from SearchResult import SearchResult
+
+
+def test_search_result():
+    maze    = Maze.backtrack_generator(SIZE, SIZE, 0)
+    cells   = []
+    result  = MazeSolver(maze, None).a_star(result=True, hook=cells.append)
+    assert result.length == len(result.path) - 1
+    assert result.expanded > 0 and result.pushes == len(cells) + 1
+
+
+SOLVERS = sorted(name for name, method in vars(MazeSolver).items() if hasattr(method, '__wrapped__'))
+
+
+@pytest.mark.parametrize('name', SOLVERS)
+def test_every_solver(name):
+    maze    = Maze.backtrack_generator(SIZE, SIZE, 0)
+    solver  = MazeSolver(maze, None)
+    assert 'hook' in inspect.signature(getattr(MazeSolver, name)).parameters
+    cells   = []
+    result  = getattr(solver, name)(result=True, hook=cells.append)
+    assert isinstance(result, SearchResult) and result.algorithm == name
+    assert result.path and result.length == len(result.path) - 1 and result.wall_time >= 0
+    assert cells, f"{name} did not call its hook"
+    if name != 'random':
+        assert getattr(solver, name)() == result.path
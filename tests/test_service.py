@@ -0,0 +1,93 @@
+"""
+The service registry keeps the shared memory of a maze while solves on it are in flight, and the workers
+solve with the terrain costs of the maze.
+"""
+
+import asyncio
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import MazeService
+from conftest import MAZES, solver_for
+from MazeService import MazeRegistry, MazeService as Service, solve_shared
+
+
+def attached(name: str) -> bool:
+    try:
+        shared_memory.SharedMemory(name=name).close()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def costly(seed: int):
+    maze = MAZES['obstacles'](seed)
+    maze.set_costs(np.random.default_rng(seed).integers(1, 10, maze.maze.shape))
+    return maze
+
+
+def test_remove_waits_for_the_tasks():
+    registry        = MazeRegistry()
+    registry.add('maze', MAZES['backtrack'](1))
+    maze, memory, costs = registry.acquire('maze')
+    name            = memory.name
+    registry.acquire('maze')
+    registry.add('maze', MAZES['kruskal'](1))  # Replaced with two tasks in flight
+    assert registry.get('maze')[1].name != name and attached(name)
+    registry.release(name)
+    assert attached(name)
+    registry.release(name)
+    assert not attached(name) and not registry.retired
+    current = registry.get('maze')[1].name
+    registry.remove('maze')  # Nothing in flight, freed now
+    assert not attached(current)
+    registry.close()
+
+
+def test_close_frees_the_tasks_in_flight():
+    registry = MazeRegistry()
+    registry.add('maze', costly(1))
+    maze, memory, costs = registry.acquire('maze')
+    registry.remove('maze')
+    registry.close()
+    assert not attached(memory.name) and not attached(costs.name)
+    registry.release(memory.name)  # A task done after the close
+
+
+def test_worker_costs_and_eviction(monkeypatch):
+    monkeypatch.setattr(MazeService, 'worker_solvers', type(MazeService.worker_solvers)())
+    monkeypatch.setattr(MazeService, 'WORKER_MAZES', 2)
+    registry = MazeRegistry()
+    try:
+        for seed in range(4):
+            maze = costly(seed)
+            registry.add(str(seed), maze)
+            maze, memory, costs = registry.get(str(seed))
+            result = solve_shared(memory.name, maze.maze.shape, costs.name, maze.start, maze.end, 'dijkstra', {}, True)
+            assert result['path'] == [list(cell) for cell in solver_for(maze).dijkstra()]
+        # The evicted blocks are closed in the worker, the registry can free them
+        assert list(MazeService.worker_solvers) == [registry.get(key)[1].name for key in ('2', '3')]
+    finally:
+        MazeService.worker_solvers.clear()
+        registry.close()
+
+
+def test_unload_with_solves_in_flight():
+    async def run():
+        service = Service(workers=1)
+        try:
+            await service.request({'op': 'generate', 'maze': 'demo', 'generator': 'backtrack', 'size': 101, 'seed': 1})
+            name    = service.registry.get('demo')[1].name
+            solves  = [asyncio.create_task(service.request({'op': 'solve', 'maze': 'demo', 'start': [1, 1],
+                                                            'end': [99, 99 - 2 * index], 'algorithm': 'bfs'}))
+                       for index in range(4)]
+            await asyncio.sleep(0)
+            assert service.registry.users[name] == 4
+            await service.request({'op': 'unload', 'maze': 'demo'})
+            results = await asyncio.gather(*solves)
+            assert all(result['length'] > 0 for result in results)
+            assert not attached(name) and not service.registry.users
+        finally:
+            service.close()
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+"""
+The cell-graph solvers (dijkstra, A*, Jump Point Search, dfs, random, greedy) against bfs on random queries,
+start == end and unreachable pairs included. The other solvers are tested in the modules of their features.
+"""
+
+import random
+
+import pytest
+
+from conftest import assert_any_path, assert_shortest, open_cells, solver_for
+
+
+# Solvers that return a shortest path: (name, method, options)
+SHORTEST = [
+    ('dijkstra',                    'dijkstra',                     {}),
+    ('a_star',                      'a_star',                       {}),
+    ('jump_point_search',           'jump_point_search',            {}),
+]
+
+# Solvers that return some path when there is one: (name, method, options)
+ANY_PATH = [
+    ('dfs',                         'dfs',                          {}),
+    ('random',                      'random',                       {}),
+    ('greedy_best_first_search',    'greedy_best_first_search',     {}),
+]
+
+
+@pytest.mark.parametrize('name, method, options', SHORTEST, ids=[name for name, method, options in SHORTEST])
+def test_shortest(maze, name, method, options):
+    assert_shortest(maze, method, **options)
+
+
+@pytest.mark.parametrize('name, method, options', ANY_PATH, ids=[name for name, method, options in ANY_PATH])
+def test_any_path(maze, name, method, options):
+    assert_any_path(maze, method, **options)
+
+
+def test_start_is_end(maze):
+    solver  = solver_for(maze)
+    cell    = random.Random(0).choice(open_cells(maze))
+    for name, method, options in SHORTEST + ANY_PATH:
+        assert getattr(solver, method)(start=cell, end=cell, **options) == [cell], name
@@ -0,0 +1,50 @@
+"""
+The steps animation marks the start and end of the query it shows, not the ones of the maze.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+from conftest import MAZES, open_cells
+from MazeSolver import MazeSolver
+from MazeVisualizer import END, START, MazeAnimation, MazeVisualizer
+
+
+def test_animation_endpoints():
+    maze        = MAZES['empty'](0)
+    start, end  = (3, 3), (7, 5)
+    animation   = MazeAnimation(maze, show=False, start=start, end=end)
+    assert (animation.buffer[3, 3] == START).all() and (animation.buffer[5, 7] == END).all()
+    # The endpoints of the maze are ordinary cells of this search
+    animation(maze.start)
+    animation(maze.end)
+    animation.solution([maze.start, maze.end])
+    assert not (animation.buffer[maze.start[1], maze.start[0]] == START).all()
+    assert not (animation.buffer[maze.end[1], maze.end[0]] == END).all()
+    animation(start)
+    assert (animation.buffer[3, 3] == START).all()
+
+
+def test_steps_use_the_query():
+    maze        = MAZES['empty'](0)
+    visualizer  = MazeVisualizer(maze)
+    shown       = []
+    visualizer.steps = lambda cell, visited, start, end: shown.append((start, end))
+    cells       = open_cells(maze)
+    start, end  = cells[40], cells[-40]
+    MazeSolver(maze, visualizer).a_star(start=start, end=end, steps=True)
+    assert shown and set(shown) == {(start, end)}
+
+
+def test_new_query_new_animation(monkeypatch):
+    maze        = MAZES['empty'](0)
+    visualizer  = MazeVisualizer(maze)
+    monkeypatch.setattr('MazeVisualizer.plt.show', lambda **kwargs: None)
+    visualizer.steps((1, 1), [(1, 1)])
+    first = visualizer.animation
+    assert (first.start, first.end) == (maze.start, maze.end)
+    visualizer.steps((2, 1), [(2, 1)], (2, 1), (5, 5))
+    assert visualizer.animation is not first
+    assert (visualizer.animation.start, visualizer.animation.end) == ((2, 1), (5, 5))
+    assert (visualizer.animation.buffer[5, 5] == END).all()
+    assert (visualizer.animation.buffer[1, 2] == START).all()  # The start is not painted over
@@ -0,0 +1,49 @@
+"""
+Constant-memory walks: Tremaux finds a path in any maze, the wall follower in perfect mazes, Pledge never a wrong one.
+"""
+
+from array import array
+
+import pytest
+
+from conftest import MAZES, PERFECT, assert_any_path, assert_path, queries, solver_for
+from MazeSolver import erase_loops
+
+
+def test_tremaux(maze):
+    assert_any_path(maze, 'tremaux')
+
+
+@pytest.mark.parametrize('kind', PERFECT)
+def test_wall_follower_on_perfect_mazes(kind):
+    maze    = MAZES[kind](2)
+    solver  = solver_for(maze)
+    for start, end in queries(maze):
+        expected = solver.bfs(start=start, end=end)
+        for left in (False, True):
+            # The path of a perfect maze is unique once the loops of the walk are erased
+            assert solver.wall_follower(left=left, start=start, end=end) == expected
+
+
+def test_walks_never_return_invalid_paths(maze):
+    solver = solver_for(maze)
+    for start, end in queries(maze):
+        expected = solver.bfs(start=start, end=end)
+        for method in ('wall_follower', 'pledge'):
+            path = getattr(solver, method)(start=start, end=end)
+            if path:
+                assert expected
+                assert_path(maze, path, start, end)
+
+
+def test_wall_follower_loops_around_islands():
+    maze = MAZES['empty'](0)
+    maze.maze[10:20, 10:20] = 1
+    maze.grid_changed()
+    result = solver_for(maze).wall_follower(start=(9, 9), end=(25, 25), result=True)
+    assert result.path == [] and result.extra['looped'] == 1  # It circles the border, the end is in the open
+
+
+def test_erase_loops():
+    assert list(erase_loops(array('i', [1, 2, 3, 2, 4, 5, 4, 6]))) == [1, 2, 4, 6]
+    assert list(erase_loops(array('i', [1, 2, 3]))) == [1, 2, 3]
@@ -0,0 +1,29 @@
+"""
+NumPy wavefront against bfs: the same path, the vectorized expansion of wide frontiers included.
+"""
+
+import pytest
+
+from conftest import assert_shortest, obstacle_grid, queries, solver_for
+from DistanceField import WIDE_FRONTIER
+from Maze import Maze
+
+
+def test_shortest(maze):
+    assert_shortest(maze, 'wavefront')
+    assert_shortest(maze, 'wavefront', from_end=True)
+
+
+def test_same_path_as_bfs(maze):
+    solver = solver_for(maze)
+    for start, end in queries(maze):
+        assert solver.wavefront(start=start, end=end) == solver.bfs(start=start, end=end)
+
+
+@pytest.mark.parametrize('maze', [Maze.empty_maze(201, 201), obstacle_grid(201, 0.2, 2)], ids=['empty', 'obstacles'])
+def test_wide_frontiers(maze):
+    solver = solver_for(maze)
+    for start, end in queries(maze, count=10):
+        result = solver.wavefront(start=start, end=end, result=True)
+        assert result.path == solver.bfs(start=start, end=end)
+    assert solver.wavefront(result=True).peak_frontier >= WIDE_FRONTIER  # The NumPy expansion ran
@@ -0,0 +1,43 @@
+"""
+Reused workspaces: the same answers as fresh arrays, whatever the queries before, and across the generation wrap.
+"""
+
+from conftest import SIZE, queries
+from Maze import Maze
+from MazeSolver import MazeSolver
+from Workspace import Workspace
+
+
+def test_reused_workspace(maze):
+    reused, fresh = MazeSolver(maze, None), MazeSolver(maze, None, workspace=False)
+    for start, end in queries(maze, count=80):
+        for method in ('bfs', 'dfs', 'dijkstra', 'a_star', 'greedy_best_first_search'):
+            assert getattr(reused, method)(start=start, end=end) == getattr(fresh, method)(start=start, end=end), method
+
+
+def test_workspace_generation_wraps():
+    maze    = Maze.backtrack_generator(SIZE, SIZE, 0)
+    solver  = MazeSolver(maze, None)
+    expected = solver.bfs()
+    maze.workspace.generation = maze.workspace.WRAP - 2
+    for query in range(4):
+        assert solver.bfs() == expected
+    assert maze.workspace.generation < 4
+
+
+def test_shared_workspace_between_mazes():
+    # A workspace of the right size can serve several mazes, a query never sees the cells of another
+    mazes       = [Maze.backtrack_generator(SIZE, SIZE, seed) for seed in range(3)]
+    workspace   = Workspace(SIZE * SIZE)
+    for start, end in queries(mazes[0], count=20):
+        for maze in mazes:
+            assert MazeSolver(maze, None, workspace=workspace).a_star(start=start, end=end) == MazeSolver(maze, None, workspace=False).a_star(start=start, end=end)
+
+
+def test_begin_is_constant_time():
+    workspace = Workspace(1000)
+    workspace.stamps[:] = 5
+    workspace.generation = 5
+    assert workspace.begin() == 6 and (workspace.stamps == 5).all()  # Nothing reset
+    workspace.generation = Workspace.WRAP - 1
+    assert workspace.begin() == 1 and not workspace.stamps.any()